@@ -0,0 +1,383 @@
+"""
+Balance - Monte Carlo wave-balance runner
+
+Plays many headless games across all cores, each with a scripted tower
+layout and an optional set of config overrides, then reports leak rates,
+the wave each game survived to, and gold at the start of every wave.
+
+Usage:
+    python balance.py --runs 400
+    python balance.py --layouts greedy greedy:cannon random --max-waves 25
+    python balance.py --variants variants.json --json report.json
+    python balance.py --map canyon --runs 200
+
+A variants file maps variant names to config overrides. Dotted keys reach
+into the TOWERS/ENEMIES dicts:
+
+    {"cheap_cannon": {"TOWERS.cannon.cost": 80},
+     "steep_waves": {"WAVE_HEALTH_SCALING": 0.2, "ENEMIES.fast.speed": 140}}
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import config
+from config import DEFAULT_MAP, GRID_SIZE, SIM_TICK_RATE, TOWERS
+from simulation import Simulation
+from gamelog import configure
+from maps import load_map
+from stats import compile_stats
+
+# Modules that copy config values with `from config import ...`; scalar
+# overrides are patched into each of them
+GAME_MODULES = ('config', 'simulation', 'enemy', 'enemy_store', 'tower', 'projectile')
+
+# Give up on a wave that runs longer than this (game seconds)
+MAX_WAVE_SECONDS = 600
+
+_MISSING = object()
+
+
+# ----------------------------------------------------------------------
+# Config variants
+# ----------------------------------------------------------------------
+
+def apply_variant(overrides):
+    """
+    Apply config overrides in this process
+
+    Args:
+        overrides: Dict of config name (dotted for dict entries) -> value
+
+    Returns:
+        list: Undo records for restore_variant()
+    """
+    undo = []
+    for key, value in overrides.items():
+        name, *keys = key.split('.')
+        if not hasattr(config, name):
+            raise KeyError(f"Unknown config setting: {name}")
+
+        if keys:
+            container = getattr(config, name)
+            for part in keys[:-1]:
+                container = container[part]
+            undo.append(('item', container, keys[-1], container.get(keys[-1], _MISSING)))
+            container[keys[-1]] = value
+        else:
+            for module_name in GAME_MODULES:
+                module = sys.modules.get(module_name)
+                if module is not None and hasattr(module, name):
+                    undo.append(('attr', module, name, getattr(module, name)))
+                    setattr(module, name, value)
+    # Entities read the compiled records, not the dicts
+    compile_stats()
+    return undo
+
+
+def restore_variant(undo):
+    """Revert apply_variant(), newest change first"""
+    for kind, target, key, old in reversed(undo):
+        if kind == 'attr':
+            setattr(target, key, old)
+        elif old is _MISSING:
+            del target[key]
+        else:
+            target[key] = old
+    compile_stats()
+
+
+# ----------------------------------------------------------------------
+# Scripted play
+# ----------------------------------------------------------------------
+
+def path_samples(sim, spacing=GRID_SIZE / 2):
+    """Points every `spacing` pixels along the enemy path"""
+    path = sim.path
+    count = int(path.total_length / spacing) + 1
+    return [path.position_at(i * spacing)[:2] for i in range(count)]
+
+
+def buildable_cells(sim):
+    """Every cell a tower could stand on, ignoring cost"""
+    return [(gx, gy) for gx in range(sim.cols) for gy in range(sim.rows)
+            if (gx, gy) not in sim.blocked_cells]
+
+
+def path_coverage(cell, tower_range, samples):
+    """Number of path samples within range of a cell's center"""
+    cx = cell[0] * GRID_SIZE + GRID_SIZE // 2
+    cy = cell[1] * GRID_SIZE + GRID_SIZE // 2
+    range_sq = tower_range * tower_range
+    return sum(1 for x, y in samples if (x - cx) ** 2 + (y - cy) ** 2 <= range_sq)
+
+
+def build_order(layout, sim, rng):
+    """
+    Turn a layout name into an ordered list of towers to buy
+
+    Layouts:
+        greedy: Cells covering the most path first, cycling tower types
+        greedy:<type>: Same, with only one tower type
+        random: Random cells within reach of the path, random types
+
+    Args:
+        layout: Layout name
+        sim: Fresh Simulation (for the path and grid)
+        rng: random.Random breaking ties / making random choices
+
+    Returns:
+        list: (tower_type, grid_x, grid_y) in purchase order
+    """
+    kind, _, only_type = layout.partition(':')
+    types = [only_type] if only_type else list(TOWERS)
+    for tower_type in types:
+        if tower_type not in TOWERS:
+            raise ValueError(f"Unknown tower type in layout: {tower_type}")
+
+    samples = path_samples(sim)
+    cells = buildable_cells(sim)
+
+    if kind == 'greedy':
+        # Score with the shortest range so every type placed there reaches
+        shortest = min(TOWERS[t]['range'] for t in types)
+        scored = []
+        for cell in cells:
+            score = path_coverage(cell, shortest, samples)
+            if score:
+                scored.append((-score, rng.random(), cell))
+        scored.sort()
+        # Hand out types round-robin over the best cells
+        return [(types[i % len(types)], cell[0], cell[1])
+                for i, (_, _, cell) in enumerate(scored)]
+
+    if kind == 'random':
+        order = []
+        for cell in cells:
+            tower_type = rng.choice(types)
+            if path_coverage(cell, TOWERS[tower_type]['range'], samples):
+                order.append((tower_type, cell[0], cell[1]))
+        rng.shuffle(order)
+        return order
+
+    raise ValueError(f"Unknown layout: {layout}")
+
+
+class Autoplayer:
+    """Spends gold between waves following a build order"""
+
+    def __init__(self, order):
+        self.order = list(order)
+        self.next_build = 0
+
+    def spend(self, sim):
+        """Buy towers in order, then upgrade the cheapest upgrades"""
+        while self.next_build < len(self.order):
+            tower_type, grid_x, grid_y = self.order[self.next_build]
+            reason = sim.can_place_tower(tower_type, grid_x, grid_y)
+            if reason == 'cannot afford':
+                return
+            self.next_build += 1
+            if reason is None:
+                sim.place_tower(tower_type, grid_x, grid_y)
+
+        while True:
+            upgradable = [t for t in sim.towers if 0 < t.get_upgrade_cost() <= sim.currency]
+            if not upgradable:
+                return
+            sim.upgrade_tower(min(upgradable, key=lambda t: t.get_upgrade_cost()))
+
+
+def play_game(job):
+    """
+    Play one game to game over or max_waves
+
+    Args:
+        job: Dict with layout, variant, overrides, seed, max_waves, sim_options,
+            and optionally an explicit build `order` used instead of the layout
+
+    Returns:
+        dict: Job identity plus per-wave spawned/leaked/gold lists; a game
+            whose wave runs past MAX_WAVE_SECONDS stops there with timed_out set
+    """
+    undo = apply_variant(job['overrides'])
+    try:
+        sim = Simulation(visual_effects=False, seed=job['seed'], **job['sim_options'])
+        order = job.get('order')
+        if order is None:
+            order = build_order(job['layout'], sim, random.Random(job['seed']))
+        player = Autoplayer(order)
+        max_wave_ticks = MAX_WAVE_SECONDS * SIM_TICK_RATE
+
+        spawned, leaked, gold = [], [], []
+        timed_out = False
+        while sim.wave < job['max_waves'] and not sim.game_over:
+            gold.append(sim.currency)
+            player.spend(sim)
+            sim.start_wave()
+            spawned.append(len(sim.enemies_to_spawn))
+            leaked_before = sim.enemies_leaked
+
+            wave_end = sim.tick + max_wave_ticks
+            while sim.wave_active and not sim.game_over and sim.tick < wave_end:
+                sim.step(sim.tick_dt)
+            leaked.append(sim.enemies_leaked - leaked_before)
+
+            # A stalled wave is still active and cannot be started again
+            if sim.wave_active and not sim.game_over:
+                timed_out = True
+                break
+
+        return {
+            'layout': job['layout'],
+            'variant': job['variant'],
+            'seed': job['seed'],
+            'waves_cleared': sim.wave - 1 if sim.game_over or timed_out else sim.wave,
+            'survived': not sim.game_over and not timed_out,
+            'timed_out': timed_out,
+            'spawned': spawned,
+            'leaked': leaked,
+            'gold': gold,
+            'towers': len(sim.towers),
+        }
+    finally:
+        restore_variant(undo)
+
+
+def quiet_worker():
+    """Pool initializer: keep workers' logging off the shared console"""
+    configure(console=False, ring_size=0)
+
+
+# ----------------------------------------------------------------------
+# Report
+# ----------------------------------------------------------------------
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def aggregate(results):
+    """
+    Combine game results per (layout, variant)
+
+    Returns:
+        list: One summary dict per group, in first-seen order
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault((result['layout'], result['variant']), []).append(result)
+
+    report = []
+    for (layout, variant), runs in groups.items():
+        cleared = sorted(r['waves_cleared'] for r in runs)
+        waves = max(len(r['spawned']) for r in runs)
+
+        leak_curve, gold_curve = [], []
+        for w in range(waves):
+            played = [r for r in runs if len(r['spawned']) > w]
+            spawned = sum(r['spawned'][w] for r in played)
+            leak_curve.append(sum(r['leaked'][w] for r in played) / spawned if spawned else 0.0)
+            gold_curve.append(sum(r['gold'][w] for r in played) / len(played))
+
+        total_spawned = sum(sum(r['spawned']) for r in runs)
+        report.append({
+            'layout': layout,
+            'variant': variant,
+            'runs': len(runs),
+            'survival_rate': sum(r['survived'] for r in runs) / len(runs),
+            'timeouts': sum(r['timed_out'] for r in runs),
+            'waves_cleared_mean': sum(cleared) / len(cleared),
+            'waves_cleared_p10': percentile(cleared, 0.1),
+            'waves_cleared_p50': percentile(cleared, 0.5),
+            'waves_cleared_p90': percentile(cleared, 0.9),
+            'leak_rate': sum(sum(r['leaked']) for r in runs) / total_spawned if total_spawned else 0.0,
+            'leak_curve': leak_curve,
+            'gold_curve': gold_curve,
+        })
+    return report
+
+
+def print_report(report, max_waves):
+    print(f"{'layout':<20} {'variant':<16} {'runs':>5} {'survive':>8} "
+          f"{'cleared':>8} {'p10':>4} {'p50':>4} {'p90':>4} {'leak%':>7}")
+    for row in report:
+        print(f"{row['layout']:<20} {row['variant']:<16} {row['runs']:>5} "
+              f"{row['survival_rate']:>8.0%} {row['waves_cleared_mean']:>8.1f} "
+              f"{row['waves_cleared_p10']:>4} {row['waves_cleared_p50']:>4} {row['waves_cleared_p90']:>4} "
+              f"{row['leak_rate'] * 100:>7.2f}")
+
+    for row in report:
+        print(f"\n{row['layout']} / {row['variant']} (of {max_waves} waves)")
+        if row['timeouts']:
+            print(f"  {row['timeouts']} games stopped on a wave that ran past {MAX_WAVE_SECONDS}s")
+        print("  wave  " + ' '.join(f"{w + 1:>6}" for w in range(len(row['leak_curve']))))
+        print("  leak% " + ' '.join(f"{v * 100:>6.1f}" for v in row['leak_curve']))
+        print("  gold  " + ' '.join(f"{v:>6.0f}" for v in row['gold_curve']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo wave-balance runner")
+    parser.add_argument('--runs', type=int, default=100, help="Games per layout/variant pair")
+    parser.add_argument('--layouts', nargs='+', default=['greedy', 'random'],
+                        help="greedy, greedy:<tower_type> or random")
+    parser.add_argument('--variants', help="JSON file of named config overrides")
+    parser.add_argument('--max-waves', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0, help="First game seed")
+    parser.add_argument('--map', default=DEFAULT_MAP, help="Map name or map file to play on")
+    parser.add_argument('--vectorized', action='store_true', help="Use the NumPy enemy store")
+    parser.add_argument('--batch-targeting', action='store_true', help="Use batched NumPy targeting")
+    parser.add_argument('--json', help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    variants = {'baseline': {}}
+    if args.variants:
+        with open(args.variants) as f:
+            variants.update(json.load(f))
+
+    # Fail here, not once per worker game
+    try:
+        game_map = load_map(args.map)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    sim_options = {'vectorized_enemies': args.vectorized, 'batch_targeting': args.batch_targeting,
+                   'game_map': args.map}
+    jobs = [{'layout': layout, 'variant': name, 'overrides': overrides,
+             'seed': args.seed + run, 'max_waves': args.max_waves, 'sim_options': sim_options}
+            for layout in args.layouts
+            for name, overrides in variants.items()
+            for run in range(args.runs)]
+
+    start = time.perf_counter()
+    results = []
+    with multiprocessing.Pool(args.workers, initializer=quiet_worker) as pool:
+        for i, result in enumerate(pool.imap_unordered(play_game, jobs, chunksize=4), 1):
+            results.append(result)
+            print(f"\r{i}/{len(jobs)} games", end='', file=sys.stderr, flush=True)
+    print(f"\r{len(jobs)} games on {game_map.name} in {time.perf_counter() - start:.1f}s "
+          f"on {args.workers} workers", file=sys.stderr)
+
+    # Stable report order regardless of which worker finished first
+    order = {(job['layout'], job['variant']): i for i, job in enumerate(jobs)}
+    results.sort(key=lambda r: (order[(r['layout'], r['variant'])], r['seed']))
+    report = aggregate(results)
+    print_report(report, args.max_waves)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'map': game_map.name, 'max_waves': args.max_waves, 'variants': variants,
+                       'report': report}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+"""
+Benchmarks - Performance scripts for the headless game core
+
+Run from the repository root. ``python -m benchmarks`` runs the scenario
+suite against the stored baseline (see runner.py); the bench_* modules are
+standalone comparisons, e.g. ``python -m benchmarks.bench_spatial``.
+"""
@@ -0,0 +1,6 @@
+"""Entry point for ``python -m benchmarks`` (see benchmarks/runner.py)"""
+import sys
+
+from benchmarks.runner import main
+
+sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Enemy store benchmark - per-object Enemy.update vs one vectorized step
+
+Walks the same crowd of enemies with both backends, checks that positions,
+health and status match exactly, and reports the time per tick. Movement
+is only part of a tick, so it then plays the benchmark scenarios through
+Simulation on both backends and reports whole ticks per second, which is
+what decides whether vectorized_enemies is worth turning on.
+
+Usage:
+    python -m benchmarks.bench_enemy_store [num_enemies]
+"""
+import sys
+import time
+
+from benchmarks.scenarios import SCENARIOS
+from enemy import Enemy
+from enemy_store import EnemyStore, numpy_available
+from simulation import Simulation
+
+TICKS = 600
+DT = 1 / 60
+
+# Scenarios played end to end, and how many ticks each
+GAME_SCENARIOS = ('late_game', 'fast_swarm', 'splash_storm')
+GAME_TICKS = 240
+
+
+def play(name, **sim_options):
+    """
+    Run one benchmark scenario through Simulation.step
+
+    Returns:
+        tuple: (ticks per second, final snapshot)
+    """
+    sim, hook = SCENARIOS[name](1234, **sim_options)
+    start = time.perf_counter()
+    for _ in range(GAME_TICKS):
+        if hook is not None:
+            hook()
+        sim.step(sim.tick_dt)
+    return GAME_TICKS / (time.perf_counter() - start), sim.snapshot()
+
+
+def main():
+    if not numpy_available():
+        print("NumPy is not installed - nothing to compare")
+        return
+
+    num_enemies = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    path = Simulation(visual_effects=False).path_points
+    types = ['basic', 'fast', 'tank', 'regen']
+
+    objects = []
+    store = EnemyStore(path)
+    for i in range(num_enemies):
+        enemy_type = types[i % len(types)]
+        objects.append(Enemy(enemy_type, path, start_wave=12))
+        store.spawn(enemy_type, start_wave=12)
+
+    # Stagger them along the path, damage regen enemies and slow a few
+    for i, (enemy, view) in enumerate(zip(objects, store.views)):
+        for _ in range(i % 200):
+            enemy.update(DT)
+        enemy.take_damage(enemy.max_health * 0.5)
+        if i % 3 == 0:
+            enemy.apply_slow(2.5, 0.6)
+        view.x, view.y, view.distance, view.path_index = enemy.x, enemy.y, enemy.distance, enemy.path_index
+        view.health = enemy.health
+        view.slow_timer, view.slow_amount = enemy.slow_timer, enemy.slow_amount
+
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        for enemy in objects:
+            enemy.update(DT)
+    object_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        store.step(DT)
+    store_time = time.perf_counter() - start
+
+    mismatches = 0
+    for enemy, view in zip(objects, store.views):
+        if (enemy.x, enemy.y, enemy.distance, enemy.health, enemy.path_index, enemy.alive, enemy.slow_timer) != \
+                (view.x, view.y, view.distance, view.health, view.path_index, view.alive, view.slow_timer):
+            mismatches += 1
+
+    print(f"{num_enemies} enemies, {TICKS} ticks")
+    print(f"  Enemy.update:      {object_time / TICKS * 1000:8.3f} ms/tick")
+    print(f"  EnemyStore.step:   {store_time / TICKS * 1000:8.3f} ms/tick  ({object_time / store_time:.1f}x)")
+    print(f"  state mismatches:  {mismatches}")
+
+    print(f"Whole game ticks ({GAME_TICKS} per scenario)")
+    for name in GAME_SCENARIOS:
+        object_rate, object_state = play(name)
+        store_rate, store_state = play(name, vectorized_enemies=True)
+        print(f"  {name:<14}{object_rate:8.0f} -> {store_rate:6.0f} ticks/s  "
+              f"({store_rate / object_rate:.1f}x, same game: {object_state == store_state})")
+
+
+if __name__ == '__main__':
+    main()
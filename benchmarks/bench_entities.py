@@ -0,0 +1,56 @@
+"""
+Entity removal benchmark - list copy + list.remove vs one compaction pass
+
+Keeps about 10,000 particles alive (explosions topping the pool back up
+every frame) and times the particle update phase both ways.
+
+Usage:
+    python -m benchmarks.bench_entities [live_particles]
+"""
+import random
+import sys
+import time
+
+from entities import EntityList
+from particles import create_explosion
+
+FRAMES = 300
+DT = 1 / 60
+
+
+def run(particles, live_target, remove_one_by_one):
+    """Simulate FRAMES frames and return the average particle-phase time"""
+    random.seed(7)
+    total = 0.0
+    for _ in range(FRAMES):
+        # Top the pool back up with explosions (not timed)
+        while len(particles) < live_target:
+            particles.extend(create_explosion(500, 400, (0.8, 0.2, 0.2, 1), num_particles=20))
+
+        start = time.perf_counter()
+        if remove_one_by_one:
+            for particle in particles[:]:
+                particle.update(DT)
+                if not particle.alive:
+                    particles.remove(particle)
+        else:
+            for particle in particles:
+                particle.update(DT)
+            particles.compact()
+        total += time.perf_counter() - start
+    return total / FRAMES
+
+
+def main():
+    live_target = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    old = run([], live_target, remove_one_by_one=True)
+    new = run(EntityList(), live_target, remove_one_by_one=False)
+
+    print(f"~{live_target} live particles, {FRAMES} frames")
+    print(f"  copy + list.remove:  {old * 1000:8.3f} ms/frame")
+    print(f"  EntityList.compact:  {new * 1000:8.3f} ms/frame  ({old / new:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
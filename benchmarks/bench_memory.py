@@ -0,0 +1,100 @@
+"""
+Memory benchmark - bytes per entity with shared stat records and __slots__
+
+Builds 10,000 of each entity and measures the heap they take with
+tracemalloc. "before" rebuilds the old layout from the same objects: a
+plain instance __dict__ plus, for enemies and towers, a private copy of the
+config dict as `stats`.
+
+Usage:
+    python -m benchmarks.bench_memory [count]
+"""
+import gc
+import random
+import sys
+import tracemalloc
+
+from config import ENEMIES, GRID_SIZE, TOWERS, WAVE_HEALTH_SCALING
+from enemy import Enemy
+from particles import Particle
+from projectile import Projectile
+from simulation import Simulation
+from tower import Tower
+
+
+class Unslotted:
+    """Attribute bag with an instance __dict__, like the classes used to be"""
+
+
+def unslotted(obj, config_dict=None):
+    """Copy a slotted object's attributes into an Unslotted one"""
+    copy = Unslotted()
+    for name in type(obj).__slots__:
+        setattr(copy, name, getattr(obj, name))
+    if config_dict is not None:
+        copy.stats = config_dict.copy()
+    return copy
+
+
+def heap_bytes(build):
+    """Bytes still allocated after build() returns, with its result alive"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    path = Simulation().path
+    enemy_types = list(ENEMIES)
+    tower_types = list(TOWERS)
+
+    def enemy(i):
+        return Enemy(enemy_types[i % len(enemy_types)], path, 1 + i % 40)
+
+    def legacy_enemy(i):
+        obj = unslotted(enemy(i), ENEMIES[enemy_types[i % len(enemy_types)]])
+        # Every enemy used to compute its own max health float
+        obj.max_health = obj.health = obj.stats['health'] * (1 + (i % 40) * WAVE_HEALTH_SCALING)
+        return obj
+
+    def tower(i):
+        tower = Tower(tower_types[i % len(tower_types)], i % 30, i // 30, GRID_SIZE)
+        tower.upgrade()
+        return tower
+
+    def legacy_tower(i):
+        return unslotted(tower(i), TOWERS[tower_types[i % len(tower_types)]])
+
+    rng = random.Random(1)
+    targets = [enemy(i) for i in range(16)]
+
+    def projectile(i):
+        return Projectile(rng.uniform(0, 1500), rng.uniform(0, 900), targets[i % 16], 25, 300)
+
+    def particle(i):
+        return Particle(rng.uniform(0, 1500), rng.uniform(0, 900), (1.0, 0.5, 0.0),
+                        rng.uniform(-100, 100), rng.uniform(-100, 100), rng.uniform(0.3, 0.7))
+
+    rows = [
+        ('enemy', enemy, legacy_enemy),
+        ('tower', tower, legacy_tower),
+        ('projectile', projectile, lambda i: unslotted(projectile(i))),
+        ('particle', particle, lambda i: unslotted(particle(i))),
+    ]
+
+    print(f"bytes per entity at {count:,} entities (tracemalloc)")
+    print(f"  {'entity':<11}{'before':>8}{'after':>8}{'saved':>8}")
+    for name, make, make_legacy in rows:
+        before = heap_bytes(lambda: [make_legacy(i) for i in range(count)]) / count
+        after = heap_bytes(lambda: [make(i) for i in range(count)]) / count
+        print(f"  {name:<11}{before:>8.0f}{after:>8.0f}{1 - after / before:>8.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Object pool benchmark - machine-gun board with and without free lists
+
+Plays the same waves twice with visual effects on (and the pure-Python
+ParticleList, so particles are objects too): once with the pools, once with
+pooling disabled. Reports step times, garbage collections and pool stats.
+
+Usage:
+    python -m benchmarks.bench_pools [waves]
+"""
+import gc
+import sys
+import time
+
+from particles import ParticleList
+from pool import POOLS, pool_stats
+from simulation import Simulation
+
+TOWER_CELLS = [(5, 3), (8, 4), (10, 8), (14, 10), (20, 12), (17, 7), (3, 6), (12, 6), (16, 11),
+               (22, 13), (7, 7), (24, 9), (13, 11), (19, 8)]
+
+
+def run(waves, pooled):
+    for pool in POOLS.values():
+        pool.free.clear()
+        pool.max_free = 4096 if pooled else 0
+        pool.created = pool.reused = pool.released = 0
+
+    sim = Simulation(seed=1)
+    sim.particles = ParticleList(seed=1)
+    sim.currency = 10 ** 6
+    for grid_x, grid_y in TOWER_CELLS:
+        sim.place_tower('machine_gun', grid_x, grid_y)
+
+    collections_before = sum(stat['collections'] for stat in gc.get_stats())
+    step_times = []
+    while sim.wave < waves and not sim.game_over:
+        if not sim.wave_active:
+            sim.start_wave()
+        start = time.perf_counter()
+        sim.step(sim.tick_dt)
+        step_times.append(time.perf_counter() - start)
+    collections = sum(stat['collections'] for stat in gc.get_stats()) - collections_before
+
+    step_times.sort()
+    return {
+        'ticks': len(step_times),
+        'mean_ms': sum(step_times) / len(step_times) * 1000,
+        'p99_ms': step_times[int(len(step_times) * 0.99)] * 1000,
+        'max_ms': step_times[-1] * 1000,
+        'collections': collections,
+        'outcome': (sim.health, sim.currency, sim.tick),
+    }
+
+
+def main():
+    waves = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+
+    plain = run(waves, pooled=False)
+    pooled = run(waves, pooled=True)
+    stats = pool_stats()
+
+    print(f"14 machine guns, {waves} waves, {plain['ticks']} ticks")
+    for label, result in (('no pools', plain), ('pools', pooled)):
+        print(f"  {label:<9} mean {result['mean_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms  "
+              f"max {result['max_ms']:.2f} ms  gc collections {result['collections']}")
+    print(f"  same outcome: {plain['outcome'] == pooled['outcome']}")
+    for name, s in stats.items():
+        print(f"  {name:<13} created {s['created']:>6}  reused {s['reused']:>7}  hit rate {s['hit_rate']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
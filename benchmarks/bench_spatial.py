@@ -0,0 +1,103 @@
+"""
+Spatial hash benchmark - 500 towers targeting 5,000 enemies
+
+Compares a full Tower.find_target scan against spatial-hash range queries
+and checks that both pick exactly the same targets.
+
+Usage:
+    python -m benchmarks.bench_spatial
+"""
+import random
+import time
+
+from config import GRID_COLS, GRID_ROWS, GRID_SIZE
+from enemy import Enemy
+from spatial import SpatialHash
+from tower import Tower
+
+NUM_TOWERS = 500
+NUM_ENEMIES = 5000
+SPLASH_QUERIES = 2000
+SPLASH_RADIUS = 80
+
+
+def build_scenario(num_towers=NUM_TOWERS, num_enemies=NUM_ENEMIES, seed=1):
+    """Scatter towers and enemies uniformly over the board"""
+    rng = random.Random(seed)
+    width = GRID_COLS * GRID_SIZE
+    height = GRID_ROWS * GRID_SIZE
+    path = [(0, 0), (width, height)]
+
+    towers = []
+    for _ in range(num_towers):
+        tower_type = rng.choice(['cannon', 'machine_gun', 'splash', 'freeze'])
+        towers.append(Tower(tower_type, rng.randrange(GRID_COLS), rng.randrange(GRID_ROWS), GRID_SIZE))
+
+    enemies = []
+    for _ in range(num_enemies):
+        enemy = Enemy('basic', path)
+        enemy.x = rng.uniform(0, width)
+        enemy.y = rng.uniform(0, height)
+        enemy.distance = rng.uniform(0, 2000)
+        enemies.append(enemy)
+
+    return towers, enemies
+
+
+def main():
+    towers, enemies = build_scenario()
+
+    start = time.perf_counter()
+    index = SpatialHash(GRID_SIZE)
+    for enemy in enemies:
+        index.insert(enemy)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    brute = [tower.find_target(enemies) for tower in towers]
+    brute_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hashed = [tower.find_target(index.query(tower.x, tower.y, tower.range, ordered=True)) for tower in towers]
+    hashed_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(brute, hashed) if a is not b)
+
+    # Splash queries: count enemies inside the blast radius
+    rng = random.Random(2)
+    points = [(rng.uniform(0, GRID_COLS * GRID_SIZE), rng.uniform(0, GRID_ROWS * GRID_SIZE))
+              for _ in range(SPLASH_QUERIES)]
+
+    def in_radius(candidates, x, y):
+        r2 = SPLASH_RADIUS * SPLASH_RADIUS
+        return sum(1 for e in candidates if (e.x - x) ** 2 + (e.y - y) ** 2 <= r2)
+
+    start = time.perf_counter()
+    brute_hits = [in_radius(enemies, x, y) for x, y in points]
+    brute_splash = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hashed_hits = [in_radius(index.query(x, y, SPLASH_RADIUS), x, y) for x, y in points]
+    hashed_splash = time.perf_counter() - start
+
+    # Incremental update cost: move every enemy a little and re-bucket
+    start = time.perf_counter()
+    for enemy in enemies:
+        enemy.x += 3
+        index.move(enemy)
+    move_time = time.perf_counter() - start
+
+    print(f"{NUM_TOWERS} towers x {NUM_ENEMIES} enemies")
+    print(f"  index build:          {build_time * 1000:8.2f} ms")
+    print(f"  index move (all):     {move_time * 1000:8.2f} ms")
+    print(f"  targeting, full scan: {brute_time * 1000:8.2f} ms")
+    print(f"  targeting, hashed:    {hashed_time * 1000:8.2f} ms  ({brute_time / hashed_time:.1f}x)")
+    print(f"  target mismatches:    {mismatches}")
+    print(f"{SPLASH_QUERIES} splash queries (r={SPLASH_RADIUS})")
+    print(f"  full scan:            {brute_splash * 1000:8.2f} ms")
+    print(f"  hashed:               {hashed_splash * 1000:8.2f} ms  ({brute_splash / hashed_splash:.1f}x)")
+    print(f"  hit count mismatches: {sum(1 for a, b in zip(brute_hits, hashed_hits) if a != b)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Scenario benchmark suite with regression thresholds
+
+Runs every scenario in benchmarks/scenarios.py in a fresh process (so peak
+RSS belongs to that scenario) and reports:
+
+    ticks/s       Simulation steps per second (best of --repeat runs)
+    alloc peak    Peak Python heap growth during the run (tracemalloc)
+    alloc blocks  Heap blocks still allocated after the run
+    peak RSS      Process high-water mark, scenario build included
+
+Results are compared with a stored baseline. A scenario fails when ticks/s
+drops, or peak allocation or RSS grows, by more than --threshold.
+
+Usage:
+    python -m benchmarks                     # run, compare with baseline.json
+    python -m benchmarks --save-baseline     # record a new baseline
+    python -m benchmarks late_game --ticks 600 --threshold 0.1
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Not available on Windows - RSS is reported as missing
+    resource = None
+
+from benchmarks.scenarios import SCENARIOS
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+SEED = 1234
+
+# Metric -> True if a larger value is better
+METRICS = {
+    'ticks_per_sec': True,
+    'alloc_peak_kb': False,
+    'peak_rss_kb': False,
+}
+
+
+def run_ticks(sim, hook, ticks):
+    dt = sim.tick_dt
+    step = sim.step
+    for _ in range(ticks):
+        if hook is not None:
+            hook()
+        step(dt)
+
+
+def measure(name, ticks, repeat):
+    """
+    Benchmark one scenario in the current process
+
+    Returns:
+        dict: Metric name -> value
+    """
+    build = SCENARIOS[name]
+
+    best = None
+    for _ in range(repeat):
+        sim, hook = build(SEED)
+        start = time.perf_counter()
+        run_ticks(sim, hook, ticks)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Separate run for allocations, since tracing slows everything down
+    sim, hook = build(SEED)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    run_ticks(sim, hook, ticks)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    return {
+        'ticks_per_sec': ticks / best,
+        'alloc_peak_kb': (peak - base) / 1024,
+        'alloc_blocks': blocks,
+        'peak_rss_kb': rss,  # ru_maxrss is in KB on Linux
+    }
+
+
+def _measure_job(args):
+    return measure(*args)
+
+
+def compare(results, baseline, threshold):
+    """
+    Check results against the baseline
+
+    Returns:
+        list: (scenario, metric, baseline value, new value, relative change)
+            for every regression beyond the threshold
+    """
+    regressions = []
+    for name, metrics in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            before, after = old.get(metric), metrics.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append((name, metric, before, after, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Scenario benchmark suite")
+    parser.add_argument('scenarios', nargs='*', help=f"Subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--ticks', type=int, default=240, help="Steps per run")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per scenario (best is kept)")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Write results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.15, help="Allowed regression (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    # A fresh process per scenario keeps peak RSS and heap state separate
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for name in names:
+        with context.Pool(1) as pool:
+            results[name] = pool.apply(_measure_job, ((name, args.ticks, args.repeat),))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('scenarios', {})
+
+    print(f"{'scenario':<15}{'ticks/s':>10}{'base':>10}{'alloc peak':>12}{'blocks':>9}{'peak RSS':>11}")
+    for name, m in results.items():
+        base = baseline.get(name, {}).get('ticks_per_sec')
+        rss = f"{m['peak_rss_kb'] / 1024:.1f} MB" if m['peak_rss_kb'] else 'n/a'
+        print(f"{name:<15}{m['ticks_per_sec']:>10.0f}{base or 0:>10.0f}"
+              f"{m['alloc_peak_kb']:>9.0f} KB{m['alloc_blocks']:>9}{rss:>11}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'ticks': args.ticks, 'scenarios': results}, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, metric, before, after, change in regressions:
+        print(f"REGRESSION {name} {metric}: {before:.1f} -> {after:.1f} ({change:+.1%})")
+    if not baseline:
+        print("No baseline to compare with; run with --save-baseline")
+    elif not regressions:
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
@@ -0,0 +1,121 @@
+"""
+Benchmark scenarios - Fixed late-game situations built straight from entities
+
+Each scenario puts Enemy, Tower and Projectile objects and particle effects
+into a headless Simulation exactly as the game would have them, without
+playing the waves that lead up to it. The same seed always builds the same
+state, so timings are comparable between commits. Keyword arguments go to
+Simulation, to build the same state on another backend.
+"""
+import random
+
+from config import GRID_SIZE, TOWERS
+from particles import make_particle_system
+from projectile import Projectile
+from simulation import Simulation
+from tower import Tower
+
+
+def good_cells(sim, count, rng):
+    """Free cells reaching the most path (as a player would pick them)"""
+    table = sim.coverage.table(min(t['range'] for t in TOWERS.values()))
+    cells = sorted(table, key=lambda cell: (-table[cell].length, rng.random()))
+    return cells[:count]
+
+
+def add_towers(sim, count, types, rng, level=3):
+    """Place `count` towers on good cells, cycling through `types`"""
+    for i, (grid_x, grid_y) in enumerate(good_cells(sim, count, rng)):
+        tower = Tower(types[i % len(types)], grid_x, grid_y, GRID_SIZE)
+        while tower.level < level:
+            tower.upgrade()
+        sim.towers.append(tower)
+    sim.refresh_coverage()
+
+
+def add_enemies(sim, count, types, wave, rng):
+    """Spread enemies over the path, as if a wave had been walking a while"""
+    path = sim.path
+    for i in range(count):
+        enemy = sim.spawn_enemy(types[i % len(types)], wave)
+        enemy.distance = rng.uniform(0, path.total_length * 0.95)
+        enemy.x, enemy.y, segment = path.position_at(enemy.distance)
+        enemy.prev_x, enemy.prev_y = enemy.x, enemy.y
+        enemy.path_index = segment + 1
+        sim.enemy_index.move(enemy)
+
+
+def add_projectiles(sim, count, rng):
+    """Shots already in flight from random towers at random enemies"""
+    for _ in range(count):
+        tower = rng.choice(sim.towers)
+        target = rng.choice(sim.enemies)
+        sim.projectiles.append(Projectile(tower.x, tower.y, target, tower.damage, tower.projectile_speed,
+                                          tower.type, tower.splash_radius))
+
+
+def start_wave(sim, wave, spawned):
+    """Mark a wave as running, with the rest of its enemies still queued"""
+    sim.wave = wave - 1
+    sim.start_wave()
+    del sim.enemies_to_spawn[:spawned]
+
+
+def late_game(seed, **sim_options):
+    """Wave 30 with 40 max-level towers of every type"""
+    rng = random.Random(seed)
+    sim = Simulation(seed=seed, **sim_options)
+    sim.health = 10 ** 6
+    start_wave(sim, 30, 40)
+    add_towers(sim, 40, list(TOWERS), rng)
+    add_enemies(sim, 40, ['basic', 'fast', 'fast', 'tank', 'regen'], 30, rng)
+    add_projectiles(sim, 80, rng)
+    return sim, None
+
+
+def fast_swarm(seed, **sim_options):
+    """2,000 fast enemies against 20 machine guns and freeze towers"""
+    rng = random.Random(seed)
+    sim = Simulation(seed=seed, **sim_options)
+    sim.health = 10 ** 6
+    add_towers(sim, 20, ['machine_gun', 'machine_gun', 'freeze'], rng)
+    add_enemies(sim, 2000, ['fast'], 10, rng)
+    return sim, None
+
+
+def splash_storm(seed, **sim_options):
+    """30 max-level mortars firing into 500 tanks, 400 shells in the air"""
+    rng = random.Random(seed)
+    sim = Simulation(seed=seed, **sim_options)
+    sim.health = 10 ** 6
+    add_towers(sim, 30, ['splash'], rng)
+    add_enemies(sim, 500, ['tank'], 20, rng)
+    add_projectiles(sim, 400, rng)
+    return sim, None
+
+
+def particles_20k(seed, **sim_options):
+    """20,000 live explosion particles, topped up every tick, and nothing else"""
+    rng = random.Random(seed)
+    sim = Simulation(seed=seed, **sim_options)
+    sim.particles = make_particle_system(capacity=20000, seed=seed)
+    width, height = sim.grid_pixel_width, sim.grid_pixel_height
+
+    def explode(count):
+        for _ in range(count):
+            sim.particles.spawn_explosion(rng.uniform(0, width), rng.uniform(0, height),
+                                          (0.8, 0.3, 0.2, 1), num_particles=20)
+
+    explode(1000)
+    # Replaces the oldest particles about as fast as they fade out
+    return sim, lambda: explode(20)
+
+
+# name -> builder(seed, **sim_options) returning (sim, hook called before every
+# step or None), in report order
+SCENARIOS = {
+    'late_game': late_game,
+    'fast_swarm': fast_swarm,
+    'splash_storm': splash_storm,
+    'particles_20k': particles_20k,
+}
@@ -11,8 +11,8 @@ DESKTOP_HEIGHT = 1080  # For testing on PC
 
 # Grid Settings
 GRID_SIZE = 50  # Size of each grid cell in pixels
-GRID_COLS = 30  # Number of columns
-GRID_ROWS = 18  # Number of rows
+GRID_COLS = 30  # Number of columns, for maps that don't set their own
+GRID_ROWS = 18  # Number of rows, for maps that don't set their own
 
 # Game Settings
 STARTING_HEALTH = 20
@@ -44,6 +44,7 @@ TOWERS = {
         'upgrade_cost': 100,
         'upgrade_damage': 5,
         'upgrade_fire_rate': 0.5,
+        'hitscan': False,  # True: hits instantly with a tracer instead of a projectile
     },
     'splash': {
         'name': 'Mortar',
@@ -73,6 +74,7 @@ TOWERS = {
         'upgrade_fire_rate': 0.3,
     }
 }
+TOWER_MAX_LEVEL = 3  # Levels past the first are bought as upgrades
 
 # Enemy Stats
 ENEMIES = {
@@ -114,23 +116,59 @@ ENEMIES = {
     }
 }
 
+# Simulation Settings
+SIM_TICK_RATE = 120  # Fixed simulation steps per second, independent of FPS
+MAX_SUBSTEPS = 12  # Most steps run for one frame; time beyond that is dropped
+MAX_FRAME_TIME = 0.25  # Longer frames (window drag, breakpoint) are clamped
+
+# Logging Settings (also see TD_LOG in gamelog.py)
+LOG_LEVEL = 'WARNING'  # Default for every category: DEBUG, INFO, WARNING, ERROR
+LOG_CATEGORY_LEVELS = {}  # Per-category overrides, e.g. {'combat': 'DEBUG'}
+LOG_RING_SIZE = 1000  # Recent log records kept in memory
+LOG_RATE_LIMIT = 20  # Console lines per second per message (0 = unlimited)
+
+# Profiler Settings (F3 in game)
+PROFILER_WINDOW = 600  # Frames kept for the rolling percentiles
+PROFILE_DIR = 'profiles'  # Timings are written here on exit if F3 was used
+
+# Quality Settings (see quality.py)
+ADAPTIVE_QUALITY = True  # Drop visual detail when frames run over budget
+FRAME_BUDGET = 1 / 60  # Seconds of work per frame (16.6 ms)
+QUALITY_HEADROOM = 0.6  # Detail comes back once frames take under this share of the budget
+QUALITY_DEGRADE_FRAMES = 30  # Frames over budget before dropping a level
+QUALITY_RESTORE_FRAMES = 180  # Frames with headroom before restoring a level
+
+# Telemetry Settings (see telemetry.py)
+RECORD_TELEMETRY = False  # Trace every tick of each game to TELEMETRY_DIR
+TELEMETRY_DIR = 'telemetry'
+TELEMETRY_INTERVAL = 1  # Record enemies and towers every Nth tick (shots always)
+
+# Replay Settings
+RECORD_REPLAYS = True  # Save each game's input log when it ends or the app closes
+REPLAY_DIR = 'replays'
+
+# Combat Settings
+PROJECTILE_HIT_RADIUS = 10  # Shots hit once their path comes this close to the target
+TRACER_LIFETIME = 0.06  # Seconds a hitscan tracer stays on screen
+
+# Save Settings
+SAVE_FILE = 'suspend.sav'  # Written when the app is paused or closed, resumed on next start
+
+# Effects Settings
+PARTICLE_CAPACITY = 4096  # Max live particles; the oldest are replaced first
+POOL_MAX_FREE = 4096  # Released shots/flashes/particles kept for reuse, per pool
+
 # Wave Settings
 WAVE_SPAWN_INTERVAL = 1.0  # Seconds between enemy spawns
 WAVE_REST_TIME = 5.0  # Seconds between waves
 BOSS_WAVE_INTERVAL = 20  # Boss every X waves
+WAVE_HEALTH_SCALING = 0.15  # Enemy health grows by this fraction per wave
+WAVE_BONUS_BASE = 50  # Gold for clearing a wave...
+WAVE_BONUS_PER_WAVE = 10  # ...plus this much per wave number
 
-# Path Definition (normalized coordinates 0-1, will be scaled to grid)
-# This creates a winding path from left to right across the widescreen
-PATH_WAYPOINTS = [
-    (0.05, 0.1),   # Start left side
-    (0.3, 0.1),    # Move right
-    (0.3, 0.5),    # Down
-    (0.6, 0.5),    # Right
-    (0.6, 0.8),    # Down
-    (0.85, 0.8),   # Right
-    (0.85, 0.4),   # Up
-    (0.95, 0.4),   # End right side
-]
+# Map Settings (paths and grid sizes live in map files, see maps.py)
+MAP_DIR = 'maps'  # Relative to the game's directory
+DEFAULT_MAP = 'default'  # Map a new game starts on (file name without extension)
 
 # UI Colors
 UI_BACKGROUND = (0.15, 0.15, 0.15, 1)
@@ -1,35 +1,48 @@
 """
 Enemy class - Handles enemy behavior, movement, and stats
 """
-import math
-from config import ENEMIES
+from path import PathTable
+from gamelog import get_logger
+from stats import ENEMY_STATS
+
+log = get_logger('enemy')
 
 
 class Enemy:
     """Represents an enemy that moves along the path"""
     
+    __slots__ = ('type', 'uid', 'stats', 'max_health', 'health', 'path', 'distance', 'path_index',
+                 'x', 'y', 'prev_x', 'prev_y', 'speed', 'current_speed', 'slow_timer',
+                 'slow_amount', 'alive', 'reached_end', 'regen_rate')
+    
     def __init__(self, enemy_type, path_points, start_wave=1):
         """
         Initialize an enemy
         
         Args:
             enemy_type: String key from ENEMIES config
-            path_points: List of (x, y) coordinates for the path
+            path_points: PathTable, or list of (x, y) coordinates for the path
             start_wave: Wave number (affects scaling)
         """
         self.type = enemy_type
-        self.stats = ENEMIES[enemy_type].copy()
+        self.uid = 0  # Unique per game, assigned by Simulation.spawn_enemy
+        self.stats = stats = ENEMY_STATS[enemy_type]  # Shared, read-only
         
         # Scale health based on wave
-        self.max_health = self.stats['health'] * (1 + (start_wave - 1) * 0.15)
+        self.max_health = stats.max_health(start_wave)
         self.health = self.max_health
         
         # Movement
+        if not isinstance(path_points, PathTable):
+            path_points = PathTable.for_points(path_points)
         self.path = path_points
-        self.path_index = 1  # Start moving toward second waypoint (first is starting position)
+        self.distance = 0.0  # Arc length walked along the path
+        self.path_index = 1  # Waypoint currently heading towards (first is starting position)
         self.x = path_points[0][0]
         self.y = path_points[0][1]
-        self.speed = self.stats['speed']
+        self.prev_x = self.x  # Position before the last update, for interpolation
+        self.prev_y = self.y
+        self.speed = stats.speed
         self.current_speed = self.speed  # Can be modified by slow effects
         
         # Status effects
@@ -41,7 +54,7 @@ class Enemy:
         self.reached_end = False
         
         # Regen for regen type enemies
-        self.regen_rate = self.stats.get('regen_rate', 0)
+        self.regen_rate = stats.regen_rate
         
     def update(self, dt):
         """
@@ -52,6 +65,9 @@ class Enemy:
         """
         if not self.alive:
             return
+        
+        self.prev_x = self.x
+        self.prev_y = self.y
             
         # Handle slow effect
         if self.slow_timer > 0:
@@ -65,33 +81,42 @@ class Enemy:
         if self.regen_rate > 0 and self.health < self.max_health:
             self.health = min(self.max_health, self.health + self.regen_rate * dt)
         
-        # Move towards next waypoint
-        if self.path_index < len(self.path):
-            target_x, target_y = self.path[self.path_index]
+        # Move along the path
+        path = self.path
+        total = path.total_length
+        if self.distance < total:
+            distance = self.distance + self.current_speed * dt
+            if distance > total:
+                distance = total
+            self.distance = distance
+            
+            # Enemies only ever walk forward, so step the segment on from the
+            # current one instead of searching the whole table
+            segments = path.segments
+            segment = self.path_index - 1
+            start, end, start_x, start_y, dir_x, dir_y = segments[segment]
+            while distance >= end:
+                segment += 1
+                start, end, start_x, start_y, dir_x, dir_y = segments[segment]
+            
+            along = distance - start
+            self.x = start_x + dir_x * along
+            self.y = start_y + dir_y * along
             
-            # Calculate distance to target
-            dx = target_x - self.x
-            dy = target_y - self.y
-            distance = math.sqrt(dx**2 + dy**2)
+            if distance < total:
+                self.path_index = segment + 1
+            else:
+                # Standing on the last waypoint, leaves on the next update
+                self.path_index = len(path)
             
-            # Move towards target
-            if distance > 0:
-                # Normalize direction and move
-                move_distance = self.current_speed * dt
-                
-                if distance <= move_distance:
-                    # Reached waypoint
-                    self.x = target_x
-                    self.y = target_y
-                    self.path_index += 1
-                else:
-                    # Move towards waypoint
-                    self.x += (dx / distance) * move_distance
-                    self.y += (dy / distance) * move_distance
+            if log.debug_on:
+                log.debug("%s moved to (%.1f, %.1f), speed=%s, path_index=%s",
+                          self.type, self.x, self.y, self.current_speed, self.path_index)
         else:
             # Reached end of path
             self.reached_end = True
             self.alive = False
+            log.info("%s reached the end of the path", self.type)
     
     def take_damage(self, damage):
         """
@@ -106,6 +131,8 @@ class Enemy:
         self.health -= damage
         if self.health <= 0:
             self.alive = False
+            if log.debug_on:
+                log.debug("%s died at (%.1f, %.1f)", self.type, self.x, self.y)
             return True
         return False
     
@@ -126,4 +153,4 @@ class Enemy:
     
     def get_reward(self):
         """Returns currency reward for killing this enemy"""
-        return self.stats['reward']
+        return self.stats.reward
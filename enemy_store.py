@@ -0,0 +1,361 @@
+"""
+Enemy store - Struct-of-arrays enemy backend, advanced with NumPy
+
+Keeps every enemy's movement and status state in flat NumPy arrays so the
+whole wave moves in one vectorized step instead of one Enemy.update call
+per enemy. NumPy is optional; use `numpy_available()` before creating one.
+"""
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional - the object backend still works
+    np = None
+
+from path import PathTable
+from stats import ENEMY_STATS
+
+
+def numpy_available():
+    """Returns True if NumPy can be imported"""
+    return np is not None
+
+
+class EnemyStore:
+    """Holds all enemies of a game as parallel arrays"""
+
+    # Per-enemy float columns, grown together
+    FLOAT_FIELDS = ('x', 'y', 'prev_x', 'prev_y', 'distance', 'health', 'max_health', 'speed', 'current_speed',
+                    'slow_timer', 'slow_amount', 'regen_rate')
+
+    def __init__(self, path_points, capacity=256):
+        """
+        Initialize an empty store
+
+        Args:
+            path_points: PathTable, or list of (x, y) coordinates for the path
+            capacity: Initial number of slots (grows as needed)
+        """
+        if np is None:
+            raise ImportError("EnemyStore requires NumPy")
+
+        if not isinstance(path_points, PathTable):
+            path_points = PathTable.for_points(path_points)
+        self.path = path_points
+
+        # Arc-length table as arrays for vectorized lookups
+        self.path_x = np.array([p[0] for p in path_points], dtype=np.float64)
+        self.path_y = np.array([p[1] for p in path_points], dtype=np.float64)
+        self.path_cumulative = np.array(path_points.cumulative, dtype=np.float64)
+        self.path_dir_x = np.array([d[0] for d in path_points.directions] or [0.0], dtype=np.float64)
+        self.path_dir_y = np.array([d[1] for d in path_points.directions] or [0.0], dtype=np.float64)
+
+        self.count = 0  # Slots in use, always the first `count` entries
+        self.views = []  # EnemyView per slot, same order as the arrays
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """Create (or grow) the arrays, keeping existing contents"""
+        old_count = self.count
+        for name in self.FLOAT_FIELDS:
+            new = np.zeros(capacity, dtype=np.float64)
+            if old_count:
+                new[:old_count] = getattr(self, name)[:old_count]
+            setattr(self, name, new)
+        for name, dtype in (('path_index', np.int64), ('alive', np.bool_),
+                            ('reached_end', np.bool_), ('removed', np.bool_)):
+            new = np.zeros(capacity, dtype=dtype)
+            if old_count:
+                new[:old_count] = getattr(self, name)[:old_count]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, enemy_type, start_wave=1):
+        """
+        Add an enemy at the start of the path
+
+        Args:
+            enemy_type: String key from ENEMIES config
+            start_wave: Wave number (affects scaling)
+
+        Returns:
+            EnemyView: Enemy-compatible handle to the new slot
+        """
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+
+        stats = ENEMY_STATS[enemy_type]
+        i = self.count
+        self.count += 1
+
+        max_health = stats.max_health(start_wave)
+        self.x[i] = self.path[0][0]
+        self.y[i] = self.path[0][1]
+        self.prev_x[i] = self.x[i]
+        self.prev_y[i] = self.y[i]
+        self.distance[i] = 0.0
+        self.health[i] = max_health
+        self.max_health[i] = max_health
+        self.speed[i] = stats.speed
+        self.current_speed[i] = stats.speed
+        self.slow_timer[i] = 0
+        self.slow_amount[i] = 0
+        self.regen_rate[i] = stats.regen_rate
+        self.path_index[i] = 1
+        self.alive[i] = True
+        self.reached_end[i] = False
+        self.removed[i] = False
+
+        view = EnemyView(self, i, enemy_type, stats)
+        self.views.append(view)
+        return view
+
+    def step(self, dt):
+        """
+        Advance every live enemy by dt seconds
+
+        Mirrors Enemy.update exactly.
+
+        Args:
+            dt: Delta time in seconds
+        """
+        n = self.count
+        if n == 0:
+            return
+
+        alive = self.alive[:n]
+        x = self.x[:n]
+        y = self.y[:n]
+        distance = self.distance[:n]
+        health = self.health[:n]
+        max_health = self.max_health[:n]
+        slow_timer = self.slow_timer[:n]
+        slow_amount = self.slow_amount[:n]
+        current_speed = self.current_speed[:n]
+        speed = self.speed[:n]
+        regen_rate = self.regen_rate[:n]
+        path_index = self.path_index[:n]
+
+        # Masked writes below leave every other slot untouched without
+        # gathering the selected ones into temporary arrays first
+
+        # Remember where live enemies were, for render interpolation
+        np.copyto(self.prev_x[:n], x, where=alive)
+        np.copyto(self.prev_y[:n], y, where=alive)
+
+        # Handle slow effect
+        slowed = alive & (slow_timer > 0)
+        unslowed = alive ^ slowed
+        np.subtract(slow_timer, dt, out=slow_timer, where=slowed)
+        np.copyto(current_speed, speed * (1 - slow_amount), where=slowed)
+        np.copyto(current_speed, speed, where=unslowed)
+        np.copyto(slow_amount, 0.0, where=unslowed)
+
+        # Handle regeneration
+        regen = alive & (regen_rate > 0) & (health < max_health)
+        if regen.any():
+            np.copyto(health, np.minimum(max_health, health + regen_rate * dt), where=regen)
+
+        # Enemies standing on the last waypoint leave this step
+        path = self.path
+        total = path.total_length
+        moving = alive & (distance < total)
+        finished = alive ^ moving
+        self.reached_end[:n] |= finished
+        alive ^= finished
+
+        # Move along the path (a path with no length finishes everyone above)
+        if not moving.any():
+            return
+        walked = np.minimum(total, distance + current_speed * dt)
+        np.copyto(distance, walked, where=moving)
+
+        segment = np.searchsorted(self.path_cumulative, walked, side='right') - 1
+        np.minimum(segment, path.num_segments - 1, out=segment)
+        np.maximum(segment, 0, out=segment)
+        along = walked - self.path_cumulative[segment]
+        np.copyto(x, self.path_x[segment] + self.path_dir_x[segment] * along, where=moving)
+        np.copyto(y, self.path_y[segment] + self.path_dir_y[segment] * along, where=moving)
+        np.copyto(path_index, np.where(walked < total, segment + 1, len(path)), where=moving)
+
+    def changed_slots(self, cell_size):
+        """
+        Slots the game loop has to visit after a step
+
+        Args:
+            cell_size: Bucket size of the spatial index, in pixels
+
+        Returns:
+            list: In slot order, every enemy that is no longer alive (it
+                escaped or was killed) or that moved into another cell
+        """
+        n = self.count
+        # prev_x/prev_y hold each live enemy's position from before the step;
+        # one array of all four coordinates keeps the NumPy call count low
+        cells = _cells(np.concatenate((self.x[:n], self.y[:n], self.prev_x[:n], self.prev_y[:n])), cell_size)
+        moved = (cells[:2 * n] != cells[2 * n:]).reshape(2, n).any(axis=0)
+        return np.nonzero(moved | ~self.alive[:n])[0].tolist()
+
+    def splash_damage(self, x, y, radius, damage):
+        """
+        Damage every live enemy within radius of a point
+
+        Same result as take_damage on each of them.
+
+        Args:
+            x, y: Center of the blast in pixels
+            radius: Blast radius in pixels
+            damage: Damage dealt to each enemy hit
+        """
+        n = self.count
+        dx = self.x[:n] - x
+        dy = self.y[:n] - y
+        hit = self.alive[:n] & (np.sqrt(dx * dx + dy * dy) <= radius)
+        if not hit.any():
+            return
+        health = self.health[:n]
+        health[hit] -= damage
+        self.alive[:n][hit & (health <= 0)] = False
+
+    def remove(self, view):
+        """Mark an enemy for removal at the next compact()"""
+        self.removed[view.slot] = True
+
+    def compact(self):
+        """
+        Drop removed slots, keeping the remaining enemies in order
+
+        Removed views are detached: they keep their last values and report
+        alive=False, so projectiles still holding them behave like they
+        would with a dead Enemy object.
+        """
+        n = self.count
+        removed = self.removed[:n]
+        if not removed.any():
+            return
+
+        for slot in np.flatnonzero(removed):
+            self.views[slot].detach()
+
+        keep = np.flatnonzero(~removed)
+        for name in self.FLOAT_FIELDS + ('path_index', 'alive', 'reached_end', 'removed'):
+            column = getattr(self, name)
+            column[:len(keep)] = column[keep]
+
+        self.views = [self.views[slot] for slot in keep]
+        for slot, view in enumerate(self.views):
+            view.slot = slot
+        self.count = len(keep)
+
+
+def _cells(values, cell_size):
+    """
+    Grid cell of each coordinate, exactly as `value // cell_size`
+
+    A float division can round up onto the next cell boundary; the two
+    corrections put those values back. Much faster than np.floor_divide.
+    """
+    cells = np.floor(values / cell_size)
+    cells -= cells * cell_size > values
+    cells += (cells + 1) * cell_size <= values
+    return cells
+
+
+class _DetachedSlot:
+    """Frozen copy of one store slot, for enemies no longer in the store"""
+
+    def __init__(self, store, slot):
+        for name in EnemyStore.FLOAT_FIELDS + ('path_index', 'alive', 'reached_end', 'removed'):
+            setattr(self, name, getattr(store, name)[slot:slot + 1].copy())
+        self.alive[0] = False
+        self.removed[0] = True
+
+
+def _column(name):
+    """Property reading/writing one column of the view's slot"""
+    def getter(self):
+        # A plain Python number: NumPy scalars are slow in arithmetic
+        return getattr(self.store, name).item(self.slot)
+
+    def setter(self, value):
+        getattr(self.store, name)[self.slot] = value
+
+    return property(getter, setter)
+
+
+class EnemyView:
+    """Enemy-compatible handle to one slot of an EnemyStore"""
+
+    x = _column('x')
+    y = _column('y')
+    prev_x = _column('prev_x')
+    prev_y = _column('prev_y')
+    distance = _column('distance')
+    health = _column('health')
+    max_health = _column('max_health')
+    speed = _column('speed')
+    current_speed = _column('current_speed')
+    slow_timer = _column('slow_timer')
+    slow_amount = _column('slow_amount')
+    regen_rate = _column('regen_rate')
+    path_index = _column('path_index')
+    alive = _column('alive')
+    reached_end = _column('reached_end')
+
+    __slots__ = ('store', 'slot', 'type', 'uid', 'stats')
+
+    def __init__(self, store, slot, enemy_type, stats):
+        self.store = store
+        self.slot = slot
+        self.type = enemy_type
+        self.uid = 0  # Unique per game, assigned by Simulation.spawn_enemy
+        self.stats = stats
+
+    @property
+    def path(self):
+        return self.store.path
+
+    def detach(self):
+        """Stop tracking the store; keep the last values"""
+        self.store = _DetachedSlot(self.store, self.slot)
+        self.slot = 0
+
+    def update(self, dt):
+        """Movement is done in bulk by EnemyStore.step"""
+
+    def take_damage(self, damage):
+        """
+        Apply damage to enemy
+
+        Args:
+            damage: Amount of damage to apply
+
+        Returns:
+            bool: True if enemy died from this damage
+        """
+        self.health -= damage
+        if self.health <= 0:
+            self.alive = False
+            return True
+        return False
+
+    def apply_slow(self, duration, amount):
+        """
+        Apply slow effect to enemy
+
+        Args:
+            duration: How long the slow lasts (seconds)
+            amount: Slow percentage (0.5 = 50% slow)
+        """
+        self.slow_timer = max(self.slow_timer, duration)
+        self.slow_amount = max(self.slow_amount, amount)
+
+    def get_health_percentage(self):
+        """Returns current health as percentage of max health"""
+        max_health = self.max_health
+        return self.health / max_health if max_health > 0 else 0
+
+    def get_reward(self):
+        """Returns currency reward for killing this enemy"""
+        return self.stats.reward
@@ -0,0 +1,46 @@
+"""
+Entity containers - Lists with cheap bulk removal for the game loop
+"""
+from operator import attrgetter
+
+
+class EntityList(list):
+    """
+    A list of game entities that drops dead ones in a single pass
+
+    The game loop iterates the list directly, lets entities flag themselves
+    dead, then calls compact() once. That replaces a full list copy per
+    frame plus an O(n) list.remove per dead entity, and keeps the survivors
+    in their original order so iteration stays deterministic.
+    """
+
+    __slots__ = ()
+
+    def compact(self, attr='alive', on_remove=None):
+        """
+        Remove every entity whose flag attribute is false
+
+        Args:
+            attr: Name of the boolean attribute that marks live entities
+            on_remove: Optional callback for each removed entity
+
+        Returns:
+            int: Number of entities removed
+        """
+        is_live = attrgetter(attr)
+        # Survivors before the first dead entity are already in place
+        for write, entity in enumerate(self):
+            if not is_live(entity):
+                break
+        else:
+            return 0
+
+        for entity in self[write:]:
+            if is_live(entity):
+                self[write] = entity
+                write += 1
+            elif on_remove is not None:
+                on_remove(entity)
+        removed = len(self) - write
+        del self[write:]
+        return removed
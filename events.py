@@ -0,0 +1,87 @@
+"""
+Event bus - Game events queued during a step, dispatched in batches
+
+The simulation emits an event wherever something happens (a shot, a hit,
+a kill, a leak) and carries on. At the end of the step each subscriber
+gets the whole tick's batch of one event type in a single call. Visual
+effects, stats, sound or logging can subscribe without the step knowing
+about them, and nothing is even constructed for a type nobody listens
+to.
+
+Events are namedtuples; the class is also the event type:
+
+    sim.events.subscribe(Kill, lambda kills: print(len(kills), "kills"))
+
+Gold and lives are still changed directly by the step, since the game's
+outcome must not depend on which subscribers exist.
+"""
+from collections import namedtuple
+
+# A tower fired; x, y is where the target was when the shot left
+Shot = namedtuple('Shot', 'tower target x y')
+# A shot landed at x, y (splash shots hurt everything within splash_radius)
+Hit = namedtuple('Hit', 'x y target damage splash_radius tower_type')
+# An enemy was killed and its reward paid out
+Kill = namedtuple('Kill', 'enemy x y reward')
+# An enemy reached the end of the path; health is the lives left after it
+Leak = namedtuple('Leak', 'enemy health')
+
+# Dispatch order within a tick
+EVENT_TYPES = (Shot, Hit, Kill, Leak)
+
+
+class EventBus:
+    """Per-type event queues and their subscribers"""
+
+    def __init__(self):
+        self.subscribers = {kind: [] for kind in EVENT_TYPES}
+        # Queues exist only for types with subscribers, so emit() is a
+        # dict miss for everything else
+        self.queues = {}
+
+    def subscribe(self, kind, handler):
+        """
+        Call handler(events) once per tick with that tick's events of a type
+
+        Args:
+            kind: Event class, e.g. Kill
+            handler: Callable taking a non-empty list of events
+        """
+        handlers = self.subscribers[kind]
+        if handler not in handlers:
+            handlers.append(handler)
+        self.queues.setdefault(kind, [])
+
+    def unsubscribe(self, kind, handler):
+        """Stop sending events to a handler (no-op if it isn't subscribed)"""
+        handlers = self.subscribers[kind]
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers:
+            self.queues.pop(kind, None)
+
+    def wants(self, kind):
+        """True if anyone listens to this event type"""
+        return kind in self.queues
+
+    def emit(self, kind, *fields):
+        """Queue an event for the end of the tick (dropped if nobody listens)"""
+        queue = self.queues.get(kind)
+        if queue is not None:
+            queue.append(kind(*fields))
+
+    def dispatch(self):
+        """Hand every queued batch to its subscribers, in EVENT_TYPES order"""
+        queues = self.queues
+        for kind in EVENT_TYPES:
+            batch = queues.get(kind)
+            if batch:
+                # Events emitted by a handler go into the next batch
+                queues[kind] = []
+                for handler in self.subscribers[kind]:
+                    handler(batch)
+
+    def clear(self):
+        """Drop queued events without dispatching them"""
+        for kind in self.queues:
+            self.queues[kind] = []
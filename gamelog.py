@@ -0,0 +1,191 @@
+"""
+Game log - Levelled, per-category logging that costs nothing when off
+
+Built on the standard logging module under the 'td' logger, one child per
+category ('td.combat', 'td.wave', ...). Each category is wrapped in a
+Channel whose `debug_on` / `info_on` flags are plain attributes, so hot
+loops guard with a single attribute check and only format when enabled:
+
+    log = get_logger('combat')
+    if log.debug_on:
+        log.debug("Hit for %s damage", damage)
+
+configure() (called by main.py, or by scripts) sets the levels, keeps the
+last LOG_RING_SIZE records in memory and rate-limits the console. Levels
+can also be set with the TD_LOG environment variable, e.g.
+TD_LOG=info or TD_LOG=info,combat:debug.
+"""
+from collections import deque
+import copy
+import logging
+import os
+import time
+
+from config import LOG_CATEGORY_LEVELS, LOG_LEVEL, LOG_RATE_LIMIT, LOG_RING_SIZE
+
+ROOT_NAME = 'td'
+LOG_FORMAT = '%(relativeCreated)9.0f %(levelname)-7s %(name)-10s %(message)s'
+
+_channels = {}
+_ring = None
+
+
+class Channel:
+    """One log category with cached level checks"""
+
+    __slots__ = ('category', 'logger', 'debug_on', 'info_on')
+
+    def __init__(self, category):
+        self.category = category
+        self.logger = logging.getLogger(f'{ROOT_NAME}.{category}')
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the effective level after configuration changes"""
+        self.debug_on = self.logger.isEnabledFor(logging.DEBUG)
+        self.info_on = self.logger.isEnabledFor(logging.INFO)
+
+    def debug(self, msg, *args):
+        if self.debug_on:
+            self.logger.debug(msg, *args)
+
+    def info(self, msg, *args):
+        if self.info_on:
+            self.logger.info(msg, *args)
+
+    def warning(self, msg, *args):
+        self.logger.warning(msg, *args)
+
+    def error(self, msg, *args):
+        self.logger.error(msg, *args)
+
+
+def get_logger(category):
+    """Returns the shared Channel for a category"""
+    channel = _channels.get(category)
+    if channel is None:
+        channel = _channels[category] = Channel(category)
+    return channel
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the last N records in memory; formats only when read"""
+
+    def __init__(self, capacity):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def recent(self, count=None):
+        """Formatted text of the newest `count` records (default: all)"""
+        records = list(self.records)
+        if count is not None:
+            records = records[-count:]
+        return [self.format(record) for record in records]
+
+
+class RateLimitedHandler(logging.StreamHandler):
+    """
+    Console handler writing at most `per_second` records per message template
+
+    Suppressed records are counted and the count is appended to the next
+    record that gets through, so nothing disappears silently. The suffix goes
+    on a copy: other handlers (the ring buffer) hold the same record object.
+    """
+
+    def __init__(self, per_second, stream=None):
+        super().__init__(stream)
+        self.per_second = per_second
+        self.windows = {}  # (logger, template) -> [window start, count, suppressed]
+
+    def emit(self, record):
+        key = (record.name, record.msg)
+        now = record.created
+        window = self.windows.get(key)
+        if window is None or now - window[0] >= 1.0:
+            suppressed = window[2] if window else 0
+            self.windows[key] = [now, 1, 0]
+            if suppressed:
+                record = copy.copy(record)
+                record.msg = f"{record.msg} [{suppressed} similar suppressed]"
+        elif window[1] < self.per_second:
+            window[1] += 1
+        else:
+            window[2] += 1
+            return
+        super().emit(record)
+
+
+def parse_levels(spec):
+    """
+    Parse 'info,combat:debug' into (default level, {category: level})
+
+    Returns:
+        tuple: (str or None, dict)
+    """
+    default = None
+    categories = {}
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        if ':' in part:
+            category, level = part.split(':', 1)
+            categories[category.strip()] = level.strip().upper()
+        else:
+            default = part.upper()
+    return default, categories
+
+
+def configure(level=None, categories=None, ring_size=LOG_RING_SIZE, rate_limit=LOG_RATE_LIMIT, console=True):
+    """
+    Set up the game's logging (safe to call again to reconfigure)
+
+    Args:
+        level: Default level for every category (default LOG_LEVEL / TD_LOG)
+        categories: Dict of category -> level overriding the default
+        ring_size: Records kept in memory for recent() (0 = none)
+        rate_limit: Console records per second per message (0 = unlimited)
+        console: Also write records to stderr
+    """
+    global _ring
+
+    env_level, env_categories = parse_levels(os.environ.get('TD_LOG', ''))
+    level = level or env_level or LOG_LEVEL
+    levels = dict(LOG_CATEGORY_LEVELS)
+    levels.update(env_categories)
+    levels.update(categories or {})
+
+    root = logging.getLogger(ROOT_NAME)
+    root.setLevel(level)
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    _ring = None
+    if ring_size:
+        _ring = RingBufferHandler(ring_size)
+        _ring.setFormatter(formatter)
+        root.addHandler(_ring)
+    if console:
+        stream = RateLimitedHandler(rate_limit) if rate_limit else logging.StreamHandler()
+        stream.setFormatter(formatter)
+        root.addHandler(stream)
+    if not root.handlers:
+        root.addHandler(logging.NullHandler())
+
+    for category in set(levels) | set(_channels):
+        logging.getLogger(f'{ROOT_NAME}.{category}').setLevel(levels.get(category, logging.NOTSET))
+    for channel in _channels.values():
+        channel.refresh()
+
+
+def set_level(category, level):
+    """Change one category's level at runtime"""
+    logging.getLogger(f'{ROOT_NAME}.{category}').setLevel(level)
+    get_logger(category).refresh()
+
+
+def recent(count=None):
+    """Last records kept in memory, oldest first (empty before configure())"""
+    return _ring.recent(count) if _ring is not None else []
@@ -0,0 +1,74 @@
+"""
+Input log - Tick-stamped record of every player action in a game
+
+Together with the game's seed this is all that is needed to reproduce a
+session: the simulation runs fixed-size ticks, so applying the same actions
+on the same ticks gives the same game. See replay.py for playing one back.
+"""
+import json
+
+LOG_VERSION = 1
+
+
+class InputLog:
+    """Player actions in the order they happened"""
+
+    def __init__(self, seed, options=None):
+        """
+        Start an empty log
+
+        Args:
+            seed: Seed the game's RNG was created with
+            options: Simulation keyword arguments that affect the outcome
+        """
+        self.seed = seed
+        self.options = dict(options or {})
+        self.inputs = []  # [tick, action, *args]
+        self.final = None  # Outcome at the time the log was saved
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def record(self, tick, action, *args):
+        """
+        Append one action
+
+        Args:
+            tick: Simulation ticks completed before the action
+            action: Action name (see Simulation.apply_input)
+            args: JSON-serializable action arguments
+        """
+        self.inputs.append([tick, action, *args])
+
+    def to_dict(self):
+        return {
+            'version': LOG_VERSION,
+            'seed': self.seed,
+            'options': self.options,
+            'inputs': self.inputs,
+            'final': self.final,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != LOG_VERSION:
+            raise ValueError(f"Unsupported input log version: {data.get('version')}")
+        log = cls(data['seed'], data.get('options'))
+        log.inputs = [list(entry) for entry in data['inputs']]
+        log.final = data.get('final')
+        return log
+
+    def save(self, filename):
+        """Write the log as compact JSON, one action per line"""
+        data = self.to_dict()
+        inputs = data.pop('inputs')
+        header = json.dumps(data, separators=(',', ':'))
+        with open(filename, 'w') as f:
+            f.write(header[:-1] + ',"inputs":[\n')
+            f.write(',\n'.join(json.dumps(entry, separators=(',', ':')) for entry in inputs))
+            f.write('\n]}\n')
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename) as f:
+            return cls.from_dict(json.load(f))
@@ -1,22 +1,30 @@
 """
-Main Game Logic - Handles game state, waves, and coordination
+Main Game - Kivy view and input handling on top of the headless Simulation
 """
+import os
+import time
+
 from kivy.app import App
 from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.widget import Widget
-from kivy.graphics import Rectangle, Color, Ellipse, Line
 from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.boxlayout import BoxLayout
-import math
-
 from config import *
-from enemy import Enemy
-from tower import Tower
-from projectile import Projectile
-from particles import Particle, MuzzleFlash, create_explosion, create_hit_effect
+from simulation import Simulation, STEP_PHASES
+from renderer import Renderer
+from replay import save_replay
+from savegame import load_game, save_game
+from gamelog import configure as configure_logging, get_logger
+from maps import list_maps
+from profiler import FrameProfiler
+from quality import QualityGovernor
+from telemetry import TelemetryRecorder
+
+ui_log = get_logger('ui')
+input_log = get_logger('input')
 
 
 class GameCanvas(Widget):
@@ -33,106 +41,142 @@ class GameCanvas(Widget):
 
 
 class TowerDefenseGame(FloatLayout):
-    """Main game widget that handles all game logic"""
+    """Main game widget - draws the simulation and forwards player input"""
     
-    def __init__(self, **kwargs):
+    def __init__(self, sim=None, **kwargs):
+        """
+        Args:
+            sim: Simulation to continue (e.g. a resumed save), or None for a new game
+        """
         super().__init__(**kwargs)
         
-        # Game state
-        self.health = STARTING_HEALTH
-        self.currency = STARTING_CURRENCY
-        self.wave = 0
-        self.game_over = False
+        # All game rules and state live in the simulation
+        self.sim = sim if sim is not None else Simulation()
         self.paused = False
-        
-        # Game objects
-        self.enemies = []
-        self.towers = []
-        self.projectiles = []
-        self.particles = []  # For visual effects
-        
-        # Game speed
-        self.game_speed = 1.0  # 1x, 2x, or 3x
-        
-        # Visual effects
-        self.muzzle_flashes = []  # Tower shooting effects
-        
-        # Wave management
-        self.wave_timer = 0
-        self.spawn_timer = 0
-        self.enemies_to_spawn = []
-        self.wave_active = False
+        self.replay_saved = False
+        self.show_coverage = False  # Placement heatmap for the selected tower type
+        self.profiler = None  # FrameProfiler, created the first time F3 is pressed
+        self.quality = QualityGovernor() if ADAPTIVE_QUALITY else None
+        self.frame_start = None  # When this frame's update began, until the window shows it
+        if RECORD_TELEMETRY:
+            self.start_telemetry()
         
         # UI state
         self.selected_tower_type = 'cannon'
         self.selected_tower = None
         self.hovered_cell = None
-        
-        # Calculate grid offset to center it
-        self.grid_pixel_width = GRID_COLS * GRID_SIZE
-        self.grid_pixel_height = GRID_ROWS * GRID_SIZE
-        
-        # Path setup
-        self.path_points = self.calculate_path()
-        self.path_cells = self.get_path_cells()
+        self.was_wave_active = False
         
         # Start game loop
         Clock.schedule_interval(self.update, 1/60.0)
         
         # Setup UI
         self.setup_ui()
+        self.renderer = Renderer(self.game_canvas.canvas, self.sim)
+        if self.sim.tick:
+            self.show_resumed_state()
+        
+        # Frame profiler overlay (F3), bottom left of the game area
+        self.profile_label = Label(
+            text='',
+            size_hint=(None, None),
+            size=(260, 170),
+            pos=(10, 60),
+            font_name='RobotoMono-Regular',
+            font_size='12sp',
+            color=(0.8, 1, 0.8, 1),
+            halign='left',
+            valign='bottom'
+        )
+        self.profile_label.bind(size=self.profile_label.setter('text_size'))
         
         # Bind mouse/touch events
         Window.bind(mouse_pos=self.on_mouse_move)
         
         # Bind keyboard for fullscreen toggle
         Window.bind(on_key_down=self.on_key_down)
+        
+        # Frame timing for the quality governor ends when the frame is drawn
+        if self.quality is not None:
+            Window.bind(on_flip=self.on_frame_drawn)
     
     def on_key_down(self, window, key, scancode, codepoint, modifier):
         """Handle keyboard shortcuts"""
         # F11 or F to toggle fullscreen
         if key == 292 or (key == 102 and 'ctrl' in modifier):  # F11 or Ctrl+F
             Window.fullscreen = 'auto' if not Window.fullscreen else False
-            print(f"[DEBUG] Fullscreen toggled: {Window.fullscreen}")
+            ui_log.debug("Fullscreen toggled: %s", Window.fullscreen)
+        # F3 to toggle the frame profiler overlay
+        elif key == 284:  # F3
+            self.toggle_profiler()
         # ESC to exit fullscreen
         elif key == 27 and Window.fullscreen:  # ESC
             Window.fullscreen = False
         # Space to start wave (convenience)
-        elif key == 32 and not self.wave_active:  # Space
+        elif key == 32 and not self.sim.wave_active:  # Space
             self.start_wave()
+        # C to toggle the placement heatmap
+        elif key == 99:  # C
+            self.show_coverage = not self.show_coverage
+        # M to try the next map, before the game has started
+        elif key == 109:  # M
+            self.next_map()
     
-    def calculate_path(self):
-        """Convert normalized path waypoints to pixel coordinates"""
-        path = []
-        for norm_x, norm_y in PATH_WAYPOINTS:
-            x = norm_x * self.grid_pixel_width
-            y = norm_y * self.grid_pixel_height
-            path.append((x, y))
-        return path
-    
-    def get_path_cells(self):
-        """Get all grid cells that the path passes through"""
-        cells = set()
-        
-        # Add cells for each segment of the path
-        for i in range(len(self.path_points) - 1):
-            x1, y1 = self.path_points[i]
-            x2, y2 = self.path_points[i + 1]
-            
-            # Add cells along the line
-            steps = int(max(abs(x2 - x1), abs(y2 - y1)) / (GRID_SIZE / 2))
-            for step in range(steps + 1):
-                t = step / max(steps, 1)
-                x = x1 + (x2 - x1) * t
-                y = y1 + (y2 - y1) * t
-                
-                grid_x = int(x / GRID_SIZE)
-                grid_y = int(y / GRID_SIZE)
-                
-                if 0 <= grid_x < GRID_COLS and 0 <= grid_y < GRID_ROWS:
-                    cells.add((grid_x, grid_y))
-        
-        return cells
+    def next_map(self):
+        """Switch to the next map file; only allowed before the first tower or wave"""
+        names = list_maps()
+        if not names:
+            return
+        current = self.sim.map.name
+        name = names[(names.index(current) + 1) % len(names)] if current in names else names[0]
+        try:
+            self.sim.set_map(name)
+        except (OSError, ValueError) as e:
+            ui_log.warning("Could not switch to map %s: %s", name, e)
+            return
+        self.hovered_cell = None
+        ui_log.info("Map: %s", self.sim.map.title)
+    
+    def toggle_profiler(self):
+        """Show/hide per-phase frame timings; timing runs only while shown"""
+        if self.profiler is None:
+            self.profiler = FrameProfiler(STEP_PHASES + ('ui', 'draw'))
+        if self.profile_label.parent is None:
+            self.sim.profiler = self.profiler
+            self.add_widget(self.profile_label)
+            Clock.schedule_interval(self.update_profile_label, 0.5)
+        else:
+            self.sim.profiler = None
+            self.remove_widget(self.profile_label)
+            Clock.unschedule(self.update_profile_label)
+    
+    def update_profile_label(self, dt):
+        self.profile_label.text = self.profiler.overlay_text()
+    
+    def save_profile(self):
+        """Write the profiler's percentiles and histograms, if it ran"""
+        if self.profiler is None or not self.profiler.frames:
+            return
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            prefix = os.path.join(PROFILE_DIR, time.strftime('frame-%Y%m%d-%H%M%S'))
+            ui_log.info("Frame profile saved to %s", ', '.join(self.profiler.dump(prefix)))
+        except OSError as e:
+            ui_log.warning("Could not save frame profile: %s", e)
+    
+    def start_telemetry(self):
+        """Trace this game tick by tick into TELEMETRY_DIR"""
+        directory = os.path.join(TELEMETRY_DIR, f"trace-{self.sim.seed}-{time.strftime('%Y%m%d-%H%M%S')}")
+        try:
+            TelemetryRecorder(directory, seed=self.sim.seed).attach(self.sim)
+            ui_log.info("Recording telemetry to %s", directory)
+        except OSError as e:
+            ui_log.warning("Could not start telemetry: %s", e)
+    
+    def close_telemetry(self):
+        """Finish the telemetry trace, if one is being recorded"""
+        if self.sim.telemetry is not None:
+            self.sim.telemetry.close()
     
     def setup_ui(self):
         """Setup UI elements - simple side panel, no collapsing"""
@@ -152,7 +196,7 @@ class TowerDefenseGame(FloatLayout):
         
         # Wave info (LEFT)
         self.wave_label = Label(
-            text=f"WAVE: {self.wave}",
+            text=f"WAVE: {self.sim.wave}",
             size_hint=(0.33, 1),
             color=(0.5, 0.8, 1, 1),
             font_size='16sp',
@@ -165,7 +209,7 @@ class TowerDefenseGame(FloatLayout):
         
         # Health info (CENTER)
         self.health_label = Label(
-            text=f"LIVES: {self.health}",
+            text=f"LIVES: {self.sim.health}",
             size_hint=(0.33, 1),
             color=(1, 0.3, 0.3, 1),
             font_size='16sp',
@@ -178,7 +222,7 @@ class TowerDefenseGame(FloatLayout):
         
         # Currency info (RIGHT)
         self.currency_label = Label(
-            text=f"GOLD: ${self.currency}",
+            text=f"GOLD: ${self.sim.currency}",
             size_hint=(0.34, 1),
             color=(1, 0.84, 0, 1),
             font_size='16sp',
@@ -373,14 +417,14 @@ class TowerDefenseGame(FloatLayout):
     
     def set_game_speed(self, speed):
         """Change game speed"""
-        self.game_speed = speed
+        self.sim.set_game_speed(speed)
         
         # Update button colors to show active speed
         self.speed_1x_btn.background_color = (0.3, 0.8, 0.3, 1) if speed == 1.0 else (0.5, 0.5, 0.5, 1)
         self.speed_2x_btn.background_color = (0.3, 0.8, 0.3, 1) if speed == 2.0 else (0.5, 0.5, 0.5, 1)
         self.speed_3x_btn.background_color = (0.3, 0.8, 0.3, 1) if speed == 3.0 else (0.5, 0.5, 0.5, 1)
         
-        print(f"[DEBUG] Game speed set to {speed}x")
+        input_log.debug("Game speed set to %sx", speed)
     
     def get_tower_info_text(self):
         """Get info text for selected tower type"""
@@ -389,7 +433,7 @@ class TowerDefenseGame(FloatLayout):
     
     def select_tower_type(self, tower_type):
         """Select which tower type to place"""
-        print(f"[DEBUG] Selected tower type: {tower_type}")
+        ui_log.debug("Selected tower type: %s", tower_type)
         self.selected_tower_type = tower_type
         self.selected_tower = None
         self.tower_info_label.text = f"Selected: {TOWERS[tower_type]['name']}"
@@ -400,20 +444,16 @@ class TowerDefenseGame(FloatLayout):
         """Sell the selected tower"""
         if self.selected_tower:
             # Refund 70% of total cost
-            refund = int(self.selected_tower.get_total_cost() * 0.7)
-            self.currency += refund
-            self.towers.remove(self.selected_tower)
+            refund = self.sim.sell_tower(self.selected_tower)
             self.selected_tower = None
             self.sell_btn.disabled = True
             self.upgrade_btn.disabled = True
-            print(f"[DEBUG] Tower sold for ${refund}")
+            input_log.debug("Tower sold for $%s", refund)
     
     def upgrade_tower(self):
         """Upgrade the selected tower"""
         if self.selected_tower:
-            cost = self.selected_tower.get_upgrade_cost()
-            if cost > 0 and self.currency >= cost:
-                self.currency -= self.selected_tower.upgrade()
+            if self.sim.upgrade_tower(self.selected_tower):
                 self.update_tower_buttons()
     
     def update_tower_buttons(self):
@@ -444,190 +484,114 @@ class TowerDefenseGame(FloatLayout):
     
     def start_wave(self):
         """Start the next wave"""
-        print(f"[DEBUG] Start wave called. Active: {self.wave_active}, Game Over: {self.game_over}")
-        if self.wave_active or self.game_over:
+        if not self.sim.start_wave():
             return
         
-        self.wave += 1
-        self.wave_active = True
-        self.spawn_timer = 0
-        
-        print(f"[DEBUG] Starting wave {self.wave}")
-        
         # Update button
-        self.start_wave_btn.text = f"WAVE {self.wave} ACTIVE"
+        self.start_wave_btn.text = f"WAVE {self.sim.wave} ACTIVE"
         self.start_wave_btn.disabled = True
-        
-        # Generate enemies for this wave
-        self.enemies_to_spawn = self.generate_wave_enemies()
-        print(f"[DEBUG] Generated {len(self.enemies_to_spawn)} enemies for wave")
-    
-    def generate_wave_enemies(self):
-        """Generate list of enemies for current wave"""
-        enemies = []
-        
-        # Boss wave every BOSS_WAVE_INTERVAL waves
-        if self.wave % BOSS_WAVE_INTERVAL == 0:
-            enemies.append('boss')
-            return enemies
-        
-        # Regular waves - more gradual difficulty scaling
-        # Start with fewer enemies, scale slower
-        if self.wave == 1:
-            base_count = 3  # Very easy first wave
-        elif self.wave <= 3:
-            base_count = 4 + self.wave  # Waves 2-3: 6-7 enemies
-        elif self.wave <= 5:
-            base_count = 6 + self.wave  # Waves 4-5: 10-11 enemies
-        else:
-            base_count = 8 + (self.wave - 5) * 2  # After wave 5: +2 per wave
-        
-        print(f"[DEBUG] Wave {self.wave}: Spawning {base_count} enemies")
-        
-        # Mix of enemy types based on wave
-        for i in range(base_count):
-            if self.wave <= 2:
-                # Only basic enemies in first 2 waves
-                enemies.append('basic')
-            elif self.wave <= 5:
-                # Introduce fast enemies
-                enemies.append('basic' if i % 2 == 0 else 'fast')
-            elif self.wave <= 10:
-                # Add tank enemies
-                enemy_type = ['basic', 'basic', 'fast', 'tank'][i % 4]
-                enemies.append(enemy_type)
-            elif self.wave <= 15:
-                # Add regen enemies
-                enemy_type = ['basic', 'fast', 'tank', 'regen'][i % 4]
-                enemies.append(enemy_type)
-            else:
-                # Full variety
-                enemy_type = ['basic', 'fast', 'fast', 'tank', 'regen'][i % 5]
-                enemies.append(enemy_type)
-        
-        return enemies
+        self.was_wave_active = True
     
     def update(self, dt):
-        """Main game loop"""
-        if self.game_over or self.paused:
+        """Main game loop - advance the simulation, then refresh the view"""
+        if self.sim.game_over or self.paused:
+            self.frame_start = None
             return
         
-        # Apply game speed multiplier
-        dt = dt * self.game_speed
+        self.frame_start = time.perf_counter()
+        profiler = self.sim.profiler
+        if profiler is not None:
+            profiler.begin_frame()
+        
+        # Fixed-size steps; game speed only changes how many run per frame
+        self.sim.advance(dt)
+        if self.sim.game_over:
+            self.save_replay()
+            self.close_telemetry()
+        if profiler is not None:
+            profiler.resume()
         
         # Update UI labels
-        self.wave_label.text = f"WAVE: {self.wave}"
-        self.health_label.text = f"LIVES: {self.health}"
-        self.currency_label.text = f"GOLD: ${self.currency}"
-        
-        # Spawn enemies
-        if self.wave_active and self.enemies_to_spawn:
-            self.spawn_timer += dt
-            if self.spawn_timer >= WAVE_SPAWN_INTERVAL:
-                enemy_type = self.enemies_to_spawn.pop(0)
-                enemy = Enemy(enemy_type, self.path_points, self.wave)
-                self.enemies.append(enemy)
-                self.spawn_timer = 0
-                print(f"[DEBUG] Spawned {enemy_type} at ({enemy.x}, {enemy.y}), path has {len(self.path_points)} points")
-        
-        # Check if wave is complete
-        if self.wave_active and not self.enemies_to_spawn and not self.enemies:
-            self.wave_active = False
-            # Bonus: 50 base + 10 per wave completed
-            wave_bonus = 50 + (self.wave * 10)
-            self.currency += wave_bonus
-            self.start_wave_btn.disabled = False
-            self.start_wave_btn.text = f"START WAVE {self.wave + 1} (+${wave_bonus})"
-            print(f"[DEBUG] Wave {self.wave} complete! Bonus: ${wave_bonus}")
+        self.wave_label.text = f"WAVE: {self.sim.wave}"
+        self.health_label.text = f"LIVES: {self.sim.health}"
+        self.currency_label.text = f"GOLD: ${self.sim.currency}"
         
-        # Update enemies
-        for enemy in self.enemies[:]:
-            old_x, old_y = enemy.x, enemy.y
-            enemy.update(dt)
-            
-            # Debug first enemy position
-            if self.enemies and enemy == self.enemies[0] and self.wave == 1:
-                if old_x != enemy.x or old_y != enemy.y:
-                    print(f"[DEBUG] Enemy moved from ({old_x:.1f}, {old_y:.1f}) to ({enemy.x:.1f}, {enemy.y:.1f}), speed={enemy.current_speed}, path_index={enemy.path_index}")
-            
-            if enemy.reached_end:
-                self.health -= 1
-                self.enemies.remove(enemy)
-                if self.health <= 0:
-                    self.game_over = True
-            elif not enemy.alive:
-                # Create death explosion
-                explosion_particles = create_explosion(enemy.x, enemy.y, enemy.stats['color'], num_particles=20)
-                self.particles.extend(explosion_particles)
-                
-                self.currency += enemy.get_reward()
-                self.enemies.remove(enemy)
-        
-        # Update towers and collect new projectiles
-        for tower in self.towers:
-            projectile = tower.update(dt, self.enemies)
-            if projectile:
-                self.projectiles.append(projectile)
-                # Add muzzle flash effect
-                flash = MuzzleFlash(tower.x, tower.y, tower.stats['color'])
-                self.muzzle_flashes.append(flash)
-        
-        # Update projectiles
-        for projectile in self.projectiles[:]:
-            hit = projectile.update(dt)
-            if hit:
-                # Projectile hit target or target died
-                if projectile.target.alive:
-                    # Create hit effect
-                    hit_particles = create_hit_effect(projectile.x, projectile.y, num_particles=8)
-                    self.particles.extend(hit_particles)
-                    
-                    print(f"[DEBUG] Projectile hit! Damage: {projectile.damage}, Enemy health before: {projectile.target.health:.1f}")
-                    # Deal damage
-                    if projectile.splash_radius > 0:
-                        # Splash damage
-                        self.apply_splash_damage(projectile)
-                    else:
-                        # Single target
-                        died = projectile.target.take_damage(projectile.damage)
-                        print(f"[DEBUG] Enemy health after: {projectile.target.health:.1f}, died: {died}")
-                        
-                        # Apply slow if freeze tower
-                        if projectile.tower_type == 'freeze':
-                            tower = next((t for t in self.towers if t.type == 'freeze'), None)
-                            if tower:
-                                projectile.target.apply_slow(tower.slow_duration, tower.slow_amount)
-                
-                # Remove projectile
-                self.projectiles.remove(projectile)
-        
-        # Update particles
-        for particle in self.particles[:]:
-            particle.update(dt)
-            if not particle.alive:
-                self.particles.remove(particle)
-        
-        # Update muzzle flashes
-        for flash in self.muzzle_flashes[:]:
-            flash.update(dt)
-            if not flash.alive:
-                self.muzzle_flashes.remove(flash)
+        # Re-enable the start button once the wave is cleared
+        if self.was_wave_active and not self.sim.wave_active:
+            self.was_wave_active = False
+            self.start_wave_btn.disabled = False
+            self.start_wave_btn.text = self.next_wave_text()
+        if profiler is not None:
+            profiler.lap('ui')
         
         # Redraw
         self.draw()
+        if profiler is not None:
+            profiler.lap('draw')
+            profiler.end_frame()
     
-    def apply_splash_damage(self, projectile):
-        """Apply splash damage to enemies in radius"""
-        for enemy in self.enemies:
-            if not enemy.alive:
-                continue
-            
-            dx = enemy.x - projectile.x
-            dy = enemy.y - projectile.y
-            distance = math.sqrt(dx**2 + dy**2)
-            
-            if distance <= projectile.splash_radius:
-                enemy.take_damage(projectile.damage)
+    def on_frame_drawn(self, window):
+        """
+        Trade detail for time when frames run over budget
+
+        Called when the window is about to swap buffers, after Kivy has
+        issued the GL draw calls for the frame, so the governor sees the
+        simulation, UI, canvas updates and rendering together. The wait for
+        vsync comes after this and is not counted: it is idle time, and
+        counting it would make every frame look exactly on budget. Kivy's
+        Clock dt can't be used for the same reason.
+        """
+        if self.frame_start is None:
+            return  # Paused, or a redraw without a game update
+        seconds = time.perf_counter() - self.frame_start
+        self.frame_start = None
+        if self.quality.frame(seconds):
+            self.apply_quality()
+    
+    def apply_quality(self):
+        """Hand the governor's current level to the renderer and the effects"""
+        level = self.quality.level
+        self.renderer.set_quality(level)
+        self.sim.particle_scale = level.particle_scale
+        ui_log.info("Quality: %s (%.1f ms frames)", level.name, self.quality.frame_time * 1000)
+    
+    def show_resumed_state(self):
+        """Bring the buttons in line with a game that was loaded mid-play"""
+        self.set_game_speed(self.sim.game_speed)
+        if self.sim.wave_active:
+            self.start_wave_btn.text = f"WAVE {self.sim.wave} ACTIVE"
+            self.start_wave_btn.disabled = True
+            self.was_wave_active = True
+        elif self.sim.wave:
+            self.start_wave_btn.text = self.next_wave_text()
+    
+    def next_wave_text(self):
+        """Start button text between waves, with the bonus the last wave paid"""
+        return f"START WAVE {self.sim.wave + 1} (+${self.sim.last_wave_bonus})"
+    
+    def save_game(self, filename):
+        """Snapshot the game for resuming later; a finished game removes the snapshot"""
+        try:
+            if self.sim.game_over:
+                if os.path.exists(filename):
+                    os.remove(filename)
+                return
+            start = time.perf_counter()
+            save_game(self.sim, filename)
+            ui_log.info("Game saved to %s in %.1f ms", filename, (time.perf_counter() - start) * 1000)
+        except OSError as e:
+            ui_log.warning("Could not save game: %s", e)
+    
+    def save_replay(self):
+        """Write this game's input log once, if replays are enabled"""
+        if not RECORD_REPLAYS or self.replay_saved or not self.sim.input_log:
+            return
+        self.replay_saved = True
+        try:
+            filename = save_replay(self.sim)
+            input_log.info("Replay saved to %s", filename)
+        except OSError as e:
+            input_log.warning("Could not save replay: %s", e)
     
     def on_mouse_move(self, window, pos):
         """Handle mouse movement for hover effects"""
@@ -640,227 +604,63 @@ class TowerDefenseGame(FloatLayout):
         grid_x = int(pos[0] / GRID_SIZE)
         grid_y = int((pos[1] - 50) / GRID_SIZE)
         
-        if 0 <= grid_x < GRID_COLS and 0 <= grid_y < GRID_ROWS:
+        if self.sim.map.in_bounds(grid_x, grid_y):
             self.hovered_cell = (grid_x, grid_y)
         else:
             self.hovered_cell = None
     
     def on_touch_down(self, touch):
         """Handle mouse clicks / touches"""
-        # Debug: print touch coordinates
-        print(f"[TOUCH DEBUG] Touch at ({touch.x:.1f}, {touch.y:.1f}), Window size: ({self.width}, {self.height})")
+        ui_log.debug("Touch at (%.1f, %.1f), window size: (%s, %s)", touch.x, touch.y, self.width, self.height)
         
         # First, let child widgets (buttons, UI elements) handle the touch
         # This ensures buttons work before we try to handle grid clicks
         if super(TowerDefenseGame, self).on_touch_down(touch):
-            print(f"[TOUCH DEBUG] Touch handled by child widget")
+            ui_log.debug("Touch handled by child widget")
             return True
         
         # If no child handled it, check if it's in the game area
         # Ignore UI areas (top bar and side panel)
         if touch.y < 50 or touch.x > (self.width - 300):
             # Click is on UI area but no widget handled it - ignore
-            print(f"[TOUCH DEBUG] Touch in UI area but not handled")
+            ui_log.debug("Touch in UI area but not handled")
             return False
         
-        print(f"[DEBUG] Touch at ({touch.x}, {touch.y})")
-        
         # Convert to grid coordinates
         grid_x = int(touch.x / GRID_SIZE)
         grid_y = int((touch.y - 50) / GRID_SIZE)  # Offset by top bar
         
-        print(f"[DEBUG] Grid coordinates: ({grid_x}, {grid_y})")
+        ui_log.debug("Grid coordinates: (%s, %s)", grid_x, grid_y)
         
         # Check if clicked on existing tower
-        clicked_tower = None
-        for tower in self.towers:
-            if tower.grid_x == grid_x and tower.grid_y == grid_y:
-                clicked_tower = tower
-                break
+        clicked_tower = self.sim.get_tower_at(grid_x, grid_y)
         
         if clicked_tower:
             # Select tower for upgrade
-            print(f"[DEBUG] Selected existing tower at ({grid_x}, {grid_y})")
+            ui_log.debug("Selected existing tower at (%s, %s)", grid_x, grid_y)
             self.selected_tower = clicked_tower
             self.update_tower_buttons()
             return True
         
         # Try to place new tower
-        if 0 <= grid_x < GRID_COLS and 0 <= grid_y < GRID_ROWS:
+        if self.sim.map.in_bounds(grid_x, grid_y):
             # Check if cell is valid for placement
-            if (grid_x, grid_y) in self.path_cells:
-                print(f"[DEBUG] Cannot place - cell is on path")
-                return True  # Can't place on path
-            
-            # Check if already a tower here
-            if any(t.grid_x == grid_x and t.grid_y == grid_y for t in self.towers):
-                print(f"[DEBUG] Cannot place - tower already exists")
+            reason = self.sim.can_place_tower(self.selected_tower_type, grid_x, grid_y)
+            if reason:
+                input_log.debug("Cannot place - %s", reason)
                 return True
             
-            # Check if can afford
-            tower_cost = TOWERS[self.selected_tower_type]['cost']
-            if self.currency >= tower_cost:
-                # Place tower
-                print(f"[DEBUG] Placing {self.selected_tower_type} tower at ({grid_x}, {grid_y})")
-                tower = Tower(self.selected_tower_type, grid_x, grid_y, GRID_SIZE)
-                self.towers.append(tower)
-                self.currency -= tower_cost
-                self.selected_tower = tower
-            else:
-                print(f"[DEBUG] Cannot afford tower - need ${tower_cost}, have ${self.currency}")
+            # Place tower
+            input_log.debug("Placing %s tower at (%s, %s)", self.selected_tower_type, grid_x, grid_y)
+            self.selected_tower = self.sim.place_tower(self.selected_tower_type, grid_x, grid_y)
         
         return True
     
     def draw(self):
-        """Draw everything"""
-        self.game_canvas.canvas.clear()
-        
-        # Offset for top bar and side panel
-        y_offset = 50
-        side_panel_width = 300
-        
-        with self.game_canvas.canvas:
-            # Better background - dark blue instead of black
-            Color(0.08, 0.08, 0.15, 1)
-            Rectangle(pos=(0, y_offset), size=(self.width - side_panel_width, self.height - y_offset))
-            
-            # Subtler grid
-            Color(0.15, 0.15, 0.25, 0.3)  # Much more subtle
-            for x in range(GRID_COLS + 1):
-                Line(points=[x * GRID_SIZE, y_offset, x * GRID_SIZE, self.grid_pixel_height + y_offset], width=0.5)
-            for y in range(GRID_ROWS + 1):
-                Line(points=[0, y * GRID_SIZE + y_offset, self.grid_pixel_width, y * GRID_SIZE + y_offset], width=0.5)
-            
-            # Draw path with border for depth
-            # Dark border
-            Color(0.4, 0.35, 0.25, 1)
-            for i in range(len(self.path_points) - 1):
-                x1, y1 = self.path_points[i]
-                x2, y2 = self.path_points[i + 1]
-                Line(points=[x1, y1 + y_offset, x2, y2 + y_offset], width=36, cap='round')
-            
-            # Main path (lighter)
-            Color(0.65, 0.55, 0.4, 1)
-            for i in range(len(self.path_points) - 1):
-                x1, y1 = self.path_points[i]
-                x2, y2 = self.path_points[i + 1]
-                Line(points=[x1, y1 + y_offset, x2, y2 + y_offset], width=30, cap='round')
-            
-            # Draw hover highlight with glow
-            if self.hovered_cell and self.hovered_cell not in self.path_cells:
-                grid_x, grid_y = self.hovered_cell
-                # Outer glow
-                Color(0.3, 0.6, 1.0, 0.2)
-                Rectangle(pos=(grid_x * GRID_SIZE - 2, grid_y * GRID_SIZE + y_offset - 2), size=(GRID_SIZE + 4, GRID_SIZE + 4))
-                # Inner highlight
-                Color(0.3, 0.6, 1.0, 0.4)
-                Rectangle(pos=(grid_x * GRID_SIZE, grid_y * GRID_SIZE + y_offset), size=(GRID_SIZE, GRID_SIZE))
-            
-            # Draw muzzle flashes (behind towers)
-            for flash in self.muzzle_flashes:
-                alpha = flash.lifetime / 0.1  # Flash is 0.1s
-                Color(flash.color[0], flash.color[1], flash.color[2], alpha)
-                Ellipse(pos=(flash.x - 20, flash.y - 20 + y_offset), size=(40, 40))
-            
-            # Draw towers with shadows
-            for tower in self.towers:
-                size = GRID_SIZE * 0.7
-                
-                # Shadow
-                Color(0, 0, 0, 0.3)
-                Ellipse(pos=(tower.x - size/2 + 2, tower.y - size/2 + y_offset - 2), size=(size, size))
-                
-                # Tower base (darker)
-                darker_color = tuple(c * 0.7 for c in tower.stats['color'][:3]) + (1,)
-                Color(*darker_color)
-                Ellipse(pos=(tower.x - size/2, tower.y - size/2 + y_offset), size=(size, size))
-                
-                # Tower top (brighter)
-                Color(*tower.stats['color'])
-                Ellipse(pos=(tower.x - size/2 + 3, tower.y - size/2 + y_offset + 3), size=(size - 6, size - 6))
-                
-                # Draw level stars
-                if tower.level > 1:
-                    Color(1, 1, 0, 1)  # Gold stars
-                    star_y = tower.y + size/2 + 5 + y_offset
-                    for i in range(tower.level - 1):  # Level 2 = 1 star, Level 3 = 2 stars
-                        star_x = tower.x - 10 + (i * 10)
-                        Ellipse(pos=(star_x - 3, star_y - 3), size=(6, 6))
-                
-                # Draw range if selected
-                if tower == self.selected_tower:
-                    Color(1, 1, 1, 0.15)
-                    Ellipse(
-                        pos=(tower.x - tower.range, tower.y - tower.range + y_offset),
-                        size=(tower.range * 2, tower.range * 2)
-                    )
-            
-            # Draw enemies with shadows and glow
-            for enemy in self.enemies:
-                # Shadow
-                Color(0, 0, 0, 0.4)
-                Ellipse(pos=(enemy.x - 16, enemy.y - 17 + y_offset), size=(32, 32))
-                
-                # Outer glow (subtle)
-                glow_color = tuple(c * 0.6 for c in enemy.stats['color'][:3]) + (0.3,)
-                Color(*glow_color)
-                Ellipse(pos=(enemy.x - 18, enemy.y - 18 + y_offset), size=(36, 36))
-                
-                # Main enemy body
-                Color(*enemy.stats['color'])
-                Ellipse(pos=(enemy.x - 15, enemy.y - 15 + y_offset), size=(30, 30))
-                
-                # Health bar with border
-                bar_width = 34
-                bar_height = 5
-                
-                # Border
-                Color(0.1, 0.1, 0.1, 0.8)
-                Rectangle(pos=(enemy.x - bar_width/2 - 1, enemy.y + 20 + y_offset - 1), size=(bar_width + 2, bar_height + 2))
-                
-                # Background
-                Color(0.2, 0.05, 0.05, 1)
-                Rectangle(pos=(enemy.x - bar_width/2, enemy.y + 20 + y_offset), size=(bar_width, bar_height))
-                
-                # Foreground (gradient effect)
-                health_pct = enemy.get_health_percentage()
-                if health_pct > 0.6:
-                    Color(0.2, 1, 0.2, 1)  # Bright green
-                elif health_pct > 0.3:
-                    Color(1, 0.9, 0.2, 1)  # Bright yellow
-                else:
-                    Color(1, 0.2, 0.2, 1)  # Bright red
-                Rectangle(
-                    pos=(enemy.x - bar_width/2, enemy.y + 20 + y_offset),
-                    size=(bar_width * health_pct, bar_height)
-                )
-            
-            # Draw projectiles with enhanced glow
-            for projectile in self.projectiles:
-                # Outer glow (large, very transparent)
-                Color(1, 0.9, 0.3, 0.15)
-                Ellipse(pos=(projectile.x - 12, projectile.y - 12 + y_offset), size=(24, 24))
-                
-                # Mid glow
-                Color(1, 1, 0.4, 0.4)
-                Ellipse(pos=(projectile.x - 8, projectile.y - 8 + y_offset), size=(16, 16))
-                
-                # Inner bright core
-                Color(1, 1, 0.8, 1)
-                Ellipse(pos=(projectile.x - 5, projectile.y - 5 + y_offset), size=(10, 10))
-                
-                # White hot center
-                Color(1, 1, 1, 0.8)
-                Ellipse(pos=(projectile.x - 3, projectile.y - 3 + y_offset), size=(6, 6))
-            
-            # Draw particles
-            for particle in self.particles:
-                alpha = particle.get_alpha()
-                Color(particle.color[0], particle.color[1], particle.color[2], alpha)
-                Ellipse(
-                    pos=(particle.x - particle.size/2, particle.y - particle.size/2 + y_offset),
-                    size=(particle.size, particle.size)
-                )
+        """Bring the canvas up to date (retained mode, see renderer.py)"""
+        coverage_range = TOWERS[self.selected_tower_type]['range'] if self.show_coverage else None
+        self.renderer.draw(self.width, self.height, self.hovered_cell, self.selected_tower,
+                           self.sim.interpolation_alpha(), coverage_range)
 
 
 class TowerDefenseApp(App):
@@ -882,9 +682,41 @@ class TowerDefenseApp(App):
         except:
             pass
         
-        return TowerDefenseGame()
+        return TowerDefenseGame(sim=self.load_suspended())
+    
+    @property
+    def save_path(self):
+        return os.path.join(self.user_data_dir, SAVE_FILE)
+    
+    def load_suspended(self):
+        """The game saved when the app was last paused or closed, or None"""
+        if not os.path.exists(self.save_path):
+            return None
+        try:
+            sim = load_game(self.save_path)
+        except (OSError, ValueError) as e:
+            ui_log.warning("Could not resume saved game: %s", e)
+            return None
+        ui_log.info("Resumed wave %s at tick %s", sim.wave, sim.tick)
+        return sim
+    
+    def on_pause(self):
+        # Mobile OSes may kill a paused app without calling on_stop
+        self.root.save_game(self.save_path)
+        return True
+    
+    def on_resume(self):
+        # Still in memory; the next frame's dt is clamped by MAX_FRAME_TIME
+        pass
+    
+    def on_stop(self):
+        self.root.save_replay()
+        self.root.save_profile()
+        self.root.close_telemetry()
+        self.root.save_game(self.save_path)
 
 
 if __name__ == '__main__':
+    configure_logging()
     # Let the OS handle window positioning naturally (will center on most systems)
     TowerDefenseApp().run()
@@ -0,0 +1,444 @@
+"""
+Maps - Map files and their compiled path geometry
+
+A map is a JSON (or, on Python 3.11+, TOML) file in MAP_DIR:
+
+    {
+        "title": "Winding Road",
+        "cols": 30, "rows": 18,
+        "waypoints": [[0.05, 0.1], [0.3, 0.1], ...],
+        "obstacles": [[4, 12], ...]
+    }
+
+Waypoints are normalized (0-1) and scaled to the map's grid. cols/rows
+default to GRID_COLS/GRID_ROWS and obstacles (cells towers can't be built
+on) are optional. Files are validated on load.
+
+Compiling a map gives the pixel waypoints, the PathTable (arc-length
+table), the exact set of cells the path passes through and a bitmap of
+every blocked cell. The result is cached next to the map file as
+<file>.cache, keyed by the file's content hash, so later starts (and map
+switches within a session) skip the geometry. Editing the map file simply
+makes the cache stale.
+
+Usage:
+    python maps.py              # List the maps
+    python maps.py serpent      # Compile a map and print its summary
+"""
+from fractions import Fraction
+import hashlib
+import json
+import math
+import os
+import sys
+
+from config import DEFAULT_MAP, GRID_COLS, GRID_ROWS, GRID_SIZE, MAP_DIR
+from gamelog import get_logger
+from path import PathTable
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11 - JSON maps only
+    tomllib = None
+
+map_log = get_logger('map')
+
+MAP_EXTENSIONS = ('.json', '.toml')
+# Bump when the compiled layout changes, so old caches are rebuilt
+MAP_CACHE_VERSION = 1
+MAX_GRID = 255  # Largest cols/rows a map may ask for
+
+# Relative MAP_DIR is next to this file, not the working directory
+MAP_PATH = MAP_DIR if os.path.isabs(MAP_DIR) else os.path.join(os.path.dirname(os.path.abspath(__file__)), MAP_DIR)
+
+MAP_KEYS = {'title', 'cols', 'rows', 'waypoints', 'obstacles'}
+
+
+def supercover_cells(x1, y1, x2, y2):
+    """
+    Every grid cell a line segment passes through
+
+    Cell (i, j) covers [i, i + 1) x [j, j + 1), the same cells int() picks
+    for a point, so a segment running exactly along a grid line belongs to
+    the cells above/right of it. Coordinates are converted to fractions, so
+    corners and grid lines are hit exactly rather than up to rounding.
+
+    Args:
+        x1, y1, x2, y2: Segment ends in cell units (ints, floats or Fractions)
+
+    Returns:
+        list: (col, row) cells, column by column
+    """
+    x1, y1, x2, y2 = (Fraction(v) for v in (x1, y1, x2, y2))
+    if x2 < x1:
+        x1, y1, x2, y2 = x2, y2, x1, y1
+
+    if x1 == x2:
+        col = math.floor(x1)
+        return [(col, row) for row in range(math.floor(min(y1, y2)), math.floor(max(y1, y2)) + 1)]
+
+    slope = (y2 - y1) / (x2 - x1)
+    cells = []
+    for col in range(math.floor(x1), math.floor(x2) + 1):
+        # The part of the segment in this column: x from x_start up to
+        # x_end, where x_end itself is excluded if it's the next column's edge
+        x_start = max(Fraction(col), x1)
+        x_end = min(Fraction(col + 1), x2)
+        y_start = y1 + (x_start - x1) * slope
+        y_end = y1 + (x_end - x1) * slope
+        if x_end < col + 1:  # Segment ends inside this column
+            low, high = math.floor(min(y_start, y_end)), math.floor(max(y_start, y_end))
+        elif y_end > y_start:  # Rising towards an excluded end
+            low, high = math.floor(y_start), math.ceil(y_end) - 1
+        elif y_end < y_start:  # Falling towards an excluded end
+            low, high = math.floor(y_end), math.floor(y_start)
+        else:
+            low = high = math.floor(y_start)
+        cells.extend((col, row) for row in range(low, high + 1))
+    return cells
+
+
+def path_cells(points, cell_size, cols, rows):
+    """
+    Cells on the grid that a pixel polyline passes through
+
+    Args:
+        points: (x, y) waypoints in pixels
+        cell_size: Grid cell size in pixels
+        cols, rows: Grid dimensions; cells outside are dropped
+
+    Returns:
+        set: (col, row) cells
+    """
+    cells = set()
+    scaled = [(Fraction(x) / cell_size, Fraction(y) / cell_size) for x, y in points]
+    if len(scaled) == 1:
+        scaled *= 2
+    for (x1, y1), (x2, y2) in zip(scaled, scaled[1:]):
+        for col, row in supercover_cells(x1, y1, x2, y2):
+            if 0 <= col < cols and 0 <= row < rows:
+                cells.add((col, row))
+    return cells
+
+
+class GameMap:
+    """A compiled map: grid size, path geometry and blocked cells"""
+
+    def __init__(self, name, title, content_hash, cols, rows, waypoints, points, path, cells, obstacles):
+        """
+        Args:
+            name: Map file name without extension (how saves and logs refer to it)
+            title: Display name
+            content_hash: SHA-256 of the map file
+            cols, rows: Grid dimensions
+            waypoints: Normalized (x, y) waypoints as written in the file
+            points: Waypoints in pixels
+            path: PathTable for points
+            cells: Cells the path passes through
+            obstacles: Other cells towers can't be built on
+        """
+        self.name = name
+        self.title = title
+        self.hash = content_hash
+        self.cols = cols
+        self.rows = rows
+        self.waypoints = tuple(waypoints)
+        self.points = tuple(points)
+        self.path = path
+        self.path_cells = frozenset(cells)
+        self.obstacles = frozenset(obstacles)
+        self.blocked_cells = self.path_cells | self.obstacles
+
+        # One bit per cell, row by row
+        bitmap = bytearray((cols * rows + 7) // 8)
+        for col, row in self.blocked_cells:
+            index = row * cols + col
+            bitmap[index >> 3] |= 1 << (index & 7)
+        self.blocked = bytes(bitmap)
+
+    def __repr__(self):
+        return f"GameMap({self.name!r}, {self.cols}x{self.rows}, {len(self.points)} waypoints)"
+
+    @property
+    def pixel_width(self):
+        return self.cols * GRID_SIZE
+
+    @property
+    def pixel_height(self):
+        return self.rows * GRID_SIZE
+
+    def in_bounds(self, grid_x, grid_y):
+        return 0 <= grid_x < self.cols and 0 <= grid_y < self.rows
+
+    def is_blocked(self, grid_x, grid_y):
+        """True for path, obstacle and out-of-bounds cells"""
+        if not self.in_bounds(grid_x, grid_y):
+            return True
+        index = grid_y * self.cols + grid_x
+        return bool(self.blocked[index >> 3] >> (index & 7) & 1)
+
+    def to_cache(self):
+        """Everything needed to rebuild this map without recompiling it"""
+        path = self.path
+        return {
+            'version': MAP_CACHE_VERSION,
+            'hash': self.hash,
+            'grid_size': GRID_SIZE,
+            'title': self.title,
+            'cols': self.cols,
+            'rows': self.rows,
+            'waypoints': self.waypoints,
+            'points': path.points,
+            'lengths': path.lengths,
+            'directions': path.directions,
+            'cumulative': path.cumulative,
+            'path_cells': sorted(self.path_cells),
+            'obstacles': sorted(self.obstacles),
+            'blocked': self.blocked.hex(),
+        }
+
+    @classmethod
+    def from_cache(cls, name, data):
+        """Inverse of to_cache()"""
+        path = PathTable.share(PathTable.from_tables(data['points'], data['lengths'], data['directions'],
+                                                     data['cumulative']))
+        game_map = cls(name, data['title'], data['hash'], data['cols'], data['rows'],
+                       [tuple(point) for point in data['waypoints']], path.points, path,
+                       [tuple(cell) for cell in data['path_cells']], [tuple(cell) for cell in data['obstacles']])
+        if game_map.blocked.hex() != data['blocked']:
+            raise ValueError("Cached blocked cells don't match the path")
+        return game_map
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _pair(value, kind):
+    return isinstance(value, (list, tuple)) and len(value) == 2 and all(kind(v) for v in value)
+
+
+def validate(data, source):
+    """
+    Check a parsed map file and fill in defaults
+
+    Args:
+        data: Parsed JSON/TOML
+        source: File name for error messages
+
+    Returns:
+        dict: title, cols, rows, waypoints and obstacles
+
+    Raises:
+        ValueError: With the file name and the first problem found
+    """
+    def fail(message):
+        raise ValueError(f"{source}: {message}")
+
+    if not isinstance(data, dict):
+        fail("expected an object at the top level")
+    unknown = sorted(set(data) - MAP_KEYS)
+    if unknown:
+        fail(f"unknown key(s): {', '.join(unknown)}")
+
+    title = data.get('title', os.path.splitext(os.path.basename(source))[0])
+    if not isinstance(title, str) or not title:
+        fail("'title' must be a non-empty string")
+
+    size = {}
+    for key, default in (('cols', GRID_COLS), ('rows', GRID_ROWS)):
+        value = data.get(key, default)
+        if not isinstance(value, int) or isinstance(value, bool) or not 1 <= value <= MAX_GRID:
+            fail(f"'{key}' must be a whole number from 1 to {MAX_GRID}")
+        size[key] = value
+
+    waypoints = data.get('waypoints')
+    if not isinstance(waypoints, list) or len(waypoints) < 2:
+        fail("'waypoints' must be a list of at least two [x, y] points")
+    for i, point in enumerate(waypoints):
+        if not _pair(point, _number):
+            fail(f"waypoint {i} must be [x, y] numbers")
+        if not all(0 <= v <= 1 for v in point):
+            fail(f"waypoint {i} {point} is outside 0-1")
+        if i and list(point) == list(waypoints[i - 1]):
+            fail(f"waypoint {i} repeats the one before it")
+
+    obstacles = data.get('obstacles', [])
+    if not isinstance(obstacles, list):
+        fail("'obstacles' must be a list of [col, row] cells")
+    for cell in obstacles:
+        if not _pair(cell, lambda v: isinstance(v, int) and not isinstance(v, bool)):
+            fail(f"obstacle {cell!r} must be [col, row] whole numbers")
+        if not (0 <= cell[0] < size['cols'] and 0 <= cell[1] < size['rows']):
+            fail(f"obstacle {cell} is outside the {size['cols']}x{size['rows']} grid")
+
+    return {
+        'title': title,
+        'cols': size['cols'],
+        'rows': size['rows'],
+        'waypoints': [tuple(point) for point in waypoints],
+        'obstacles': [tuple(cell) for cell in obstacles],
+    }
+
+
+def compile_map(name, spec, content_hash, source):
+    """
+    Build a GameMap from a validated spec (see validate)
+
+    Args:
+        name: Map name
+        spec: validate() output
+        content_hash: SHA-256 of the map file
+        source: File name for error messages
+
+    Raises:
+        ValueError: If an obstacle sits on the path
+    """
+    cols, rows = spec['cols'], spec['rows']
+    width = cols * GRID_SIZE
+    height = rows * GRID_SIZE
+    points = [(x * width, y * height) for x, y in spec['waypoints']]
+    cells = path_cells(points, GRID_SIZE, cols, rows)
+    for cell in spec['obstacles']:
+        if cell in cells:
+            raise ValueError(f"{source}: obstacle {list(cell)} is on the path")
+    path = PathTable.for_points(points)
+    return GameMap(name, spec['title'], content_hash, cols, rows, spec['waypoints'], path.points, path,
+                   cells, spec['obstacles'])
+
+
+def parse(raw, filename):
+    """Decode a map file's bytes (JSON or TOML by extension)"""
+    toml = filename.endswith('.toml')
+    if toml and tomllib is None:
+        raise ValueError(f"{filename}: TOML maps need Python 3.11 or newer")
+    try:
+        return tomllib.loads(raw.decode('utf-8')) if toml else json.loads(raw)
+    except ValueError as e:  # Decode errors of both formats are ValueErrors
+        raise ValueError(f"{filename}: {e}") from None
+
+
+def map_file(name, directory=MAP_PATH):
+    """
+    Path of a map, by name (file name without extension) or file path
+
+    Raises:
+        FileNotFoundError: If no such map exists
+    """
+    if os.path.splitext(name)[1] in MAP_EXTENSIONS:
+        if os.path.exists(name):
+            return name
+    else:
+        for extension in MAP_EXTENSIONS:
+            filename = os.path.join(directory, name + extension)
+            if os.path.exists(filename):
+                return filename
+    raise FileNotFoundError(f"No map named {name!r} in {directory}")
+
+
+def list_maps(directory=MAP_PATH):
+    """Names of every map in a directory, sorted"""
+    try:
+        files = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    names = {os.path.splitext(f)[0] for f in files if os.path.splitext(f)[1] in MAP_EXTENSIONS}
+    return sorted(names)
+
+
+# (name, content hash, grid size) -> GameMap, for maps loaded this session
+_loaded = {}
+
+
+def _read_cache(cache_file, name, content_hash):
+    """The cached GameMap if the cache matches the map file, else None"""
+    try:
+        with open(cache_file) as f:
+            data = json.load(f)
+        if (data.get('version'), data.get('hash'), data.get('grid_size')) != (MAP_CACHE_VERSION, content_hash,
+                                                                              GRID_SIZE):
+            return None
+        return GameMap.from_cache(name, data)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        map_log.warning("Ignoring unreadable map cache %s: %s", cache_file, e)
+        return None
+
+
+def _write_cache(cache_file, game_map):
+    """Store a compiled map; a read-only map directory just means no cache"""
+    temp = cache_file + '.tmp'
+    try:
+        with open(temp, 'w') as f:
+            json.dump(game_map.to_cache(), f, separators=(',', ':'))
+        os.replace(temp, cache_file)
+    except OSError as e:
+        map_log.warning("Could not write map cache %s: %s", cache_file, e)
+
+
+def load_map(name=DEFAULT_MAP, directory=MAP_PATH, use_cache=True):
+    """
+    Load and compile a map, from the cache when it's up to date
+
+    Args:
+        name: Map name (file name without extension) or path to a map file
+        directory: Where to look up names
+        use_cache: Read and write the <file>.cache next to the map
+
+    Returns:
+        GameMap: The compiled map (shared by every load of the same file)
+
+    Raises:
+        FileNotFoundError: If the map doesn't exist
+        ValueError: If the map file is invalid
+    """
+    filename = map_file(name, directory)
+    name = os.path.splitext(os.path.basename(filename))[0]
+    with open(filename, 'rb') as f:
+        raw = f.read()
+    content_hash = hashlib.sha256(raw).hexdigest()
+
+    key = (name, content_hash, GRID_SIZE)
+    game_map = _loaded.get(key)
+    if game_map is not None:
+        return game_map
+
+    cache_file = filename + '.cache'
+    game_map = _read_cache(cache_file, name, content_hash) if use_cache else None
+    if game_map is None:
+        spec = validate(parse(raw, filename), filename)
+        game_map = compile_map(name, spec, content_hash, filename)
+        if use_cache:
+            _write_cache(cache_file, game_map)
+        if map_log.info_on:
+            map_log.info("Compiled map %s: %s path cells", name, len(game_map.path_cells))
+    _loaded[key] = game_map
+    return game_map
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    if not args:
+        for name in list_maps():
+            try:
+                game_map = load_map(name)
+            except ValueError as e:
+                print(f"{name:<12} invalid: {e}")
+                continue
+            print(f"{name:<12} {game_map.title:<16} {game_map.cols}x{game_map.rows}, "
+                  f"path {game_map.path.total_length:.0f}px")
+        return 0
+    game_map = load_map(args[0])
+    print(f"{game_map.name}: {game_map.title}, {game_map.cols}x{game_map.rows} cells")
+    print(f"  {len(game_map.points)} waypoints, path {game_map.path.total_length:.1f}px, "
+          f"{len(game_map.path_cells)} path cells, {len(game_map.obstacles)} obstacles")
+    for row in reversed(range(game_map.rows)):  # Row 0 is at the bottom of the screen
+        print('  ' + ''.join('#' if (col, row) in game_map.path_cells
+                             else 'x' if (col, row) in game_map.obstacles else '.'
+                             for col in range(game_map.cols)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Mesh batching - Draw thousands of colored shapes with a handful of Meshes
+
+Shapes are packed into vertex buffers with a per-vertex color, so a whole
+layer (all particles, all projectile glows, all health bars) costs one
+Mesh per 65k vertices instead of a Color + Ellipse/Rectangle per shape.
+Requires NumPy to build the vertex arrays.
+"""
+import math
+
+import numpy as np
+from kivy.graphics import InstructionGroup, Mesh, RenderContext
+
+# Kivy Mesh indices are unsigned shorts
+MAX_VERTICES_PER_MESH = 65536
+
+VERTEX_FORMAT = [(b'vPosition', 2, 'float'), (b'vColor', 4, 'float')]
+FLOATS_PER_VERTEX = 6
+
+VERTEX_SHADER = """
+#ifdef GL_ES
+    precision highp float;
+#endif
+attribute vec2 vPosition;
+attribute vec4 vColor;
+uniform mat4 modelview_mat;
+uniform mat4 projection_mat;
+uniform float opacity;
+varying vec4 frag_color;
+void main() {
+    frag_color = vec4(vColor.rgb, vColor.a * opacity);
+    gl_Position = projection_mat * modelview_mat * vec4(vPosition, 0.0, 1.0);
+}
+"""
+
+FRAGMENT_SHADER = """
+#ifdef GL_ES
+    precision highp float;
+#endif
+varying vec4 frag_color;
+void main() {
+    gl_FragColor = frag_color;
+}
+"""
+
+
+class ShapeKind:
+    """Vertex layout and triangle indices for one kind of shape"""
+
+    def __init__(self, vertices_per_shape, indices):
+        self.vertices_per_shape = vertices_per_shape
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.max_shapes = MAX_VERTICES_PER_MESH // vertices_per_shape
+        # Index list for a full mesh; shorter meshes use a prefix of it
+        offsets = np.arange(self.max_shapes, dtype=np.int64)[:, None] * vertices_per_shape
+        self.all_indices = (offsets + self.indices[None, :]).ravel()
+
+
+def circle_kind(segments):
+    """Triangle fan: center vertex followed by `segments` rim vertices"""
+    indices = []
+    for k in range(segments):
+        indices += [0, 1 + k, 1 + (k + 1) % segments]
+    kind = ShapeKind(segments + 1, indices)
+    angles = np.arange(segments) * (2 * math.pi / segments)
+    kind.rim = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    return kind
+
+
+QUAD = ShapeKind(4, [0, 1, 2, 2, 3, 0])
+
+
+def circle_vertices(kind, cx, cy, radius, rgba):
+    """
+    Vertex array for n circles
+
+    Args:
+        kind: ShapeKind from circle_kind()
+        cx, cy, radius: Arrays of length n
+        rgba: Array of shape (n, 4), or a single rgba tuple
+
+    Returns:
+        ndarray: Shape (n * vertices_per_shape, 6)
+    """
+    n = len(cx)
+    verts = np.empty((n, kind.vertices_per_shape, FLOATS_PER_VERTEX), dtype=np.float32)
+    verts[:, 0, 0] = cx
+    verts[:, 0, 1] = cy
+    verts[:, 1:, 0] = cx[:, None] + radius[:, None] * kind.rim[None, :, 0]
+    verts[:, 1:, 1] = cy[:, None] + radius[:, None] * kind.rim[None, :, 1]
+    verts[:, :, 2:] = np.asarray(rgba, dtype=np.float32).reshape(-1, 1, 4)
+    return verts.reshape(-1, FLOATS_PER_VERTEX)
+
+
+def quad_vertices(x, y, width, height, rgba):
+    """
+    Vertex array for n axis-aligned rectangles
+
+    Args:
+        x, y: Bottom-left corners, arrays of length n
+        width, height: Arrays (or scalars) of sizes
+        rgba: Array of shape (n, 4), or a single rgba tuple
+
+    Returns:
+        ndarray: Shape (n * 4, 6)
+    """
+    n = len(x)
+    right = x + width
+    top = y + height
+    verts = np.empty((n, 4, FLOATS_PER_VERTEX), dtype=np.float32)
+    verts[:, 0, 0] = x
+    verts[:, 0, 1] = y
+    verts[:, 1, 0] = right
+    verts[:, 1, 1] = y
+    verts[:, 2, 0] = right
+    verts[:, 2, 1] = top
+    verts[:, 3, 0] = x
+    verts[:, 3, 1] = top
+    verts[:, :, 2:] = np.asarray(rgba, dtype=np.float32).reshape(-1, 1, 4)
+    return verts.reshape(-1, FLOATS_PER_VERTEX)
+
+
+class MeshLayer:
+    """
+    One draw layer made of as few Mesh instructions as possible
+
+    Shapes are drawn in the order they appear in the vertex array, so
+    interleaving (e.g. each projectile's glow rings) is preserved.
+    """
+
+    def __init__(self, kind):
+        """
+        Args:
+            kind: ShapeKind every shape in this layer uses
+        """
+        self.kind = kind
+        self.group = InstructionGroup()
+        self.context = RenderContext(use_parent_projection=True, use_parent_modelview=True)
+        self.context.shader.vs = VERTEX_SHADER
+        self.context.shader.fs = FRAGMENT_SHADER
+        self.context['opacity'] = 1.0
+        self.group.add(self.context)
+        self.meshes = []  # Meshes currently in the context
+
+    def update(self, vertices):
+        """
+        Replace the layer's contents
+
+        Args:
+            vertices: Array of shape (n * vertices_per_shape, 6)
+        """
+        kind = self.kind
+        per_mesh = kind.max_shapes * kind.vertices_per_shape
+        total = len(vertices)
+        needed = -(-total // per_mesh)  # Ceiling division
+
+        while len(self.meshes) < needed:
+            mesh = Mesh(fmt=VERTEX_FORMAT, mode='triangles')
+            self.context.add(mesh)
+            self.meshes.append(mesh)
+        while len(self.meshes) > needed:
+            self.context.remove(self.meshes.pop())
+
+        for i, mesh in enumerate(self.meshes):
+            chunk = vertices[i * per_mesh:(i + 1) * per_mesh]
+            shapes = len(chunk) // kind.vertices_per_shape
+            mesh.vertices = chunk.ravel().tolist()
+            mesh.indices = kind.all_indices[:shapes * len(kind.indices)].tolist()
+
+    def clear(self):
+        for mesh in self.meshes:
+            self.context.remove(mesh)
+        self.meshes = []
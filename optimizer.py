@@ -0,0 +1,257 @@
+"""
+Optimizer - Search for the best opening tower layout
+
+Simulated annealing over sets of towers that fit in the starting gold. Every
+candidate layout is scored by playing a headless game to the target wave
+(later gold goes to upgrades, as in balance.py). Each round proposes one
+neighbor per worker and scores them in parallel. Games are deterministic,
+so every layout is played once and the score is cached.
+
+Usage:
+    python optimizer.py --waves 20 --time 300
+    python optimizer.py --waves 15 --budget 800 --cache layouts.json --json best.json
+    python optimizer.py --map canyon --time 300
+"""
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import config
+from config import DEFAULT_MAP, STARTING_CURRENCY, TOWERS
+from simulation import Simulation
+from maps import load_map
+from balance import build_order, buildable_cells, path_coverage, path_samples, play_game, quiet_worker
+
+# Cells considered for towers: the ones covering the most path
+CANDIDATE_CELLS = 80
+
+# Annealing temperature, in score units (one score unit = one wave)
+START_TEMPERATURE = 1.0
+END_TEMPERATURE = 0.01
+
+
+def layout_cost(layout):
+    return sum(TOWERS[tower_type]['cost'] for tower_type, _, _ in layout)
+
+
+def layout_key(layout):
+    """Canonical, hashable form of a layout (order of purchase is irrelevant)"""
+    return tuple(sorted(layout))
+
+
+def score_result(result, budget, layout):
+    """
+    Single number to maximize
+
+    Whole waves cleared dominate. Within a wave count, fewer leaks are
+    better, and then spending less of the budget.
+    """
+    spawned = sum(result['spawned'])
+    leak_rate = sum(result['leaked']) / spawned if spawned else 0.0
+    return result['waves_cleared'] + 0.9 * (1 - leak_rate) + 0.09 * (1 - layout_cost(layout) / budget)
+
+
+class LayoutSearch:
+    """Annealing state: candidate cells, the score cache and the best layout"""
+
+    def __init__(self, waves, budget, seed=0, cache=None, game_map=DEFAULT_MAP):
+        """
+        Args:
+            waves: Target wave to survive
+            budget: Gold available for the opening layout
+            seed: Seed for proposals
+            cache: Dict of layout key -> score from an earlier search
+                on the same map
+            game_map: Map name or file to play on (as for load_map)
+        """
+        self.waves = waves
+        self.budget = budget
+        self.rng = random.Random(seed)
+        self.cache = cache if cache is not None else {}
+        self.games_played = 0
+        self.game_map = game_map  # Passed to the workers, which load it themselves
+
+        sim = Simulation(visual_effects=False, game_map=game_map)
+        self.map = sim.map
+        samples = path_samples(sim)
+        shortest = min(tower['range'] for tower in TOWERS.values())
+        cells = sorted(buildable_cells(sim), key=lambda cell: -path_coverage(cell, shortest, samples))
+        self.cells = cells[:CANDIDATE_CELLS]
+        self.types = list(TOWERS)
+
+        # Start from the greedy layout, trimmed to the budget
+        self.current = []
+        for tower_type, grid_x, grid_y in build_order('greedy', sim, self.rng):
+            if layout_cost(self.current) + TOWERS[tower_type]['cost'] <= budget:
+                self.current.append((tower_type, grid_x, grid_y))
+        self.current_score = None
+        self.best = list(self.current)
+        self.best_score = None
+
+    def neighbor(self, layout):
+        """Random small change to a layout that stays within budget"""
+        for _ in range(100):
+            new = list(layout)
+            used = {(gx, gy) for _, gx, gy in new}
+            free = [cell for cell in self.cells if cell not in used]
+            move = self.rng.random()
+
+            if move < 0.35 and new and free:
+                # Move one tower to another cell
+                i = self.rng.randrange(len(new))
+                cell = self.rng.choice(free)
+                new[i] = (new[i][0], cell[0], cell[1])
+            elif move < 0.65 and new:
+                # Change one tower's type
+                i = self.rng.randrange(len(new))
+                new[i] = (self.rng.choice(self.types), new[i][1], new[i][2])
+            elif move < 0.85 and free:
+                # Add a tower
+                cell = self.rng.choice(free)
+                new.append((self.rng.choice(self.types), cell[0], cell[1]))
+            elif new:
+                # Remove a tower
+                new.pop(self.rng.randrange(len(new)))
+
+            if new and layout_cost(new) <= self.budget and layout_key(new) != layout_key(layout):
+                return new
+        return list(layout)
+
+    def job(self, layout):
+        return {'layout': 'search', 'variant': 'baseline', 'overrides': {}, 'seed': 0,
+                'max_waves': self.waves, 'sim_options': {'game_map': self.game_map}, 'order': layout}
+
+    def evaluate(self, pool, layouts):
+        """Score layouts, playing only the ones not in the cache"""
+        missing = []
+        for layout in layouts:
+            key = layout_key(layout)
+            if key not in self.cache and key not in (layout_key(m) for m in missing):
+                missing.append(layout)
+
+        if missing:
+            results = pool.map(play_game, [self.job(layout) for layout in missing])
+            self.games_played += len(missing)
+            for layout, result in zip(missing, results):
+                self.cache[layout_key(layout)] = score_result(result, self.budget, layout)
+        return [self.cache[layout_key(layout)] for layout in layouts]
+
+    def run(self, pool, batch, time_budget, progress=None):
+        """
+        Anneal until the time budget runs out
+
+        The budget is checked between rounds, so the search can overrun it
+        by at most one round of games.
+
+        Args:
+            pool: multiprocessing.Pool for scoring
+            batch: Proposals per round (usually one per worker)
+            time_budget: Wall-clock seconds to search
+            progress: Optional callable(elapsed, search) after each round
+        """
+        start = time.perf_counter()
+        self.current_score = self.evaluate(pool, [self.current])[0]
+        self.best, self.best_score = list(self.current), self.current_score
+
+        while True:
+            elapsed = time.perf_counter() - start
+            if elapsed >= time_budget:
+                break
+            fraction = elapsed / time_budget
+            temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** fraction
+
+            proposals = [self.neighbor(self.current) for _ in range(batch)]
+            scores = self.evaluate(pool, proposals)
+            score, proposal = max(zip(scores, proposals), key=lambda pair: pair[0])
+
+            delta = score - self.current_score
+            if delta >= 0 or self.rng.random() < math.exp(delta / temperature):
+                self.current, self.current_score = proposal, score
+            if score > self.best_score:
+                self.best, self.best_score = list(proposal), score
+
+            if progress:
+                progress(elapsed, self)
+
+
+def config_fingerprint(game_map):
+    """
+    Hash of every config value and the map, so cached scores die with a
+    balance change or an edit to the map file
+    """
+    values = {name: value for name, value in vars(config).items()
+              if name.isupper() and isinstance(value, (int, float, str, list, tuple, dict))}
+    values = {'config': values, 'map': [game_map.name, game_map.hash]}
+    return hashlib.sha1(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+
+def load_cache(filename, waves, budget, game_map):
+    """Read scores saved for the same target wave, budget, config and map"""
+    if not filename or not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        data = json.load(f)
+    if (data.get('waves'), data.get('budget'), data.get('config')) != (waves, budget,
+                                                                       config_fingerprint(game_map)):
+        return {}
+    return {tuple(tuple(tower) for tower in key): score for key, score in data['scores']}
+
+
+def save_cache(filename, search):
+    with open(filename, 'w') as f:
+        json.dump({'waves': search.waves, 'budget': search.budget, 'config': config_fingerprint(search.map),
+                   'scores': [[list(key), score] for key, score in search.cache.items()]}, f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search for the best opening tower layout")
+    parser.add_argument('--waves', type=int, default=20, help="Wave to survive")
+    parser.add_argument('--budget', type=int, default=STARTING_CURRENCY, help="Gold for the opening layout")
+    parser.add_argument('--time', type=float, default=120, help="Wall-clock search budget in seconds")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--map', default=DEFAULT_MAP, help="Map name or map file to play on")
+    parser.add_argument('--cache', help="JSON file of scored layouts, reused and updated")
+    parser.add_argument('--json', help="Write the best layout to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        game_map = load_map(args.map)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    search = LayoutSearch(args.waves, args.budget, args.seed,
+                          load_cache(args.cache, args.waves, args.budget, game_map), args.map)
+    cached = len(search.cache)
+
+    def progress(elapsed, search):
+        print(f"\r{elapsed:6.1f}s  games {search.games_played:5d}  current {search.current_score:7.3f}  "
+              f"best {search.best_score:7.3f}", end='', file=sys.stderr, flush=True)
+
+    with multiprocessing.Pool(args.workers, initializer=quiet_worker) as pool:
+        search.run(pool, args.workers, args.time, progress)
+    print(file=sys.stderr)
+
+    print(f"Played {search.games_played} games on {search.map.name} ({cached} layouts from cache)")
+    print(f"Best score {search.best_score:.3f} (waves cleared + leak/cost fraction), "
+          f"cost ${layout_cost(search.best)} of ${args.budget}")
+    for tower_type, grid_x, grid_y in sorted(search.best):
+        print(f"  {tower_type:<12} ({grid_x}, {grid_y})")
+
+    if args.cache:
+        save_cache(args.cache, search)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'map': search.map.name, 'waves': args.waves, 'budget': args.budget,
+                       'score': search.best_score,
+                       'towers': [list(tower) for tower in search.best]}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,11 +4,26 @@ Particle system for visual effects
 import random
 import math
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional - ParticleList is used instead
+    np = None
+
+from config import PARTICLE_CAPACITY, TRACER_LIFETIME
+from entities import EntityList
+from pool import ObjectPool
+
 
 class Particle:
     """Single particle for effects like explosions"""
     
+    __slots__ = ('x', 'y', 'color', 'vx', 'vy', 'lifetime', 'max_lifetime', 'size', 'alive')
+    
     def __init__(self, x, y, color, velocity_x=0, velocity_y=0, lifetime=1.0, size=5):
+        self.reset(x, y, color, velocity_x, velocity_y, lifetime, size)
+    
+    def reset(self, x, y, color, velocity_x=0, velocity_y=0, lifetime=1.0, size=5):
+        """Re-initialize a pooled particle (same arguments as __init__)"""
         self.x = x
         self.y = y
         self.color = color
@@ -40,7 +55,13 @@ class Particle:
 class MuzzleFlash:
     """Brief flash when tower shoots"""
     
+    __slots__ = ('x', 'y', 'color', 'lifetime', 'alive')
+    
     def __init__(self, x, y, color):
+        self.reset(x, y, color)
+    
+    def reset(self, x, y, color):
+        """Re-initialize a pooled flash (same arguments as __init__)"""
         self.x = x
         self.y = y
         self.color = color
@@ -54,50 +75,252 @@ class MuzzleFlash:
             self.alive = False
 
 
-def create_explosion(x, y, color, num_particles=15):
+class Tracer:
+    """Line from a hitscan tower to where its shot landed (cosmetic only)"""
+    
+    __slots__ = ('x', 'y', 'end_x', 'end_y', 'color', 'lifetime', 'alive')
+    
+    def __init__(self, x, y, end_x, end_y, color):
+        self.reset(x, y, end_x, end_y, color)
+    
+    def reset(self, x, y, end_x, end_y, color):
+        """Re-initialize a pooled tracer (same arguments as __init__)"""
+        self.x = x
+        self.y = y
+        self.end_x = end_x
+        self.end_y = end_y
+        self.color = color
+        self.lifetime = TRACER_LIFETIME
+        self.alive = True
+    
+    def update(self, dt):
+        """Update tracer"""
+        self.lifetime -= dt
+        if self.lifetime <= 0:
+            self.alive = False
+
+
+# Effects draw from these; whoever drops a dead effect releases it
+particle_pool = ObjectPool('particle', Particle)
+flash_pool = ObjectPool('muzzle_flash', MuzzleFlash)
+tracer_pool = ObjectPool('tracer', Tracer)
+
+
+def create_explosion(x, y, color, num_particles=15, rng=random):
     """Create explosion particle effect"""
     particles = []
     
     for _ in range(num_particles):
         # Random direction
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(50, 150)
+        angle = rng.uniform(0, 2 * math.pi)
+        speed = rng.uniform(50, 150)
         
         vx = math.cos(angle) * speed
         vy = math.sin(angle) * speed
         
         # Vary the color slightly
-        r = min(1.0, color[0] + random.uniform(-0.2, 0.2))
-        g = min(1.0, color[1] + random.uniform(-0.2, 0.2))
-        b = min(1.0, color[2] + random.uniform(-0.2, 0.2))
+        r = min(1.0, color[0] + rng.uniform(-0.2, 0.2))
+        g = min(1.0, color[1] + rng.uniform(-0.2, 0.2))
+        b = min(1.0, color[2] + rng.uniform(-0.2, 0.2))
         particle_color = (r, g, b)
         
-        lifetime = random.uniform(0.3, 0.7)
-        size = random.uniform(3, 8)
+        lifetime = rng.uniform(0.3, 0.7)
+        size = rng.uniform(3, 8)
         
-        particle = Particle(x, y, particle_color, vx, vy, lifetime, size)
+        particle = particle_pool.acquire(x, y, particle_color, vx, vy, lifetime, size)
         particles.append(particle)
     
     return particles
 
 
-def create_hit_effect(x, y, num_particles=5):
+def create_hit_effect(x, y, num_particles=5, rng=random):
     """Create small impact effect when projectile hits"""
     particles = []
     
     for _ in range(num_particles):
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(30, 80)
+        angle = rng.uniform(0, 2 * math.pi)
+        speed = rng.uniform(30, 80)
         
         vx = math.cos(angle) * speed
         vy = math.sin(angle) * speed
         
         # Yellow/orange impact
-        color = (1.0, random.uniform(0.5, 1.0), 0)
-        lifetime = random.uniform(0.1, 0.3)
-        size = random.uniform(2, 4)
+        color = (1.0, rng.uniform(0.5, 1.0), 0)
+        lifetime = rng.uniform(0.1, 0.3)
+        size = rng.uniform(2, 4)
         
-        particle = Particle(x, y, color, vx, vy, lifetime, size)
+        particle = particle_pool.acquire(x, y, color, vx, vy, lifetime, size)
         particles.append(particle)
     
     return particles
+
+
+class ParticleList:
+    """
+    Pure-Python particle container built on Particle objects
+
+    Same interface as ParticleSystem, used when NumPy is not installed.
+    """
+    
+    def __init__(self, capacity=PARTICLE_CAPACITY, seed=None):
+        self.capacity = capacity
+        self.items = EntityList()
+        self.rng = random.Random(seed)
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def _add(self, particles):
+        self.items.extend(particles)
+        overflow = len(self.items) - self.capacity
+        if overflow > 0:
+            # Evict the oldest particles first
+            for particle in self.items[:overflow]:
+                particle_pool.release(particle)
+            del self.items[:overflow]
+    
+    def spawn_explosion(self, x, y, color, num_particles=15):
+        """Spawn an explosion (see create_explosion)"""
+        self._add(create_explosion(x, y, color, num_particles, self.rng))
+    
+    def spawn_hit(self, x, y, num_particles=5):
+        """Spawn a projectile impact (see create_hit_effect)"""
+        self._add(create_hit_effect(x, y, num_particles, self.rng))
+    
+    def update(self, dt):
+        """Update every particle and drop the ones that faded out"""
+        for particle in self.items:
+            particle.update(dt)
+        self.items.compact(on_remove=particle_pool.release)
+    
+    def clear(self):
+        for particle in self.items:
+            particle_pool.release(particle)
+        self.items.clear()
+    
+    def draw_items(self):
+        """Yields (x, y, r, g, b, alpha, size) for each live particle"""
+        for p in self.items:
+            yield p.x, p.y, p.color[0], p.color[1], p.color[2], p.get_alpha(), p.size
+
+
+class ParticleSystem:
+    """
+    Fixed-capacity particle engine backed by NumPy arrays
+    
+    Particles live in preallocated arrays used as a ring buffer: spawning
+    writes over the oldest slots, so memory never grows no matter how many
+    enemies die in one frame. Movement, gravity and fading happen for all
+    particles at once.
+    """
+    
+    GRAVITY = 100  # Same pull as Particle.update
+    
+    def __init__(self, capacity=PARTICLE_CAPACITY, seed=None):
+        """
+        Args:
+            capacity: Maximum number of live particles
+            seed: Seed for the spawn randomness (None = unpredictable)
+        """
+        if np is None:
+            raise ImportError("ParticleSystem requires NumPy")
+        
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.color = np.zeros((capacity, 3))
+        self.lifetime = np.zeros(capacity)  # <= 0 means the slot is free
+        self.max_lifetime = np.ones(capacity)
+        self.size = np.zeros(capacity)
+        self.head = 0  # Next slot to write; always the oldest one
+        self.used = 0  # High-water mark of slots ever written
+    
+    def __len__(self):
+        return int(np.count_nonzero(self.lifetime[:self.used] > 0))
+    
+    def _slots(self, count):
+        """Claim `count` slots, overwriting the oldest particles"""
+        count = min(count, self.capacity)
+        slots = (self.head + np.arange(count)) % self.capacity
+        self.head = (self.head + count) % self.capacity
+        self.used = min(self.capacity, self.used + count)
+        return slots
+    
+    def _spawn(self, x, y, count, speed_range, lifetime_range, size_range):
+        slots = self._slots(count)
+        n = len(slots)
+        rng = self.rng
+        angle = rng.uniform(0, 2 * math.pi, n)
+        speed = rng.uniform(speed_range[0], speed_range[1], n)
+        self.x[slots] = x
+        self.y[slots] = y
+        self.vx[slots] = np.cos(angle) * speed
+        self.vy[slots] = np.sin(angle) * speed
+        lifetime = rng.uniform(lifetime_range[0], lifetime_range[1], n)
+        self.lifetime[slots] = lifetime
+        self.max_lifetime[slots] = lifetime
+        self.size[slots] = rng.uniform(size_range[0], size_range[1], n)
+        return slots
+    
+    def spawn_explosion(self, x, y, color, num_particles=15):
+        """Spawn an explosion, matching create_explosion"""
+        slots = self._spawn(x, y, num_particles, (50, 150), (0.3, 0.7), (3, 8))
+        # Vary the color slightly
+        jitter = self.rng.uniform(-0.2, 0.2, (len(slots), 3))
+        self.color[slots] = np.minimum(1.0, np.asarray(color[:3]) + jitter)
+    
+    def spawn_hit(self, x, y, num_particles=5):
+        """Spawn a projectile impact, matching create_hit_effect"""
+        slots = self._spawn(x, y, num_particles, (30, 80), (0.1, 0.3), (2, 4))
+        # Yellow/orange impact
+        self.color[slots, 0] = 1.0
+        self.color[slots, 1] = self.rng.uniform(0.5, 1.0, len(slots))
+        self.color[slots, 2] = 0
+    
+    def update(self, dt):
+        """Move, pull down and fade every particle at once"""
+        n = self.used
+        if n == 0:
+            return
+        self.x[:n] += self.vx[:n] * dt
+        self.y[:n] += self.vy[:n] * dt
+        self.vy[:n] -= self.GRAVITY * dt
+        self.lifetime[:n] -= dt
+    
+    def clear(self):
+        self.lifetime[:] = 0
+        self.head = self.used = 0
+    
+    def live_indices(self):
+        """Indices of slots holding live particles"""
+        return np.flatnonzero(self.lifetime[:self.used] > 0)
+    
+    def draw_arrays(self):
+        """
+        Live particles as arrays, for batched drawing
+
+        Returns:
+            tuple: (x, y, rgb of shape (n, 3), alpha, size)
+        """
+        live = self.live_indices()
+        alpha = self.lifetime[live] / self.max_lifetime[live]
+        return self.x[live], self.y[live], self.color[live], alpha, self.size[live]
+    
+    def draw_items(self):
+        """Yields (x, y, r, g, b, alpha, size) for each live particle"""
+        live = self.live_indices()
+        alpha = self.lifetime[live] / self.max_lifetime[live]
+        rows = zip(self.x[live].tolist(), self.y[live].tolist(), self.color[live].tolist(),
+                   alpha.tolist(), self.size[live].tolist())
+        for x, y, (r, g, b), a, size in rows:
+            yield x, y, r, g, b, a, size
+
+
+def make_particle_system(capacity=PARTICLE_CAPACITY, seed=None):
+    """Returns a ParticleSystem if NumPy is available, else a ParticleList"""
+    if np is not None:
+        return ParticleSystem(capacity, seed)
+    return ParticleList(capacity, seed)
@@ -0,0 +1,131 @@
+"""
+Path table - Precomputed arc-length lookup for the enemy path polyline
+
+Enemies track how far they have walked along the path as a single number.
+This table turns that distance back into a position without any sqrt.
+"""
+from bisect import bisect_right
+import math
+
+
+class PathTable:
+    """Cumulative segment lengths and unit directions for a polyline"""
+
+    _cache = {}
+
+    def __init__(self, points):
+        """
+        Build the table
+
+        Args:
+            points: List of (x, y) waypoints in pixels (at least one)
+        """
+        self.points = tuple((float(x), float(y)) for x, y in points)
+
+        # Per segment: length and unit direction
+        self.lengths = []
+        self.directions = []
+        self.cumulative = [0.0]  # Arc length at each waypoint
+        for (x1, y1), (x2, y2) in zip(self.points, self.points[1:]):
+            length = math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+            if length > 0:
+                direction = ((x2 - x1) / length, (y2 - y1) / length)
+            else:
+                direction = (0.0, 0.0)
+            self.lengths.append(length)
+            self.directions.append(direction)
+            self.cumulative.append(self.cumulative[-1] + length)
+        self._finish()
+
+    @classmethod
+    def from_tables(cls, points, lengths, directions, cumulative):
+        """
+        Rebuild a table from previously computed values (see maps.py)
+
+        Args:
+            points: (x, y) waypoints
+            lengths: Length of each segment
+            directions: Unit (dx, dy) of each segment
+            cumulative: Arc length at each waypoint
+        """
+        table = cls.__new__(cls)
+        table.points = tuple((float(x), float(y)) for x, y in points)
+        table.lengths = [float(length) for length in lengths]
+        table.directions = [(float(dx), float(dy)) for dx, dy in directions]
+        table.cumulative = [float(distance) for distance in cumulative]
+        if not (len(table.lengths) == len(table.directions) == len(table.cumulative) - 1
+                == max(len(table.points) - 1, 0)):
+            raise ValueError("Path tables don't match the waypoints")
+        table._finish()
+        return table
+
+    def _finish(self):
+        """Derived fields, from points/lengths/directions/cumulative"""
+        self.total_length = self.cumulative[-1]
+        self.num_segments = len(self.lengths)
+
+        # Everything needed to walk a segment in one tuple:
+        # (start arc length, end arc length, start x, start y, dir x, dir y).
+        # The last segment never ends, so forward walks stop there.
+        self.segments = []
+        for i in range(self.num_segments):
+            end = self.cumulative[i + 1] if i < self.num_segments - 1 else math.inf
+            self.segments.append((self.cumulative[i], end) + self.points[i] + self.directions[i])
+
+    @classmethod
+    def for_points(cls, points):
+        """Returns a shared table for a waypoint list, building it once"""
+        key = tuple((float(x), float(y)) for x, y in points)
+        table = cls._cache.get(key)
+        if table is None:
+            table = cls._cache[key] = cls(key)
+        return table
+
+    @classmethod
+    def share(cls, table):
+        """Make a table the one for_points() returns for its waypoints"""
+        return cls._cache.setdefault(table.points, table)
+
+    def __len__(self):
+        """Number of waypoints, so a table can stand in for the point list"""
+        return len(self.points)
+
+    def __getitem__(self, index):
+        return self.points[index]
+
+    def __iter__(self):
+        return iter(self.points)
+
+    def segment_at(self, distance):
+        """
+        Find the segment containing an arc-length position
+
+        Returns:
+            int: Segment index, clamped to the path
+        """
+        segment = bisect_right(self.cumulative, distance) - 1
+        if segment < 0:
+            return 0
+        if segment >= self.num_segments:
+            return self.num_segments - 1
+        return segment
+
+    def position_at(self, distance):
+        """
+        Convert arc length to a pixel position
+
+        Args:
+            distance: Distance walked from the first waypoint
+
+        Returns:
+            tuple: (x, y, segment)
+        """
+        if self.num_segments == 0:
+            x, y = self.points[0]
+            return x, y, 0
+
+        segment = self.segment_at(distance)
+        start_x, start_y = self.points[segment]
+        dir_x, dir_y = self.directions[segment]
+        along = distance - self.cumulative[segment]
+        return start_x + dir_x * along, start_y + dir_y * along, segment
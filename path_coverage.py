@@ -0,0 +1,146 @@
+"""
+Coverage map - Which stretches of the enemy path each grid cell can reach
+
+For a given tower range, every free cell gets the arc-length intervals of
+the path inside that range. Enemies always stand on the path, so a tower can
+skip any enemy whose distance is outside its intervals without computing a
+distance. The covered length per cell also drives the placement heatmap.
+
+Tables are cached per range value, so upgrades or config reloads that change
+a range simply use (or build) another table; Simulation.refresh_coverage()
+hands placed towers their new reach. Only a path (or map) change calls for
+invalidate().
+"""
+import math
+
+# Intervals are widened by this much so an enemy right on the edge of range
+# still gets the exact distance check instead of being skipped
+REACH_EPSILON = 1e-6
+
+
+def segment_interval(cx, cy, radius, segment, length):
+    """
+    Part of one path segment within radius of a point
+
+    Args:
+        cx, cy: Circle center in pixels
+        radius: Circle radius in pixels
+        segment: PathTable segment tuple (start, end, sx, sy, dx, dy)
+        length: Segment length
+
+    Returns:
+        tuple or None: (start, end) arc lengths along the whole path
+    """
+    start, _, sx, sy, dx, dy = segment
+    if length <= 0:
+        return None
+
+    # Solve |s + t*d - c| = radius for t (d is a unit vector)
+    fx = sx - cx
+    fy = sy - cy
+    b = fx * dx + fy * dy
+    disc = b * b - (fx * fx + fy * fy - radius * radius)
+    if disc < 0:
+        return None
+    root = math.sqrt(disc)
+    t0 = max(0.0, -b - root)
+    t1 = min(length, -b + root)
+    if t0 > t1:
+        return None
+    return start + t0, start + t1
+
+
+class CellReach:
+    """Path coverage of one cell for one range"""
+
+    __slots__ = ('length', 'intervals')
+
+    def __init__(self, length, intervals):
+        self.length = length  # Path arc length in range, in pixels
+        self.intervals = intervals  # Sorted, merged (start, end) arc lengths
+
+
+class CoverageMap:
+    """Lazily built per-range coverage tables for every free cell"""
+
+    def __init__(self, path, cell_size, cols, rows, blocked=()):
+        """
+        Args:
+            path: PathTable enemies walk along
+            cell_size: Grid cell size in pixels
+            cols, rows: Grid dimensions
+            blocked: Cells towers can't be built on (e.g. path_cells)
+        """
+        self.cell_size = cell_size
+        self.cols = cols
+        self.rows = rows
+        self.version = 0  # Bumped by invalidate(), for caches built on top
+        self.invalidate(path, blocked)
+
+    def invalidate(self, path=None, blocked=None, size=None):
+        """
+        Drop every table, optionally switching to a new path
+
+        Args:
+            path: New PathTable (default: keep the current one)
+            blocked: New set of blocked cells (default: keep)
+            size: New (cols, rows) (default: keep)
+        """
+        if path is not None:
+            self.path = path
+        if blocked is not None:
+            self.blocked = set(blocked)
+        if size is not None:
+            self.cols, self.rows = size
+        self.tables = {}
+        self.version += 1
+
+    def free_cells(self):
+        return [(gx, gy) for gx in range(self.cols) for gy in range(self.rows)
+                if (gx, gy) not in self.blocked]
+
+    def compute(self, grid_x, grid_y, tower_range):
+        """Coverage of one cell, ignoring the cache"""
+        half = self.cell_size // 2
+        cx = grid_x * self.cell_size + half
+        cy = grid_y * self.cell_size + half
+        path = self.path
+
+        intervals = []
+        for segment, length in zip(path.segments, path.lengths):
+            interval = segment_interval(cx, cy, tower_range, segment, length)
+            if interval is None:
+                continue
+            if intervals and interval[0] <= intervals[-1][1]:
+                # Continues across a waypoint
+                intervals[-1] = (intervals[-1][0], max(intervals[-1][1], interval[1]))
+            else:
+                intervals.append(interval)
+
+        length = sum(end - start for start, end in intervals)
+        padded = tuple((start - REACH_EPSILON, end + REACH_EPSILON) for start, end in intervals)
+        return CellReach(length, padded)
+
+    def table(self, tower_range):
+        """
+        Coverage of every free cell for one range
+
+        Returns:
+            dict: (grid_x, grid_y) -> CellReach
+        """
+        table = self.tables.get(tower_range)
+        if table is None:
+            table = {cell: self.compute(cell[0], cell[1], tower_range) for cell in self.free_cells()}
+            self.tables[tower_range] = table
+        return table
+
+    def reach(self, grid_x, grid_y, tower_range):
+        """CellReach for one cell (blocked cells are computed, not cached)"""
+        cell_reach = self.table(tower_range).get((grid_x, grid_y))
+        if cell_reach is None:
+            cell_reach = self.compute(grid_x, grid_y, tower_range)
+        return cell_reach
+
+    def max_length(self, tower_range):
+        """Longest covered length of any cell, for normalizing the heatmap"""
+        return max((r.length for r in self.table(tower_range).values()), default=0.0)
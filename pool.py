@@ -0,0 +1,72 @@
+"""
+Object pools - Free lists for short-lived game objects
+
+Shots, muzzle flashes and particles live for a fraction of a second. Rather
+than allocating (and later garbage collecting) a new object every time,
+a pool hands back a released one re-initialized with reset(). Pooled
+classes implement reset() with the same arguments as __init__.
+"""
+from config import POOL_MAX_FREE
+
+# name -> ObjectPool, for stats
+POOLS = {}
+
+
+class ObjectPool:
+    """Free list of reusable instances of one class"""
+
+    def __init__(self, name, cls, max_free=POOL_MAX_FREE, clear=()):
+        """
+        Args:
+            name: Name shown in stats
+            cls: Class to pool; needs reset(*args) matching __init__
+            max_free: Most released objects kept; extras are left to the GC
+            clear: Attributes set to None on release, so pooled objects
+                don't keep other objects (e.g. dead enemies) alive
+        """
+        self.name = name
+        self.cls = cls
+        self.max_free = max_free
+        self.clear = clear
+        self.free = []
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+        POOLS[name] = self
+
+    def acquire(self, *args):
+        """Returns a reset pooled object, or a new one if none are free"""
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.cls(*args)
+
+    def release(self, obj):
+        """Hand an object back; it must not be used by the caller again"""
+        self.released += 1
+        if len(self.free) < self.max_free:
+            for attr in self.clear:
+                setattr(obj, attr, None)
+            self.free.append(obj)
+
+    def stats(self):
+        """
+        Returns:
+            dict: created, reused, free, in_use and hit_rate (reused share of acquires)
+        """
+        acquired = self.created + self.reused
+        return {
+            'created': self.created,
+            'reused': self.reused,
+            'free': len(self.free),
+            'in_use': acquired - self.released,
+            'hit_rate': self.reused / acquired if acquired else 0.0,
+        }
+
+
+def pool_stats():
+    """Stats of every pool, by name"""
+    return {name: pool.stats() for name, pool in POOLS.items()}
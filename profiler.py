@@ -0,0 +1,136 @@
+"""
+Frame profiler - Per-phase timings with rolling percentiles
+
+Code marks the end of each phase with lap(phase); the time since the
+previous mark is added to that phase for the current frame. end_frame()
+stores the frame's totals in a fixed-size window (for p50/p95/p99) and in a
+whole-session histogram with logarithmic buckets. A lap is one
+perf_counter() call and a few list operations, and percentiles are only
+sorted when stats() is asked for.
+"""
+from bisect import bisect_right
+import csv
+import json
+import math
+from time import perf_counter
+
+from config import PROFILER_WINDOW
+
+# Histogram buckets: 1.25x apart from 10 microseconds up (last bucket open)
+BUCKET_START = 1e-5
+BUCKET_GROWTH = 1.25
+NUM_BUCKETS = 48
+
+
+def bucket_bounds(index):
+    """(low, high) seconds of a histogram bucket"""
+    low = 0.0 if index == 0 else BUCKET_START * BUCKET_GROWTH ** (index - 1)
+    high = math.inf if index == NUM_BUCKETS - 1 else BUCKET_START * BUCKET_GROWTH ** index
+    return low, high
+
+
+# Upper bounds of every bucket but the last, for bisect
+BUCKET_EDGES = [bucket_bounds(i)[1] for i in range(NUM_BUCKETS - 1)]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class FrameProfiler:
+    """Accumulates phase timings per frame"""
+
+    def __init__(self, phases, window=PROFILER_WINDOW):
+        """
+        Args:
+            phases: Phase names in display order ('total' is added)
+            window: Frames kept for the rolling percentiles
+        """
+        self.phases = list(phases) + ['total']
+        self.slot = {phase: i for i, phase in enumerate(self.phases)}
+        self.window = window
+        self.current = [0.0] * len(self.phases)
+        self.samples = [[0.0] * window for _ in self.phases]
+        self.histograms = [[0] * NUM_BUCKETS for _ in self.phases]
+        self.frames = 0
+        self.frame_start = self.mark = perf_counter()
+
+    def begin_frame(self):
+        self.frame_start = self.mark = perf_counter()
+
+    def resume(self):
+        """Restart the lap clock without charging the gap to any phase"""
+        self.mark = perf_counter()
+
+    def lap(self, phase):
+        """Charge the time since the last mark to a phase"""
+        now = perf_counter()
+        self.current[self.slot[phase]] += now - self.mark
+        self.mark = now
+
+    def end_frame(self):
+        """Store this frame's timings and start accumulating the next"""
+        current = self.current
+        current[-1] = perf_counter() - self.frame_start
+        position = self.frames % self.window
+        for seconds, samples, histogram in zip(current, self.samples, self.histograms):
+            samples[position] = seconds
+            histogram[bisect_right(BUCKET_EDGES, seconds)] += 1
+        self.current = [0.0] * len(current)
+        self.frames += 1
+
+    def stats(self):
+        """
+        Rolling statistics over the last `window` frames
+
+        Returns:
+            dict: phase -> {'p50', 'p95', 'p99', 'mean', 'max'} in milliseconds
+        """
+        count = min(self.frames, self.window)
+        result = {}
+        for phase, samples in zip(self.phases, self.samples):
+            values = sorted(samples[:count])
+            result[phase] = {
+                'p50': percentile(values, 0.50) * 1000,
+                'p95': percentile(values, 0.95) * 1000,
+                'p99': percentile(values, 0.99) * 1000,
+                'mean': sum(values) / count * 1000 if count else 0.0,
+                'max': (values[-1] if values else 0.0) * 1000,
+            }
+        return result
+
+    def overlay_text(self):
+        """Fixed-width table for an on-screen overlay"""
+        lines = [f"{'phase':<12}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for phase, row in self.stats().items():
+            lines.append(f"{phase:<12}{row['p50']:>7.2f}{row['p95']:>7.2f}{row['p99']:>7.2f}")
+        lines.append(f"{self.frames} frames")
+        return '\n'.join(lines)
+
+    def dump(self, prefix):
+        """
+        Write <prefix>.json (stats and histograms) and <prefix>.csv (histograms)
+
+        Returns:
+            list: Paths written
+        """
+        buckets = [bucket_bounds(i) for i in range(NUM_BUCKETS)]
+        with open(prefix + '.json', 'w') as f:
+            json.dump({
+                'frames': self.frames,
+                'window': self.window,
+                'stats_ms': self.stats(),
+                'bucket_upper_ms': [high * 1000 if high != math.inf else None for _, high in buckets],
+                'histograms': dict(zip(self.phases, self.histograms)),
+            }, f, indent=2)
+
+        with open(prefix + '.csv', 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['low_ms', 'high_ms'] + self.phases)
+            for i, (low, high) in enumerate(buckets):
+                writer.writerow([f"{low * 1000:.4f}", '' if high == math.inf else f"{high * 1000:.4f}"]
+                                + [histogram[i] for histogram in self.histograms])
+        return [prefix + '.json', prefix + '.csv']
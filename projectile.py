@@ -3,10 +3,47 @@ Projectile class - Handles projectiles fired by towers
 """
 import math
 
+from config import PROJECTILE_HIT_RADIUS
+from pool import ObjectPool
+
+
+def segment_circle_entry(x, y, dx, dy, cx, cy, radius):
+    """
+    Where a moving point first comes within radius of a circle's center
+
+    Args:
+        x, y: Segment start
+        dx, dy: Segment vector (start to end)
+        cx, cy: Circle center
+        radius: Circle radius
+
+    Returns:
+        float or None: Fraction 0-1 along the segment, or None if it misses
+    """
+    fx = x - cx
+    fy = y - cy
+    c = fx * fx + fy * fy - radius * radius
+    if c <= 0:
+        return 0.0  # Starts inside
+    a = dx * dx + dy * dy
+    if a == 0:
+        return None
+
+    # Solve |f + t*d| = radius for the smaller root t
+    b = fx * dx + fy * dy
+    disc = b * b - a * c
+    if disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    return t if 0 <= t <= 1 else None
+
 
 class Projectile:
     """Represents a projectile fired by a tower"""
     
+    __slots__ = ('x', 'y', 'prev_x', 'prev_y', 'target', 'damage', 'speed', 'tower_type',
+                 'splash_radius', 'active')
+    
     def __init__(self, x, y, target, damage, speed, tower_type='cannon', splash_radius=0):
         """
         Initialize a projectile
@@ -19,8 +56,14 @@ class Projectile:
             tower_type: Type of tower that fired this
             splash_radius: Radius for splash damage (0 = no splash)
         """
+        self.reset(x, y, target, damage, speed, tower_type, splash_radius)
+    
+    def reset(self, x, y, target, damage, speed, tower_type='cannon', splash_radius=0):
+        """Re-initialize a pooled projectile (same arguments as __init__)"""
         self.x = x
         self.y = y
+        self.prev_x = x  # Position before the last update, for interpolation
+        self.prev_y = y
         self.target = target
         self.damage = damage
         self.speed = speed
@@ -41,24 +84,44 @@ class Projectile:
         if not self.active:
             return True
         
-        # If target died, mark inactive but return False to keep checking
+        self.prev_x = self.x
+        self.prev_y = self.y
+        
+        # Target died or escaped: the shot fizzles (inactive, so no damage)
         if not self.target.alive:
             self.active = False
             return True
         
-        # Calculate direction to target
-        dx = self.target.x - self.x
-        dy = self.target.y - self.y
+        # Calculate direction to target (read once: for the enemy store's
+        # views every attribute read is an array lookup)
+        target = self.target
+        target_x = target.x
+        target_y = target.y
+        dx = target_x - self.x
+        dy = target_y - self.y
         distance = math.sqrt(dx**2 + dy**2)
         
-        # Check if hit target
-        if distance < 10:  # Hit radius
+        # Check if hit target (it may have walked into the shot)
+        if distance < PROJECTILE_HIT_RADIUS:
             return True  # Keep active=True so damage can be applied
         
         # Move towards target
-        if distance > 0:
-            move_distance = self.speed * dt
-            self.x += (dx / distance) * move_distance
-            self.y += (dy / distance) * move_distance
+        move_distance = self.speed * dt
+        step_x = (dx / distance) * move_distance
+        step_y = (dy / distance) * move_distance
+        
+        # Swept test over the whole step, so fast shots can't jump past
+        # the hit circle and circle around the target
+        t = segment_circle_entry(self.x, self.y, step_x, step_y, target_x, target_y, PROJECTILE_HIT_RADIUS)
+        if t is not None:
+            self.x += step_x * t
+            self.y += step_y * t
+            return True
         
+        self.x += step_x
+        self.y += step_y
         return False
+
+
+# Shots are drawn from here by Tower.shoot and released by the simulation
+projectile_pool = ObjectPool('projectile', Projectile, clear=('target',))
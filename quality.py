@@ -0,0 +1,124 @@
+"""
+Adaptive quality - Trade visual detail for frame time
+
+The governor compares how long each frame's work takes with FRAME_BUDGET.
+main.py times a frame from the start of its update (simulation, UI and
+canvas updates) until Kivy has issued the GL draw calls and is about to
+swap buffers. The vsync wait after that is idle time and is left out.
+Over budget, the governor steps through QUALITY_LEVELS: first the glows
+go, then the shadows, then explosions and hit sparks use fewer particles,
+and last the range circle is skipped. Nothing here touches game
+rules, so the outcome of a game never depends on the quality level.
+
+To keep it from flickering between two levels:
+- frame times are smoothed, and a level only changes after the smoothed
+  time has stayed over budget (or under the headroom line) for a number
+  of consecutive frames,
+- detail comes back only well below budget (QUALITY_HEADROOM) and after a
+  much longer wait than it takes to drop it,
+- if a restored level goes over budget again straight away, the wait
+  before the next restore doubles (up to MAX_RESTORE_BACKOFF times).
+"""
+from collections import namedtuple
+
+from config import (FRAME_BUDGET, QUALITY_DEGRADE_FRAMES, QUALITY_HEADROOM,
+                    QUALITY_RESTORE_FRAMES)
+
+# What the renderer and effects draw at one level
+QualityLevel = namedtuple('QualityLevel', 'name glows shadows particle_scale range_circles')
+
+# Best first; each level keeps the previous level's cuts
+QUALITY_LEVELS = (
+    QualityLevel('full', glows=True, shadows=True, particle_scale=1.0, range_circles=True),
+    QualityLevel('no glows', glows=False, shadows=True, particle_scale=1.0, range_circles=True),
+    QualityLevel('no shadows', glows=False, shadows=False, particle_scale=1.0, range_circles=True),
+    QualityLevel('few particles', glows=False, shadows=False, particle_scale=0.4, range_circles=True),
+    QualityLevel('minimal', glows=False, shadows=False, particle_scale=0.4, range_circles=False),
+)
+
+# Weight of the newest frame in the smoothed frame time
+SMOOTHING = 0.1
+# Cap on the restore wait, as a multiple of QUALITY_RESTORE_FRAMES
+MAX_RESTORE_BACKOFF = 8
+
+
+class QualityGovernor:
+    """Picks a QualityLevel from recent frame times"""
+
+    def __init__(self, budget=FRAME_BUDGET, levels=QUALITY_LEVELS, headroom=QUALITY_HEADROOM,
+                 degrade_frames=QUALITY_DEGRADE_FRAMES, restore_frames=QUALITY_RESTORE_FRAMES):
+        """
+        Args:
+            budget: Seconds of work allowed per frame
+            levels: QualityLevels from best to cheapest
+            headroom: Fraction of the budget frames must stay under before
+                detail is restored
+            degrade_frames: Consecutive frames over budget before dropping a level
+            restore_frames: Consecutive frames under the headroom line before
+                restoring a level
+        """
+        self.budget = budget
+        self.levels = levels
+        self.restore_below = budget * headroom
+        self.degrade_frames = degrade_frames
+        self.restore_frames = restore_frames
+
+        self.index = 0
+        self.frame_time = 0.0  # Smoothed
+        self.over = 0  # Consecutive frames over budget
+        self.under = 0  # Consecutive frames with headroom
+        self.restore_wait = restore_frames
+        self.frames_since_restore = None  # Counting only while a restored level is on trial
+
+    @property
+    def level(self):
+        """The current QualityLevel"""
+        return self.levels[self.index]
+
+    def frame(self, seconds):
+        """
+        Record one frame's work time and move to another level if needed
+
+        Args:
+            seconds: Time the frame's update and rendering took, without
+                the wait for vsync
+
+        Returns:
+            bool: True if the level changed (apply self.level)
+        """
+        self.frame_time += (seconds - self.frame_time) * SMOOTHING
+        if self.frames_since_restore is not None:
+            self.frames_since_restore += 1
+
+        if self.frame_time > self.budget:
+            self.over += 1
+            self.under = 0
+            if self.over >= self.degrade_frames and self.index < len(self.levels) - 1:
+                # The level just restored didn't fit: wait longer next time
+                if self.frames_since_restore is not None and self.frames_since_restore < self.restore_wait:
+                    self.restore_wait = min(self.restore_wait * 2, self.restore_frames * MAX_RESTORE_BACKOFF)
+                self.frames_since_restore = None
+                self.set_index(self.index + 1)
+                return True
+        elif self.frame_time < self.restore_below:
+            self.under += 1
+            self.over = 0
+            if self.under >= self.restore_wait and self.index > 0:
+                self.set_index(self.index - 1)
+                self.frames_since_restore = 0
+                return True
+        else:
+            self.over = 0
+            self.under = 0
+
+        # A restored level that held for a while resets the backoff
+        if self.frames_since_restore is not None and self.frames_since_restore >= self.restore_wait:
+            self.restore_wait = self.restore_frames
+            self.frames_since_restore = None
+        return False
+
+    def set_index(self, index):
+        """Jump to a level and start counting afresh"""
+        self.index = index
+        self.over = 0
+        self.under = 0
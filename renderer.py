@@ -0,0 +1,550 @@
+"""
+Renderer - Retained-mode drawing of the simulation onto a Kivy canvas
+
+Instead of clearing the canvas and re-creating every instruction each
+frame, each layer keeps a persistent InstructionGroup. Static layers
+(background, grid, path) are built once; every entity owns a small sprite
+whose pos/size/rgba are mutated in place. Sprites are only added or
+removed when entities appear or disappear.
+
+With NumPy installed, particles, projectile glows and health bars are
+instead packed into a few Mesh vertex buffers per layer (see mesh_batch.py).
+
+set_quality() drops glows, shadows and the range circle for the cheaper
+levels chosen by quality.py.
+"""
+from kivy.graphics import Color, Ellipse, InstructionGroup, Line, Rectangle
+
+from config import GRID_SIZE, TRACER_LIFETIME
+from quality import QUALITY_LEVELS
+
+try:
+    import numpy as np
+    from mesh_batch import QUAD, MeshLayer, circle_kind, circle_vertices, quad_vertices
+except ImportError:  # NumPy is optional - fall back to one sprite per shape
+    np = None
+
+# Screen space taken by the top bar and the side panel
+Y_OFFSET = 50
+SIDE_PANEL_WIDTH = 300
+
+TOWER_SIZE = GRID_SIZE * 0.7
+HEALTH_BAR_WIDTH = 34
+HEALTH_BAR_HEIGHT = 5
+
+
+def lerp_position(entity, alpha):
+    """Position between the last two simulation steps"""
+    prev_x = entity.prev_x
+    prev_y = entity.prev_y
+    return prev_x + (entity.x - prev_x) * alpha, prev_y + (entity.y - prev_y) * alpha
+
+
+class FlashSprite:
+    """Muzzle flash - one fading disc"""
+
+    def __init__(self):
+        self.group = InstructionGroup()
+        self.color = Color(1, 1, 1, 1)
+        self.disc = Ellipse(size=(40, 40))
+        self.group.add(self.color)
+        self.group.add(self.disc)
+
+    def update(self, flash):
+        alpha = flash.lifetime / 0.1  # Flash is 0.1s
+        self.color.rgba = (flash.color[0], flash.color[1], flash.color[2], alpha)
+        self.disc.pos = (flash.x - 20, flash.y - 20 + Y_OFFSET)
+
+
+class TracerSprite:
+    """Hitscan tracer - one fading line"""
+
+    def __init__(self):
+        self.group = InstructionGroup()
+        self.color = Color(1, 1, 1, 1)
+        self.line = Line(points=[0, 0, 0, 0], width=1.5)
+        self.group.add(self.color)
+        self.group.add(self.line)
+
+    def update(self, tracer):
+        alpha = tracer.lifetime / TRACER_LIFETIME
+        self.color.rgba = (tracer.color[0], tracer.color[1], tracer.color[2], alpha)
+        self.line.points = [tracer.x, tracer.y + Y_OFFSET, tracer.end_x, tracer.end_y + Y_OFFSET]
+
+
+class TowerSprite:
+    """Tower with shadow, two-tone body and level stars"""
+
+    def __init__(self, tower, shadow=True):
+        size = TOWER_SIZE
+        color = tower.stats.color
+        darker_color = tuple(c * 0.7 for c in color[:3]) + (1,)
+
+        self.group = InstructionGroup()
+        self.shadow = Ellipse(size=(size, size)) if shadow else None
+        self.base = Ellipse(size=(size, size))
+        self.top = Ellipse(size=(size - 6, size - 6))
+        self.stars = InstructionGroup()
+        self.level = None
+
+        if shadow:
+            self.group.add(Color(0, 0, 0, 0.3))
+            self.group.add(self.shadow)
+        self.group.add(Color(*darker_color))
+        self.group.add(self.base)
+        self.group.add(Color(*color))
+        self.group.add(self.top)
+        self.group.add(self.stars)
+
+    def update(self, tower):
+        size = TOWER_SIZE
+        x = tower.x - size / 2
+        y = tower.y - size / 2 + Y_OFFSET
+        if self.shadow is not None:
+            self.shadow.pos = (x + 2, y - 2)
+        self.base.pos = (x, y)
+        self.top.pos = (x + 3, y + 3)
+
+        # Stars only change on upgrade
+        if tower.level != self.level:
+            self.level = tower.level
+            self.stars.clear()
+            if tower.level > 1:
+                self.stars.add(Color(1, 1, 0, 1))  # Gold stars
+                star_y = tower.y + size / 2 + 5 + Y_OFFSET
+                for i in range(tower.level - 1):  # Level 2 = 1 star, Level 3 = 2 stars
+                    star_x = tower.x - 10 + (i * 10)
+                    self.stars.add(Ellipse(pos=(star_x - 3, star_y - 3), size=(6, 6)))
+
+
+class EnemySprite:
+    """Enemy with shadow, glow, body and (unless batched) health bar"""
+
+    def __init__(self, enemy, health_bar=True, shadow=True, glow=True):
+        color = enemy.stats.color
+        glow_color = tuple(c * 0.6 for c in color[:3]) + (0.3,)
+
+        self.group = InstructionGroup()
+        self.shadow = Ellipse(size=(32, 32)) if shadow else None
+        self.glow = Ellipse(size=(36, 36)) if glow else None
+        self.body = Ellipse(size=(30, 30))
+        self.bar_border = Rectangle(size=(HEALTH_BAR_WIDTH + 2, HEALTH_BAR_HEIGHT + 2))
+        self.bar_background = Rectangle(size=(HEALTH_BAR_WIDTH, HEALTH_BAR_HEIGHT))
+        self.bar_color = Color(0.2, 1, 0.2, 1)
+        self.bar = Rectangle(size=(HEALTH_BAR_WIDTH, HEALTH_BAR_HEIGHT))
+
+        if shadow:
+            self.group.add(Color(0, 0, 0, 0.4))
+            self.group.add(self.shadow)
+        if glow:
+            self.group.add(Color(*glow_color))
+            self.group.add(self.glow)
+        self.group.add(Color(*color))
+        self.group.add(self.body)
+
+        self.health_bar = health_bar
+        if not health_bar:
+            return
+        self.group.add(Color(0.1, 0.1, 0.1, 0.8))
+        self.group.add(self.bar_border)
+        self.group.add(Color(0.2, 0.05, 0.05, 1))
+        self.group.add(self.bar_background)
+        self.group.add(self.bar_color)
+        self.group.add(self.bar)
+
+    def update(self, enemy, alpha=1.0):
+        x, y = lerp_position(enemy, alpha)
+        y += Y_OFFSET
+        if self.shadow is not None:
+            self.shadow.pos = (x - 16, y - 17)
+        if self.glow is not None:
+            self.glow.pos = (x - 18, y - 18)
+        self.body.pos = (x - 15, y - 15)
+        if not self.health_bar:
+            return
+
+        bar_x = x - HEALTH_BAR_WIDTH / 2
+        bar_y = y + 20
+        self.bar_border.pos = (bar_x - 1, bar_y - 1)
+        self.bar_background.pos = (bar_x, bar_y)
+        self.bar.pos = (bar_x, bar_y)
+
+        health_pct = enemy.get_health_percentage()
+        self.bar.size = (HEALTH_BAR_WIDTH * health_pct, HEALTH_BAR_HEIGHT)
+        if health_pct > 0.6:
+            self.bar_color.rgba = (0.2, 1, 0.2, 1)  # Bright green
+        elif health_pct > 0.3:
+            self.bar_color.rgba = (1, 0.9, 0.2, 1)  # Bright yellow
+        else:
+            self.bar_color.rgba = (1, 0.2, 0.2, 1)  # Bright red
+
+
+class ProjectileSprite:
+    """Projectile with a layered glow"""
+
+    # (radius, rgba) from outer glow to white-hot center
+    LAYERS = (
+        (12, (1, 0.9, 0.3, 0.15)),
+        (8, (1, 1, 0.4, 0.4)),
+        (5, (1, 1, 0.8, 1)),
+        (3, (1, 1, 1, 0.8)),
+    )
+    # Leading LAYERS that are glow rather than the shot itself
+    GLOW_LAYERS = 2
+
+    def __init__(self, glow=True):
+        self.group = InstructionGroup()
+        self.discs = []
+        for radius, rgba in self.LAYERS[0 if glow else self.GLOW_LAYERS:]:
+            disc = Ellipse(size=(radius * 2, radius * 2))
+            self.group.add(Color(*rgba))
+            self.group.add(disc)
+            self.discs.append((radius, disc))
+
+    def update(self, projectile, alpha=1.0):
+        x, y = lerp_position(projectile, alpha)
+        y += Y_OFFSET
+        for radius, disc in self.discs:
+            disc.pos = (x - radius, y - radius)
+
+
+class ParticleSprite:
+    """One particle - reused from a pool since particles have no identity"""
+
+    def __init__(self):
+        self.group = InstructionGroup()
+        self.color = Color(1, 1, 1, 1)
+        self.disc = Ellipse()
+        self.group.add(self.color)
+        self.group.add(self.disc)
+
+    def update(self, x, y, r, g, b, alpha, size):
+        self.color.rgba = (r, g, b, alpha)
+        self.disc.pos = (x - size / 2, y - size / 2 + Y_OFFSET)
+        self.disc.size = (size, size)
+
+
+class Renderer:
+    """Keeps the canvas in sync with a Simulation"""
+
+    # Rim segments for batched circles (Kivy's Ellipse default is 180)
+    PARTICLE_SEGMENTS = 8
+    GLOW_SEGMENTS = 16
+
+    def __init__(self, canvas, sim, batched=None):
+        """
+        Build the layers on a canvas
+
+        Args:
+            canvas: Kivy canvas to draw into (owned by the renderer)
+            sim: Simulation whose state is drawn
+            batched: Draw particles, projectiles and health bars as Meshes
+                (default: whenever NumPy is available)
+        """
+        self.canvas = canvas
+        self.sim = sim
+        self.frame = 0
+        if batched is None:
+            batched = np is not None and hasattr(sim.particles, 'draw_arrays')
+        self.batched = batched
+        self.quality = QUALITY_LEVELS[0]
+
+        # Layers, in draw order
+        self.static_layer = InstructionGroup()
+        self.coverage_layer = InstructionGroup()
+        self.hover_layer = InstructionGroup()
+        self.flash_layer = InstructionGroup()
+        self.tower_layer = InstructionGroup()
+        self.range_layer = InstructionGroup()
+        self.enemy_layer = InstructionGroup()
+        self.health_bar_layer = InstructionGroup()
+        self.projectile_layer = InstructionGroup()
+        self.tracer_layer = InstructionGroup()
+        self.particle_layer = InstructionGroup()
+
+        canvas.clear()
+        for layer in (self.static_layer, self.coverage_layer, self.hover_layer, self.flash_layer, self.tower_layer,
+                      self.range_layer, self.enemy_layer, self.health_bar_layer,
+                      self.projectile_layer, self.tracer_layer, self.particle_layer):
+            canvas.add(layer)
+
+        if self.batched:
+            self.health_bar_mesh = MeshLayer(QUAD)
+            self.glow_kind = circle_kind(self.GLOW_SEGMENTS)
+            self.projectile_mesh = MeshLayer(self.glow_kind)
+            self.particle_kind = circle_kind(self.PARTICLE_SEGMENTS)
+            self.particle_mesh = MeshLayer(self.particle_kind)
+            self.health_bar_layer.add(self.health_bar_mesh.group)
+            self.projectile_layer.add(self.projectile_mesh.group)
+            self.particle_layer.add(self.particle_mesh.group)
+
+            # Per-projectile glow rings, outer to inner
+            self.glow_radii = np.array([radius for radius, _ in ProjectileSprite.LAYERS], dtype=np.float64)
+            self.glow_colors = np.array([rgba for _, rgba in ProjectileSprite.LAYERS], dtype=np.float32)
+
+        # entity -> sprite, per layer
+        self.flash_sprites = {}
+        self.tower_sprites = {}
+        self.enemy_sprites = {}
+        self.projectile_sprites = {}
+        self.tracer_sprites = {}
+        self.particle_sprites = []  # Pool, first N are in the layer
+        self.particles_shown = 0
+
+        # Hover highlight and range circle are single reusable instructions
+        self.hover_glow_color = Color(0.3, 0.6, 1.0, 0)
+        self.hover_glow = Rectangle(size=(GRID_SIZE + 4, GRID_SIZE + 4))
+        self.hover_color = Color(0.3, 0.6, 1.0, 0)
+        self.hover = Rectangle(size=(GRID_SIZE, GRID_SIZE))
+        for instruction in (self.hover_glow_color, self.hover_glow, self.hover_color, self.hover):
+            self.hover_layer.add(instruction)
+
+        self.range_color = Color(1, 1, 1, 0)
+        self.range_circle = Ellipse()
+        self.range_layer.add(self.range_color)
+        self.range_layer.add(self.range_circle)
+
+        self.static_key = None  # (width, height, map) the static layer was built for
+        self.coverage_key = None  # (range, coverage version) currently drawn
+
+    def set_quality(self, quality):
+        """
+        Switch to another level of detail
+
+        Sprites built with the old glow/shadow settings are dropped and
+        rebuilt on the next draw; the effect only happens on a level change.
+
+        Args:
+            quality: QualityLevel (see quality.py)
+        """
+        old = self.quality
+        self.quality = quality
+        if (old.glows, old.shadows) == (quality.glows, quality.shadows):
+            return
+        for layer, sprites in ((self.tower_layer, self.tower_sprites),
+                               (self.enemy_layer, self.enemy_sprites),
+                               (self.projectile_layer, self.projectile_sprites)):
+            for sprite in sprites.values():
+                layer.remove(sprite.group)
+            sprites.clear()
+
+    def build_static(self, width, height):
+        """(Re)build background, grid, obstacles and path - only when the size or map changes"""
+        sim = self.sim
+        layer = self.static_layer
+        layer.clear()
+
+        # Better background - dark blue instead of black
+        layer.add(Color(0.08, 0.08, 0.15, 1))
+        layer.add(Rectangle(pos=(0, Y_OFFSET), size=(width - SIDE_PANEL_WIDTH, height - Y_OFFSET)))
+
+        # Subtler grid
+        layer.add(Color(0.15, 0.15, 0.25, 0.3))
+        for x in range(sim.cols + 1):
+            layer.add(Line(points=[x * GRID_SIZE, Y_OFFSET, x * GRID_SIZE, sim.grid_pixel_height + Y_OFFSET], width=0.5))
+        for y in range(sim.rows + 1):
+            layer.add(Line(points=[0, y * GRID_SIZE + Y_OFFSET, sim.grid_pixel_width, y * GRID_SIZE + Y_OFFSET], width=0.5))
+
+        # Obstacles as raised rocky tiles
+        if sim.map.obstacles:
+            layer.add(Color(0.25, 0.22, 0.2, 1))
+            for grid_x, grid_y in sim.map.obstacles:
+                layer.add(Rectangle(pos=(grid_x * GRID_SIZE + 3, grid_y * GRID_SIZE + Y_OFFSET + 3),
+                                    size=(GRID_SIZE - 6, GRID_SIZE - 6)))
+
+        # Path with a dark border for depth, then the lighter main path
+        for rgba, line_width in (((0.4, 0.35, 0.25, 1), 36), ((0.65, 0.55, 0.4, 1), 30)):
+            layer.add(Color(*rgba))
+            for (x1, y1), (x2, y2) in zip(sim.path_points, sim.path_points[1:]):
+                layer.add(Line(points=[x1, y1 + Y_OFFSET, x2, y2 + Y_OFFSET], width=line_width, cap='round'))
+
+        self.static_key = (width, height, sim.map)
+
+    def build_coverage(self, tower_range):
+        """
+        Heatmap of path length in range of each free cell
+
+        Cells that reach the most path are red, cells that reach none are
+        left clear. Rebuilt only when the range or the coverage map changes.
+        """
+        coverage = self.sim.coverage
+        key = (tower_range, coverage.version)
+        if key == self.coverage_key:
+            return
+        layer = self.coverage_layer
+        layer.clear()
+        self.coverage_key = key
+        if tower_range is None:
+            return
+
+        longest = coverage.max_length(tower_range)
+        if longest <= 0:
+            return
+        for (grid_x, grid_y), reach in coverage.table(tower_range).items():
+            if reach.length <= 0:
+                continue
+            heat = reach.length / longest
+            layer.add(Color(heat, 0.3 * (1 - heat), 1 - heat, 0.15 + 0.3 * heat))
+            layer.add(Rectangle(pos=(grid_x * GRID_SIZE + 1, grid_y * GRID_SIZE + Y_OFFSET + 1),
+                                size=(GRID_SIZE - 2, GRID_SIZE - 2)))
+
+    def sync(self, layer, sprites, entities, make_sprite, *update_args):
+        """
+        Update one sprite per entity, adding/removing sprites as needed
+
+        Args:
+            layer: InstructionGroup holding the sprites
+            sprites: Dict of entity -> sprite for this layer
+            entities: Entities currently alive
+            make_sprite: Callable(entity) creating a new sprite
+            update_args: Extra arguments for sprite.update
+        """
+        frame = self.frame
+        for entity in entities:
+            sprite = sprites.get(entity)
+            if sprite is None:
+                sprite = sprites[entity] = make_sprite(entity)
+                layer.add(sprite.group)
+            sprite.update(entity, *update_args)
+            sprite.frame = frame
+
+        if len(sprites) != len(entities):
+            for entity, sprite in list(sprites.items()):
+                if sprite.frame != frame:
+                    layer.remove(sprite.group)
+                    del sprites[entity]
+
+    def sync_particles(self):
+        """Reuse pooled particle sprites; only the surplus is added/removed"""
+        pool = self.particle_sprites
+        shown = 0
+        for item in self.sim.particles.draw_items():
+            if shown == len(pool):
+                pool.append(ParticleSprite())
+            sprite = pool[shown]
+            if shown >= self.particles_shown:
+                self.particle_layer.add(sprite.group)
+            sprite.update(*item)
+            shown += 1
+
+        for sprite in pool[shown:self.particles_shown]:
+            self.particle_layer.remove(sprite.group)
+        self.particles_shown = shown
+
+    def draw_health_bars(self, alpha=1.0):
+        """All health bars as quads: border, background, then fill"""
+        enemies = self.sim.enemies
+        n = len(enemies)
+        store = self.sim.enemy_store
+        if store is not None:
+            ex = store.prev_x[:n] + (store.x[:n] - store.prev_x[:n]) * alpha
+            ey = store.prev_y[:n] + (store.y[:n] - store.prev_y[:n]) * alpha
+            health = store.health[:n]
+            max_health = store.max_health[:n]
+        else:
+            positions = np.fromiter((c for e in enemies for c in lerp_position(e, alpha)),
+                                    dtype=np.float64, count=2 * n).reshape(n, 2)
+            ex = positions[:, 0]
+            ey = positions[:, 1]
+            health = np.fromiter((e.health for e in enemies), dtype=np.float64, count=n)
+            max_health = np.fromiter((e.max_health for e in enemies), dtype=np.float64, count=n)
+        health_pct = np.divide(health, max_health, out=np.zeros(n), where=max_health > 0)
+
+        bar_x = ex - HEALTH_BAR_WIDTH / 2
+        bar_y = ey + Y_OFFSET + 20
+        x = np.stack([bar_x - 1, bar_x, bar_x], axis=1).ravel()
+        y = np.stack([bar_y - 1, bar_y, bar_y], axis=1).ravel()
+        width = np.stack([np.full(n, HEALTH_BAR_WIDTH + 2.0), np.full(n, float(HEALTH_BAR_WIDTH)),
+                          HEALTH_BAR_WIDTH * health_pct], axis=1).ravel()
+        height = np.tile([HEALTH_BAR_HEIGHT + 2.0, HEALTH_BAR_HEIGHT, HEALTH_BAR_HEIGHT], n)
+
+        # Bright green / yellow / red by remaining health
+        fill_colors = np.array([(0.2, 1, 0.2, 1), (1, 0.9, 0.2, 1), (1, 0.2, 0.2, 1)], dtype=np.float32)
+        fill = fill_colors[np.where(health_pct > 0.6, 0, np.where(health_pct > 0.3, 1, 2))]
+        rgba = np.empty((n, 3, 4), dtype=np.float32)
+        rgba[:, 0] = (0.1, 0.1, 0.1, 0.8)
+        rgba[:, 1] = (0.2, 0.05, 0.05, 1)
+        rgba[:, 2] = fill
+        self.health_bar_mesh.update(quad_vertices(x, y, width, height, rgba.reshape(-1, 4)))
+
+    def draw_projectiles(self, alpha=1.0):
+        """All projectile rings (glow first, if drawn), each projectile's kept together"""
+        projectiles = self.sim.projectiles
+        n = len(projectiles)
+        first = 0 if self.quality.glows else ProjectileSprite.GLOW_LAYERS
+        radii = self.glow_radii[first:]
+        colors = self.glow_colors[first:]
+        layers = len(radii)
+        positions = np.fromiter((c for p in projectiles for c in lerp_position(p, alpha)),
+                                dtype=np.float64, count=2 * n).reshape(n, 2)
+        px = positions[:, 0]
+        py = positions[:, 1] + Y_OFFSET
+        vertices = circle_vertices(self.glow_kind, np.repeat(px, layers), np.repeat(py, layers),
+                                   np.tile(radii, n), np.tile(colors, (n, 1)))
+        self.projectile_mesh.update(vertices)
+
+    def draw_particles(self):
+        """All particles in one pass over the particle arrays"""
+        x, y, rgb, alpha, size = self.sim.particles.draw_arrays()
+        rgba = np.column_stack([rgb, alpha]) if len(x) else np.zeros((0, 4))
+        self.particle_mesh.update(circle_vertices(self.particle_kind, x, y + Y_OFFSET, size / 2, rgba))
+
+    def draw(self, width, height, hovered_cell=None, selected_tower=None, alpha=1.0, coverage_range=None):
+        """
+        Bring the canvas up to date with the simulation
+
+        Args:
+            width, height: Size of the game widget
+            hovered_cell: (grid_x, grid_y) under the mouse, or None
+            selected_tower: Tower whose range should be shown, or None
+            alpha: Interpolation between the last two simulation steps
+            coverage_range: Tower range to show the placement heatmap for,
+                or None to hide it
+        """
+        sim = self.sim
+        self.frame += 1
+
+        if self.static_key != (width, height, sim.map):
+            self.build_static(width, height)
+        self.build_coverage(coverage_range)
+
+        quality = self.quality
+
+        # Hover highlight with glow
+        if hovered_cell and hovered_cell not in sim.blocked_cells:
+            grid_x, grid_y = hovered_cell
+            self.hover_glow.pos = (grid_x * GRID_SIZE - 2, grid_y * GRID_SIZE + Y_OFFSET - 2)
+            self.hover.pos = (grid_x * GRID_SIZE, grid_y * GRID_SIZE + Y_OFFSET)
+            self.hover_glow_color.a = 0.2 if quality.glows else 0
+            self.hover_color.a = 0.4
+        else:
+            self.hover_glow_color.a = 0
+            self.hover_color.a = 0
+
+        self.sync(self.flash_layer, self.flash_sprites, sim.muzzle_flashes, lambda flash: FlashSprite())
+        self.sync(self.tower_layer, self.tower_sprites, sim.towers,
+                  lambda tower: TowerSprite(tower, quality.shadows))
+
+        # Range of the selected tower
+        if selected_tower is not None and quality.range_circles:
+            radius = selected_tower.range
+            self.range_circle.pos = (selected_tower.x - radius, selected_tower.y - radius + Y_OFFSET)
+            self.range_circle.size = (radius * 2, radius * 2)
+            self.range_color.a = 0.15
+        else:
+            self.range_color.a = 0
+
+        if self.batched:
+            self.sync(self.enemy_layer, self.enemy_sprites, sim.enemies,
+                      lambda enemy: EnemySprite(enemy, health_bar=False, shadow=quality.shadows,
+                                                glow=quality.glows), alpha)
+            self.draw_health_bars(alpha)
+            self.draw_projectiles(alpha)
+            self.draw_particles()
+        else:
+            self.sync(self.enemy_layer, self.enemy_sprites, sim.enemies,
+                      lambda enemy: EnemySprite(enemy, shadow=quality.shadows, glow=quality.glows), alpha)
+            self.sync(self.projectile_layer, self.projectile_sprites, sim.projectiles,
+                      lambda projectile: ProjectileSprite(quality.glows), alpha)
+            self.sync_particles()
+        self.sync(self.tracer_layer, self.tracer_sprites, sim.tracers, lambda tracer: TracerSprite())
@@ -0,0 +1,345 @@
+"""
+Save games - Versioned binary snapshots of a running Simulation
+
+A save holds everything that affects the outcome from here on: the game
+counters, the map (by name, checked against its content hash), the wave
+queue, towers, enemies and shots in flight, the RNG state and the input log
+(so a resumed game can still be replayed from tick 0). Visual effects are
+not saved.
+
+Layout (little-endian): a fixed header, then sections in a fixed order.
+Entities are stored column by column as array() buffers, so saving and
+loading thousands of them is a handful of bulk copies rather than one
+struct call per entity. Enemy and tower types are written as a string
+table and referenced by index. Shot and tower targets are indices into
+the enemy list (-1 for none).
+
+Usage:
+    python savegame.py game.sav    # Print a summary of a save file
+"""
+from array import array
+import json
+import os
+import struct
+import sys
+
+from config import GRID_SIZE, SAVE_FILE
+from inputlog import InputLog
+from maps import load_map
+from projectile import projectile_pool
+from simulation import Simulation
+from stats import ENEMY_STATS, TOWER_STATS
+from tower import Tower
+
+MAGIC = b'TDSV'
+SAVE_VERSION = 3
+
+HEADER = struct.Struct('<4sHI')  # magic, version, total size
+# seed, tick, wave, health, currency, last wave bonus, killed, leaked,
+# next enemy id, spawn timer, accumulator, game speed, game over, wave active
+GAME = struct.Struct('<QqiiqqqqqdddBB')
+TOWER = struct.Struct('<BhhBdi')  # type, grid_x, grid_y, level, fire_timer, target
+RNG = struct.Struct('<Hd?')  # state version, gauss_next, has gauss_next
+COUNT = struct.Struct('<I')
+
+# Per-enemy columns, in file order
+ENEMY_FLOATS = ('x', 'y', 'prev_x', 'prev_y', 'distance', 'health', 'max_health', 'speed',
+                'current_speed', 'slow_timer', 'slow_amount', 'regen_rate')
+PROJECTILE_FLOATS = ('x', 'y', 'prev_x', 'prev_y', 'damage', 'speed', 'splash_radius')
+
+# array() writes native byte order; saves are always little-endian
+SWAP_BYTES = sys.byteorder == 'big'
+
+# Enemy flag bits
+ALIVE = 1
+REACHED_END = 2
+
+
+class _Writer:
+    """Appends packed sections to one buffer"""
+
+    def __init__(self):
+        self.parts = []
+
+    def pack(self, fmt, *values):
+        self.parts.append(fmt.pack(*values))
+
+    def column(self, typecode, values):
+        """Length-prefixed array() buffer"""
+        data = array(typecode, values)
+        if SWAP_BYTES:
+            data.byteswap()
+        self.parts.append(COUNT.pack(len(data)))
+        self.parts.append(data.tobytes())
+
+    def blob(self, data):
+        self.parts.append(COUNT.pack(len(data)))
+        self.parts.append(data)
+
+    def strings(self, values):
+        self.blob('\0'.join(values).encode('utf-8'))
+
+
+class _Reader:
+    """Reads sections back in the order they were written"""
+
+    def __init__(self, data, offset):
+        self.data = memoryview(data)
+        self.offset = offset
+
+    def unpack(self, fmt):
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def column(self, typecode):
+        count, = self.unpack(COUNT)
+        column = array(typecode)
+        end = self._end(count * column.itemsize)
+        column.frombytes(self.data[self.offset:end])
+        if SWAP_BYTES:
+            column.byteswap()
+        self.offset = end
+        return column
+
+    def _end(self, size):
+        """Offset after the next `size` bytes, which must all be there"""
+        end = self.offset + size
+        if end > len(self.data):
+            raise ValueError("Save data is corrupt: a section runs past the end")
+        return end
+
+    def blob(self):
+        size, = self.unpack(COUNT)
+        end = self._end(size)
+        data = bytes(self.data[self.offset:end])
+        self.offset = end
+        return data
+
+    def strings(self):
+        data = self.blob()
+        return data.decode('utf-8').split('\0') if data else []
+
+
+def dumps(sim):
+    """
+    Pack a game into bytes
+
+    Args:
+        sim: Simulation to save (between steps)
+
+    Returns:
+        bytes: Save data
+    """
+    out = _Writer()
+    enemies = list(sim.enemies)
+    enemy_slot = {enemy: i for i, enemy in enumerate(enemies)}
+
+    out.pack(GAME, sim.seed, sim.tick, sim.wave, sim.health, sim.currency, sim.last_wave_bonus,
+             sim.enemies_killed, sim.enemies_leaked, sim.next_enemy_uid,
+             sim.spawn_timer, sim.accumulator, sim.game_speed, sim.game_over, sim.wave_active)
+    out.strings([sim.map.name, sim.map.hash])
+
+    enemy_types = list(ENEMY_STATS)
+    tower_types = list(TOWER_STATS)
+    out.strings(enemy_types)
+    out.strings(tower_types)
+    enemy_type_index = {name: i for i, name in enumerate(enemy_types)}
+    tower_type_index = {name: i for i, name in enumerate(tower_types)}
+
+    # Wave queue
+    out.column('B', [enemy_type_index[name] for name in sim.enemies_to_spawn])
+
+    # Towers (few, so one record each)
+    out.pack(COUNT, len(sim.towers))
+    for tower in sim.towers:
+        out.pack(TOWER, tower_type_index[tower.type], tower.grid_x, tower.grid_y, tower.level,
+                 tower.fire_timer, enemy_slot.get(tower.target, -1))
+
+    # Enemies, column by column
+    out.column('B', [enemy_type_index[enemy.type] for enemy in enemies])
+    out.column('Q', [enemy.uid for enemy in enemies])
+    for name in ENEMY_FLOATS:
+        out.column('d', [getattr(enemy, name) for enemy in enemies])
+    out.column('i', [enemy.path_index for enemy in enemies])
+    out.column('B', [(ALIVE if enemy.alive else 0) | (REACHED_END if enemy.reached_end else 0)
+                     for enemy in enemies])
+
+    # Shots in flight; ones whose target already left the game are
+    # dropped, they would be discarded on the next step without effect
+    projectiles = [p for p in sim.projectiles if p.active and p.target in enemy_slot]
+    out.column('B', [tower_type_index[p.tower_type] for p in projectiles])
+    for name in PROJECTILE_FLOATS:
+        out.column('d', [getattr(p, name) for p in projectiles])
+    out.column('i', [enemy_slot[p.target] for p in projectiles])
+
+    # RNG and input log
+    version, state, gauss_next = sim.rng.getstate()
+    out.pack(RNG, version, gauss_next or 0.0, gauss_next is not None)
+    out.column('I', state)
+    out.blob(json.dumps(sim.input_log.to_dict(), separators=(',', ':')).encode('utf-8'))
+
+    body = b''.join(out.parts)
+    return HEADER.pack(MAGIC, SAVE_VERSION, HEADER.size + len(body)) + body
+
+
+def loads(data, **sim_options):
+    """
+    Rebuild a game from dumps() output
+
+    Args:
+        data: Save data
+        sim_options: Simulation keyword arguments (visual_effects,
+            vectorized_enemies, batch_targeting); the seed comes from the save
+
+    Returns:
+        Simulation: The restored game, ready to step
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Save data is truncated")
+    magic, version, size = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a save file")
+    if version != SAVE_VERSION:
+        raise ValueError(f"Unsupported save version: {version}")
+    if size != len(data):
+        raise ValueError(f"Save data is truncated ({len(data)} of {size} bytes)")
+
+    try:
+        return _restore(_Reader(data, HEADER.size), sim_options)
+    except (struct.error, IndexError, KeyError, TypeError) as e:  # Sections don't add up
+        raise ValueError(f"Save data is corrupt: {e}") from None
+
+
+def _restore(read, sim_options):
+    """Build the Simulation from the sections after the header (see loads)"""
+    (seed, tick, wave, health, currency, last_wave_bonus, enemies_killed, enemies_leaked, next_enemy_uid,
+     spawn_timer, accumulator, game_speed, game_over, wave_active) = read.unpack(GAME)
+
+    # The map file must be the one the game was saved on, or cells and
+    # distances would no longer line up
+    map_name, map_hash = read.strings()
+    try:
+        game_map = load_map(map_name)
+    except FileNotFoundError:
+        raise ValueError(f"Save is on a map that no longer exists: {map_name}") from None
+    if game_map.hash != map_hash:
+        raise ValueError(f"Map {map_name} has changed since the game was saved")
+
+    sim = Simulation(seed=seed, game_map=game_map, **sim_options)
+    sim.tick = tick
+    sim.wave = wave
+    sim.health = health
+    sim.currency = currency
+    sim.last_wave_bonus = last_wave_bonus
+    sim.enemies_killed = enemies_killed
+    sim.enemies_leaked = enemies_leaked
+    sim.spawn_timer = spawn_timer
+    sim.accumulator = accumulator
+    sim.game_speed = game_speed
+    sim.game_over = bool(game_over)
+    sim.wave_active = bool(wave_active)
+
+    enemy_types = read.strings()
+    tower_types = read.strings()
+    for name in enemy_types:
+        if name not in ENEMY_STATS:
+            raise ValueError(f"Save uses unknown enemy type: {name}")
+    for name in tower_types:
+        if name not in TOWER_STATS:
+            raise ValueError(f"Save uses unknown tower type: {name}")
+
+    sim.enemies_to_spawn = [enemy_types[i] for i in read.column('B')]
+
+    tower_records = [read.unpack(TOWER) for _ in range(read.unpack(COUNT)[0])]
+
+    # Enemies: create each one, then overwrite its state from the columns
+    types = read.column('B')
+    uids = read.column('Q')
+    floats = [(name, read.column('d')) for name in ENEMY_FLOATS]
+    path_index = read.column('i')
+    flags = read.column('B')
+    enemies = []
+    for i, type_index in enumerate(types):
+        enemy = sim.spawn_enemy(enemy_types[type_index], wave)
+        enemy.uid = uids[i]
+        for name, column in floats:
+            setattr(enemy, name, column[i])
+        enemy.path_index = path_index[i]
+        enemy.alive = bool(flags[i] & ALIVE)
+        enemy.reached_end = bool(flags[i] & REACHED_END)
+        sim.enemy_index.move(enemy)
+        enemies.append(enemy)
+    sim.next_enemy_uid = next_enemy_uid
+
+    for type_index, grid_x, grid_y, level, fire_timer, target in tower_records:
+        tower = Tower(tower_types[type_index], grid_x, grid_y, GRID_SIZE)
+        if not 1 <= level <= tower.stats.max_level:
+            raise ValueError(f"Save data is corrupt: tower level {level}")
+        while tower.level < level:
+            tower.upgrade()
+        tower.reach = sim.coverage.reach(grid_x, grid_y, tower.range).intervals
+        tower.fire_timer = fire_timer
+        tower.target = enemies[target] if target >= 0 else None
+        sim.towers.append(tower)
+
+    # Shots in flight
+    shot_types = read.column('B')
+    shot_floats = [read.column('d') for _ in PROJECTILE_FLOATS]
+    shot_targets = read.column('i')
+    for i, type_index in enumerate(shot_types):
+        x, y, prev_x, prev_y, damage, speed, splash_radius = (column[i] for column in shot_floats)
+        projectile = projectile_pool.acquire(x, y, enemies[shot_targets[i]], damage, speed,
+                                             tower_types[type_index], splash_radius)
+        projectile.prev_x = prev_x
+        projectile.prev_y = prev_y
+        sim.projectiles.append(projectile)
+
+    rng_version, gauss_next, has_gauss = read.unpack(RNG)
+    sim.rng.setstate((rng_version, tuple(read.column('I')), gauss_next if has_gauss else None))
+    sim.input_log = InputLog.from_dict(json.loads(read.blob().decode('utf-8')))
+    return sim
+
+
+def save_game(sim, filename=SAVE_FILE):
+    """
+    Write a save file, replacing any previous one atomically
+
+    Returns:
+        str: The filename written
+    """
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp = filename + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(dumps(sim))
+    os.replace(temp, filename)
+    return filename
+
+
+def load_game(filename=SAVE_FILE, **sim_options):
+    """Read a save file (see loads)"""
+    with open(filename, 'rb') as f:
+        return loads(f.read(), **sim_options)
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 1:
+        print(__doc__.strip().splitlines()[-1].strip())
+        return 2
+    try:
+        sim = load_game(args[0])
+    except (OSError, ValueError) as e:
+        print(f"{args[0]}: cannot read save: {e}", file=sys.stderr)
+        return 1
+    print(f"{args[0]}: {os.path.getsize(args[0]):,} bytes, seed {sim.seed}, map {sim.map.name}")
+    print(f"  tick {sim.tick}, wave {sim.wave}, health {sim.health}, gold {sim.currency}")
+    print(f"  {len(sim.towers)} towers, {len(sim.enemies)} enemies, {len(sim.projectiles)} shots, "
+          f"{len(sim.enemies_to_spawn)} queued, {len(sim.input_log)} inputs")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
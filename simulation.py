@@ -0,0 +1,659 @@
+"""
+Simulation - Headless game rules, independent of Kivy
+
+Everything that decides the outcome of a game (waves, spawning, movement,
+targeting, damage, economy) lives here so it can run without a window.
+main.py only draws the state and forwards player input.
+"""
+import math
+import random
+
+from config import *
+from enemy import Enemy
+from tower import Tower
+from entities import EntityList
+from events import EventBus, Hit, Kill, Leak, Shot
+from spatial import SpatialHash
+from enemy_store import EnemyStore
+from targeting import retarget_towers
+from particles import flash_pool, make_particle_system, tracer_pool
+from projectile import projectile_pool
+from stats import TOWER_STATS
+from inputlog import InputLog
+from path_coverage import CoverageMap
+from maps import load_map
+from gamelog import get_logger
+
+wave_log = get_logger('wave')
+spawn_log = get_logger('spawn')
+combat_log = get_logger('combat')
+
+# Phases of step(), in order, as reported to a FrameProfiler
+STEP_PHASES = ('spawn', 'enemies', 'towers', 'projectiles', 'effects')
+
+
+class Simulation:
+    """Owns the full game state and advances it one step at a time"""
+
+    def __init__(self, visual_effects=True, vectorized_enemies=False, batch_targeting=False, seed=None,
+                 game_map=None):
+        """
+        Initialize a new game
+
+        Args:
+            visual_effects: Create particles, muzzle flashes and tracers. Headless runs
+                can turn this off since effects never change the outcome.
+            vectorized_enemies: Keep enemies in a NumPy EnemyStore and move,
+                target and splash them from its arrays (requires NumPy).
+                Only faster with hundreds of enemies on the field.
+            batch_targeting: Retarget all towers in one NumPy distance-matrix
+                pass instead of per-tower searches (requires NumPy)
+            seed: Seed for all of the game's randomness (None = pick one).
+                Saved in the input log so the game can be replayed.
+            game_map: GameMap or map name to play on (default: DEFAULT_MAP)
+        """
+        self.batch_targeting = batch_targeting
+
+        # All randomness comes from this RNG (never the global random module)
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+
+        # Every player action, stamped with the tick it happened on
+        self.input_log = InputLog(self.seed, {'tick_rate': SIM_TICK_RATE})
+
+        # Game state
+        self.health = STARTING_HEALTH
+        self.currency = STARTING_CURRENCY
+        self.wave = 0
+        self.game_over = False
+
+        # Game objects (dead entities are compacted out once per step)
+        self.enemies = EntityList()
+        self.enemy_index = SpatialHash(GRID_SIZE)  # Enemies bucketed by grid cell
+        self.next_enemy_uid = 1  # Ids are never reused within a game
+        self.towers = []
+        self.projectiles = EntityList()
+        self.particles = make_particle_system(seed=self.rng.randrange(2 ** 32))  # For visual effects
+        self.muzzle_flashes = EntityList()  # Tower shooting effects
+        self.tracers = EntityList()  # Hitscan shot lines
+        self.particle_scale = 1.0  # Fraction of the full particle count per effect (see quality.py)
+
+        # Shots, hits, kills and leaks, handed to subscribers once per step
+        self.events = EventBus()
+        self.visual_effects = False
+        self.set_visual_effects(visual_effects)
+
+        # Wave management
+        self.spawn_timer = 0
+        self.enemies_to_spawn = []
+        self.wave_active = False
+        self.last_wave_bonus = 0
+
+        # Running totals for stats and balance reports
+        self.enemies_killed = 0
+        self.enemies_leaked = 0
+
+        # Number of steps taken so far
+        self.tick = 0
+
+        # Grid, path and coverage of the map (see set_map)
+        self.coverage = None
+        self.vectorized_enemies = vectorized_enemies
+        self.set_map(game_map if game_map is not None else DEFAULT_MAP)
+
+        # Fixed timestep: real time not yet simulated, in game seconds
+        self.tick_dt = 1.0 / SIM_TICK_RATE
+        self.accumulator = 0.0
+        self.game_speed = 1.0  # 1x, 2x, or 3x
+
+        # Optional FrameProfiler timing each of STEP_PHASES
+        self.profiler = None
+
+        # Optional TelemetryRecorder fed at the end of every step (see
+        # TelemetryRecorder.attach)
+        self.telemetry = None
+
+    def set_map(self, game_map):
+        """
+        Switch to another map (only before the game has started)
+
+        The geometry comes precompiled from maps.py, so this is cheap.
+
+        Args:
+            game_map: GameMap, or a map name for load_map()
+
+        Raises:
+            ValueError: If towers or enemies are already on the field
+        """
+        # Ticks before the first wave change nothing, so they don't count
+        if self.wave or self.towers or self.enemies:
+            raise ValueError("The map can only be changed before the game starts")
+        if isinstance(game_map, str):
+            game_map = load_map(game_map)
+
+        self.map = game_map
+        self.cols = game_map.cols
+        self.rows = game_map.rows
+        self.grid_pixel_width = game_map.pixel_width
+        self.grid_pixel_height = game_map.pixel_height
+        self.path_points = list(game_map.points)
+        self.path_cells = game_map.path_cells
+        self.blocked_cells = game_map.blocked_cells  # Path and obstacles
+        self.path = game_map.path  # Arc-length lookup
+        self.input_log.options['map'] = game_map.name
+        self.refresh_coverage()
+
+        # Optional struct-of-arrays enemy backend
+        self.enemy_store = EnemyStore(self.path) if self.vectorized_enemies else None
+
+    # ------------------------------------------------------------------
+    # Player actions
+    # ------------------------------------------------------------------
+
+    def get_tower_at(self, grid_x, grid_y):
+        """Returns the tower on a grid cell, or None"""
+        for tower in self.towers:
+            if tower.grid_x == grid_x and tower.grid_y == grid_y:
+                return tower
+        return None
+
+    def can_place_tower(self, tower_type, grid_x, grid_y):
+        """
+        Check whether a tower could be placed on a cell
+
+        Returns:
+            str or None: Reason placement is refused, or None if allowed
+        """
+        if not self.map.in_bounds(grid_x, grid_y):
+            return 'out of bounds'
+        if self.map.is_blocked(grid_x, grid_y):
+            return 'cell is on path' if (grid_x, grid_y) in self.path_cells else 'cell is blocked'
+        if self.get_tower_at(grid_x, grid_y):
+            return 'tower already exists'
+        if self.currency < TOWER_STATS[tower_type].cost:
+            return 'cannot afford'
+        return None
+
+    def place_tower(self, tower_type, grid_x, grid_y):
+        """
+        Buy and place a tower
+
+        Returns:
+            Tower or None: The new tower, or None if placement was refused
+        """
+        if self.can_place_tower(tower_type, grid_x, grid_y):
+            return None
+
+        tower = Tower(tower_type, grid_x, grid_y, GRID_SIZE)
+        tower.reach = self.coverage.reach(grid_x, grid_y, tower.range).intervals
+        self.towers.append(tower)
+        self.currency -= TOWER_STATS[tower_type].cost
+        self.input_log.record(self.tick, 'place', tower_type, grid_x, grid_y)
+        return tower
+
+    def refresh_coverage(self):
+        """
+        Recompute every tower's reach after the map or a tower's range changes
+
+        Tables are cached per range value, so only a new path (which comes
+        with a new map) drops them. Towers copy their range when placed, so
+        a later compile_stats() leaves placed towers and their reach alone.
+        """
+        if self.coverage is None:
+            self.coverage = CoverageMap(self.path, GRID_SIZE, self.cols, self.rows, self.blocked_cells)
+        elif self.coverage.path is not self.path:
+            self.coverage.invalidate(self.path, self.blocked_cells, (self.cols, self.rows))
+        for tower in self.towers:
+            tower.reach = self.coverage.reach(tower.grid_x, tower.grid_y, tower.range).intervals
+
+    def sell_tower(self, tower):
+        """
+        Sell a tower for 70% of everything invested in it
+
+        Returns:
+            int: Refund amount
+        """
+        refund = int(tower.get_total_cost() * 0.7)
+        self.currency += refund
+        self.towers.remove(tower)
+        self.input_log.record(self.tick, 'sell', tower.grid_x, tower.grid_y)
+        return refund
+
+    def upgrade_tower(self, tower):
+        """
+        Upgrade a tower if it is not maxed and the player can afford it
+
+        Returns:
+            int: Amount spent (0 if nothing happened)
+        """
+        cost = tower.get_upgrade_cost()
+        if cost > 0 and self.currency >= cost:
+            spent = tower.upgrade()
+            self.currency -= spent
+            self.input_log.record(self.tick, 'upgrade', tower.grid_x, tower.grid_y)
+            return spent
+        return 0
+
+    def start_wave(self):
+        """
+        Start the next wave
+
+        Returns:
+            bool: True if a wave was started
+        """
+        wave_log.debug("Start wave called. Active: %s, Game Over: %s", self.wave_active, self.game_over)
+        if self.wave_active or self.game_over:
+            return False
+
+        self.wave += 1
+        self.wave_active = True
+        self.spawn_timer = 0
+        self.input_log.record(self.tick, 'start_wave')
+
+        wave_log.info("Starting wave %s", self.wave)
+
+        # Generate enemies for this wave
+        self.enemies_to_spawn = self.generate_wave_enemies()
+        wave_log.debug("Generated %s enemies for wave", len(self.enemies_to_spawn))
+        return True
+
+    def set_game_speed(self, speed):
+        """Change how many ticks run per real second"""
+        if speed != self.game_speed:
+            self.game_speed = speed
+            self.input_log.record(self.tick, 'speed', speed)
+
+    def apply_input(self, action, *args):
+        """
+        Perform one recorded player action
+
+        Args:
+            action: 'place', 'sell', 'upgrade', 'start_wave' or 'speed'
+            args: Arguments as stored in the input log
+
+        Returns:
+            bool: True if the action changed the game
+        """
+        if action == 'place':
+            return self.place_tower(*args) is not None
+        if action == 'sell' or action == 'upgrade':
+            tower = self.get_tower_at(*args)
+            if tower is None:
+                return False
+            if action == 'sell':
+                self.sell_tower(tower)
+                return True
+            return self.upgrade_tower(tower) > 0
+        if action == 'start_wave':
+            return self.start_wave()
+        if action == 'speed':
+            self.set_game_speed(*args)
+            return True
+        raise ValueError(f"Unknown input action: {action}")
+
+    def generate_wave_enemies(self):
+        """Generate list of enemies for current wave"""
+        enemies = []
+
+        # Boss wave every BOSS_WAVE_INTERVAL waves
+        if self.wave % BOSS_WAVE_INTERVAL == 0:
+            enemies.append('boss')
+            return enemies
+
+        # Regular waves - more gradual difficulty scaling
+        # Start with fewer enemies, scale slower
+        if self.wave == 1:
+            base_count = 3  # Very easy first wave
+        elif self.wave <= 3:
+            base_count = 4 + self.wave  # Waves 2-3: 6-7 enemies
+        elif self.wave <= 5:
+            base_count = 6 + self.wave  # Waves 4-5: 10-11 enemies
+        else:
+            base_count = 8 + (self.wave - 5) * 2  # After wave 5: +2 per wave
+
+        wave_log.debug("Wave %s: Spawning %s enemies", self.wave, base_count)
+
+        # Mix of enemy types based on wave
+        for i in range(base_count):
+            if self.wave <= 2:
+                # Only basic enemies in first 2 waves
+                enemies.append('basic')
+            elif self.wave <= 5:
+                # Introduce fast enemies
+                enemies.append('basic' if i % 2 == 0 else 'fast')
+            elif self.wave <= 10:
+                # Add tank enemies
+                enemy_type = ['basic', 'basic', 'fast', 'tank'][i % 4]
+                enemies.append(enemy_type)
+            elif self.wave <= 15:
+                # Add regen enemies
+                enemy_type = ['basic', 'fast', 'tank', 'regen'][i % 4]
+                enemies.append(enemy_type)
+            else:
+                # Full variety
+                enemy_type = ['basic', 'fast', 'fast', 'tank', 'regen'][i % 5]
+                enemies.append(enemy_type)
+
+        return enemies
+
+    # ------------------------------------------------------------------
+    # Simulation step
+    # ------------------------------------------------------------------
+
+    def advance(self, frame_dt, speed=None):
+        """
+        Run as many fixed-size steps as the elapsed time calls for
+
+        Game speed changes how many ticks run, never their size, so the
+        outcome is the same at 1x, 2x or 3x and at any frame rate. If the
+        simulation can't keep up, at most MAX_SUBSTEPS run per frame and
+        the backlog is dropped instead of snowballing.
+
+        Args:
+            frame_dt: Real seconds since the last frame
+            speed: Game speed multiplier (defaults to self.game_speed)
+
+        Returns:
+            int: Number of steps taken
+        """
+        if speed is None:
+            speed = self.game_speed
+        self.accumulator += min(frame_dt, MAX_FRAME_TIME) * speed
+
+        steps = 0
+        while self.accumulator >= self.tick_dt and steps < MAX_SUBSTEPS:
+            self.step(self.tick_dt)
+            self.accumulator -= self.tick_dt
+            steps += 1
+
+        if steps == MAX_SUBSTEPS and self.accumulator >= self.tick_dt:
+            # Spiral-of-death guard: keep only the partial tick
+            self.accumulator %= self.tick_dt
+        return steps
+
+    def interpolation_alpha(self):
+        """
+        How far real time is between the last two steps (0 to 1)
+
+        Renderers draw prev_x + (x - prev_x) * alpha for smooth motion.
+        """
+        return min(1.0, self.accumulator / self.tick_dt)
+
+    def step(self, dt):
+        """
+        Advance the game by dt seconds (game speed already applied)
+
+        Args:
+            dt: Delta time in seconds
+        """
+        if self.game_over:
+            return
+
+        self.tick += 1
+        profiler = self.profiler
+        events = self.events
+        if profiler is not None:
+            profiler.resume()
+
+        # Spawn enemies
+        if self.wave_active and self.enemies_to_spawn:
+            self.spawn_timer += dt
+            if self.spawn_timer >= WAVE_SPAWN_INTERVAL:
+                enemy_type = self.enemies_to_spawn.pop(0)
+                enemy = self.spawn_enemy(enemy_type)
+                self.spawn_timer = 0
+                if spawn_log.debug_on:
+                    spawn_log.debug("Spawned %s at (%s, %s), path has %s points",
+                                    enemy_type, enemy.x, enemy.y, len(self.path_points))
+
+        # Check if wave is complete
+        if self.wave_active and not self.enemies_to_spawn and not self.enemies:
+            self.wave_active = False
+            # Bonus: base amount + a little more per wave completed
+            wave_bonus = WAVE_BONUS_BASE + self.wave * WAVE_BONUS_PER_WAVE
+            self.currency += wave_bonus
+            self.last_wave_bonus = wave_bonus
+            wave_log.info("Wave %s complete! Bonus: $%s", self.wave, wave_bonus)
+
+        if profiler is not None:
+            profiler.lap('spawn')
+
+        # Update enemies
+        store = self.enemy_store
+        if store is not None:
+            # Move every enemy at once (EnemyView.update is a no-op), then
+            # visit only those that left, died or crossed into another cell
+            store.step(dt)
+            views = store.views
+            for slot in store.changed_slots(self.enemy_index.cell_size):
+                enemy = views[slot]
+                if enemy.reached_end:
+                    self.leak_enemy(enemy)
+                elif not enemy.alive:
+                    self.kill_enemy(enemy)
+                else:
+                    self.enemy_index.move(enemy)
+
+            # The store keeps its views in game order
+            store.compact()
+            self.enemies[:] = store.views
+        else:
+            for enemy in self.enemies:
+                enemy.update(dt)
+
+                if enemy.reached_end:
+                    self.leak_enemy(enemy)
+                elif not enemy.alive:
+                    self.kill_enemy(enemy)
+                else:
+                    self.enemy_index.move(enemy)
+
+            # Every enemy that is no longer alive was handled above
+            self.enemies.compact()
+        if profiler is not None:
+            profiler.lap('enemies')
+
+        # Update towers and collect new projectiles. The enemy store's
+        # arrays always go through the batched search.
+        batch = self.batch_targeting or store is not None
+        if batch:
+            retarget_towers(self.towers, self.enemies, store)
+
+        for tower in self.towers:
+            if batch and tower.target is not None and not tower.target.alive:
+                # Killed by a hitscan tower earlier in this loop; a per-tower
+                # search would pick a new target now, so do the same
+                retarget_towers((tower,), self.enemies, store)
+            projectile = tower.update(dt, self.enemies, self.enemy_index, retarget=not batch)
+            if projectile:
+                target = projectile.target
+                events.emit(Shot, tower, target, target.x, target.y)
+                if tower.hitscan:
+                    # Lands at once; the shot goes straight back to the pool
+                    projectile.x = target.x
+                    projectile.y = target.y
+                    self.apply_hit(projectile)
+                    projectile_pool.release(projectile)
+                else:
+                    self.projectiles.append(projectile)
+        if profiler is not None:
+            profiler.lap('towers')
+
+        # Update projectiles
+        for projectile in self.projectiles:
+            hit = projectile.update(dt)
+            if hit:
+                # Projectile hit target or target died
+                self.apply_hit(projectile)
+                # Remove projectile
+                projectile.active = False
+        self.projectiles.compact('active', on_remove=projectile_pool.release)
+        if profiler is not None:
+            profiler.lap('projectiles')
+
+        # End of tick: subscribers get this tick's events in batches
+        events.dispatch()
+
+        # Update particles
+        self.particles.update(dt)
+
+        # Update muzzle flashes and tracers
+        for flash in self.muzzle_flashes:
+            flash.update(dt)
+        self.muzzle_flashes.compact(on_remove=flash_pool.release)
+        for tracer in self.tracers:
+            tracer.update(dt)
+        self.tracers.compact(on_remove=tracer_pool.release)
+        if profiler is not None:
+            profiler.lap('effects')
+
+        if self.telemetry is not None:
+            self.telemetry.end_tick(self)
+            if profiler is not None:
+                profiler.resume()
+
+    def spawn_enemy(self, enemy_type, wave=None):
+        """
+        Add an enemy at the start of the path
+
+        Args:
+            enemy_type: String key from ENEMIES config
+            wave: Wave its health is scaled for (defaults to the current one)
+
+        Returns:
+            Enemy or EnemyView: The new enemy, with the next unique id
+        """
+        if wave is None:
+            wave = self.wave
+        if self.enemy_store is not None:
+            enemy = self.enemy_store.spawn(enemy_type, wave)
+        else:
+            enemy = Enemy(enemy_type, self.path, wave)
+        enemy.uid = self.next_enemy_uid
+        self.next_enemy_uid += 1
+        self.enemies.append(enemy)
+        self.enemy_index.insert(enemy)
+        return enemy
+
+    def set_visual_effects(self, enabled):
+        """Turn particles, muzzle flashes and tracers on or off"""
+        self.visual_effects = enabled
+        change = self.events.subscribe if enabled else self.events.unsubscribe
+        change(Shot, self.spawn_shot_effects)
+        change(Hit, self.spawn_hit_effects)
+        change(Kill, self.spawn_kill_effects)
+
+    def spawn_shot_effects(self, shots):
+        """Muzzle flash per shot, plus a tracer for hitscan towers"""
+        for shot in shots:
+            tower = shot.tower
+            color = tower.stats.color
+            self.muzzle_flashes.append(flash_pool.acquire(tower.x, tower.y, color))
+            if tower.hitscan:
+                self.tracers.append(tracer_pool.acquire(tower.x, tower.y, shot.x, shot.y, color))
+
+    def spawn_hit_effects(self, hits):
+        """Small spark burst where each shot landed"""
+        num_particles = max(1, round(8 * self.particle_scale))
+        for hit in hits:
+            self.particles.spawn_hit(hit.x, hit.y, num_particles)
+
+    def spawn_kill_effects(self, kills):
+        """Explosion in each dead enemy's color"""
+        num_particles = max(1, round(20 * self.particle_scale))
+        for kill in kills:
+            self.particles.spawn_explosion(kill.x, kill.y, kill.enemy.stats.color, num_particles)
+
+    def leak_enemy(self, enemy):
+        """An enemy reached the end of the path: it costs a life"""
+        self.health -= 1
+        self.enemies_leaked += 1
+        self.remove_enemy(enemy)
+        self.events.emit(Leak, enemy, self.health)
+        if self.health <= 0:
+            self.game_over = True
+
+    def kill_enemy(self, enemy):
+        """An enemy died: pay its reward"""
+        reward = enemy.get_reward()
+        self.currency += reward
+        self.enemies_killed += 1
+        self.remove_enemy(enemy)
+        self.events.emit(Kill, enemy, enemy.x, enemy.y, reward)
+
+    def remove_enemy(self, enemy):
+        """
+        Take a dead or escaped enemy out of every index
+
+        The enemy itself leaves self.enemies at the next compact().
+        """
+        self.enemy_index.remove(enemy)
+        if self.enemy_store is not None:
+            self.enemy_store.remove(enemy)
+
+    def apply_hit(self, projectile):
+        """Deal a shot's damage where it landed (projectile or hitscan)"""
+        if not projectile.target.alive:
+            return
+
+        self.events.emit(Hit, projectile.x, projectile.y, projectile.target, projectile.damage,
+                         projectile.splash_radius, projectile.tower_type)
+
+        if combat_log.debug_on:
+            combat_log.debug("Projectile hit! Damage: %s, Enemy health before: %.1f",
+                             projectile.damage, projectile.target.health)
+        # Deal damage
+        if projectile.splash_radius > 0:
+            # Splash damage
+            self.apply_splash_damage(projectile)
+        else:
+            # Single target
+            died = projectile.target.take_damage(projectile.damage)
+            if combat_log.debug_on:
+                combat_log.debug("Enemy health after: %.1f, died: %s", projectile.target.health, died)
+
+            # Apply slow if freeze tower
+            if projectile.tower_type == 'freeze':
+                tower = next((t for t in self.towers if t.type == 'freeze'), None)
+                if tower:
+                    projectile.target.apply_slow(tower.slow_duration, tower.slow_amount)
+
+    def apply_splash_damage(self, projectile):
+        """Apply splash damage to enemies in radius"""
+        if self.enemy_store is not None:
+            self.enemy_store.splash_damage(projectile.x, projectile.y, projectile.splash_radius, projectile.damage)
+            return
+
+        for enemy in self.enemy_index.query(projectile.x, projectile.y, projectile.splash_radius):
+            if not enemy.alive:
+                continue
+
+            dx = enemy.x - projectile.x
+            dy = enemy.y - projectile.y
+            distance = math.sqrt(dx**2 + dy**2)
+
+            if distance <= projectile.splash_radius:
+                enemy.take_damage(projectile.damage)
+
+    def snapshot(self):
+        """
+        Summarize the current state
+
+        Returns:
+            dict: Plain values only, safe to print, compare or serialize
+        """
+        return {
+            'tick': self.tick,
+            'wave': self.wave,
+            'wave_active': self.wave_active,
+            'health': self.health,
+            'currency': self.currency,
+            'game_over': self.game_over,
+            'enemies_killed': self.enemies_killed,
+            'enemies_leaked': self.enemies_leaked,
+            'enemies_to_spawn': len(self.enemies_to_spawn),
+            'enemies': [(e.type, e.x, e.y, e.health) for e in self.enemies],
+            'towers': [(t.type, t.grid_x, t.grid_y, t.level) for t in self.towers],
+            'projectiles': len(self.projectiles),
+            'particles': len(self.particles),
+        }
@@ -0,0 +1,123 @@
+"""
+Spatial hash - Uniform grid index for fast "enemies near a point" queries
+"""
+from config import GRID_SIZE
+
+
+class SpatialHash:
+    """
+    Buckets enemies by grid cell so range queries only visit nearby cells
+
+    Enemies are moved between buckets incrementally as they walk, so the
+    index never has to be rebuilt from scratch.
+    """
+
+    def __init__(self, cell_size=GRID_SIZE):
+        """
+        Initialize an empty index
+
+        Args:
+            cell_size: Bucket size in pixels (defaults to one grid cell)
+        """
+        self.cell_size = cell_size
+        self.buckets = {}  # (cell_x, cell_y) -> {enemy: None}, insertion ordered
+        self.cells = {}  # enemy -> (cell_x, cell_y)
+        self.order = {}  # enemy -> insertion sequence, for stable tie-breaking
+        self.next_order = 0
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, enemy):
+        return enemy in self.cells
+
+    def cell_of(self, x, y):
+        """Returns the bucket key for a pixel position"""
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def insert(self, enemy):
+        """Add an enemy to the index"""
+        cell = self.cell_of(enemy.x, enemy.y)
+        self.cells[enemy] = cell
+        self.order[enemy] = self.next_order
+        self.next_order += 1
+        bucket = self.buckets.get(cell)
+        if bucket is None:
+            bucket = self.buckets[cell] = {}
+        bucket[enemy] = None
+
+    def remove(self, enemy):
+        """Remove an enemy from the index (no-op if it is not indexed)"""
+        cell = self.cells.pop(enemy, None)
+        if cell is None:
+            return
+        del self.order[enemy]
+        bucket = self.buckets[cell]
+        del bucket[enemy]
+        if not bucket:
+            del self.buckets[cell]
+
+    def move(self, enemy):
+        """Re-bucket an enemy after its position changed"""
+        cell = self.cell_of(enemy.x, enemy.y)
+        old_cell = self.cells[enemy]
+        if cell == old_cell:
+            return
+
+        bucket = self.buckets[old_cell]
+        del bucket[enemy]
+        if not bucket:
+            del self.buckets[old_cell]
+
+        self.cells[enemy] = cell
+        bucket = self.buckets.get(cell)
+        if bucket is None:
+            bucket = self.buckets[cell] = {}
+        bucket[enemy] = None
+
+    def clear(self):
+        """Remove every enemy"""
+        self.buckets.clear()
+        self.cells.clear()
+        self.order.clear()
+
+    def query(self, x, y, radius, ordered=False):
+        """
+        Find enemies whose bucket overlaps a circle
+
+        This is a broad phase: callers still do their own exact distance
+        check, since bucket corners can lie outside the circle.
+
+        Args:
+            x, y: Circle center in pixels
+            radius: Circle radius in pixels
+            ordered: Return candidates in insertion (spawn) order, so
+                first-match tie-breaking gives the same answer as a scan
+                over the full enemy list
+
+        Returns:
+            list: Candidate enemies
+        """
+        size = self.cell_size
+        min_cx = int((x - radius) // size)
+        max_cx = int((x + radius) // size)
+        min_cy = int((y - radius) // size)
+        max_cy = int((y + radius) // size)
+
+        buckets = self.buckets
+        found = []
+        if len(buckets) < (max_cx - min_cx + 1) * (max_cy - min_cy + 1):
+            # Fewer occupied buckets than cells in the box - walk the buckets
+            for (cx, cy), bucket in buckets.items():
+                if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy:
+                    found.extend(bucket)
+        else:
+            for cx in range(min_cx, max_cx + 1):
+                for cy in range(min_cy, max_cy + 1):
+                    bucket = buckets.get((cx, cy))
+                    if bucket:
+                        found.extend(bucket)
+
+        if ordered and len(found) > 1:
+            found.sort(key=self.order.__getitem__)
+        return found
@@ -0,0 +1,125 @@
+"""
+Stat records - Per-type stats compiled once from config
+
+Every enemy and tower of a type shares one read-only record instead of
+carrying its own copy of the config dict. Curves that only depend on the
+type are precomputed: an enemy's health for each wave, and a tower's
+damage, fire rate and costs for each level.
+
+Balance variants edit the config dicts in place; call compile_stats()
+afterwards (balance.py does) so new entities see the change.
+"""
+import config
+
+# Waves with a precomputed health value; later waves are computed on spawn
+HEALTH_TABLE_WAVES = 100
+
+
+class StatRecord:
+    """Read-only attribute record"""
+
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class EnemyStats(StatRecord):
+    """Stats shared by every enemy of one type"""
+
+    __slots__ = ('type', 'name', 'health', 'speed', 'reward', 'regen_rate', 'color',
+                 'wave_scaling', 'health_by_wave')
+
+    def max_health(self, wave):
+        """Starting health of this enemy type when spawned in `wave`"""
+        if 0 <= wave < len(self.health_by_wave):
+            return self.health_by_wave[wave]
+        return self.health * (1 + (wave - 1) * self.wave_scaling)
+
+
+class TowerStats(StatRecord):
+    """Stats shared by every tower of one type; per-level tuples start at level 1"""
+
+    __slots__ = ('type', 'name', 'cost', 'range', 'projectile_speed', 'splash_radius',
+                 'slow_duration', 'slow_amount', 'hitscan', 'color', 'max_level',
+                 'damage_by_level', 'fire_rate_by_level', 'upgrade_cost_by_level',
+                 'total_cost_by_level')
+
+
+def compile_enemy(enemy_type, entry, wave_scaling):
+    """Build the EnemyStats record for one ENEMIES entry"""
+    health = entry['health']
+    return EnemyStats(
+        type=enemy_type,
+        name=entry['name'],
+        health=health,
+        speed=entry['speed'],
+        reward=entry['reward'],
+        regen_rate=entry.get('regen_rate', 0),
+        color=tuple(entry['color']),
+        wave_scaling=wave_scaling,
+        # Same expression as the fallback in max_health(), so table and
+        # formula agree to the last bit
+        health_by_wave=tuple(health * (1 + (wave - 1) * wave_scaling)
+                             for wave in range(HEALTH_TABLE_WAVES + 1)),
+    )
+
+
+def compile_tower(tower_type, entry, max_level):
+    """Build the TowerStats record for one TOWERS entry"""
+    damage = [entry['damage']]
+    fire_rate = [entry['fire_rate']]
+    # Upgrades add up one level at a time, as Tower.upgrade used to
+    for _ in range(max_level - 1):
+        damage.append(damage[-1] + entry['upgrade_damage'])
+        fire_rate.append(fire_rate[-1] + entry['upgrade_fire_rate'])
+
+    # upgrade_cost[level - 1] is the price of the next level (0 at the top)
+    upgrade_cost = [entry['upgrade_cost'] * level for level in range(1, max_level)] + [0]
+    total_cost = [entry['cost']]
+    for cost in upgrade_cost[:-1]:
+        total_cost.append(total_cost[-1] + cost)
+
+    return TowerStats(
+        type=tower_type,
+        name=entry['name'],
+        cost=entry['cost'],
+        range=entry['range'],
+        projectile_speed=entry['projectile_speed'],
+        splash_radius=entry.get('splash_radius', 0),
+        slow_duration=entry.get('slow_duration', 0),
+        slow_amount=entry.get('slow_amount', 0),
+        hitscan=entry.get('hitscan', False),
+        color=tuple(entry['color']),
+        max_level=max_level,
+        damage_by_level=tuple(damage),
+        fire_rate_by_level=tuple(fire_rate),
+        upgrade_cost_by_level=tuple(upgrade_cost),
+        total_cost_by_level=tuple(total_cost),
+    )
+
+
+# type -> record; updated in place so `from stats import ...` stays valid
+ENEMY_STATS = {}
+TOWER_STATS = {}
+
+
+def compile_stats():
+    """(Re)build every record from the current config values"""
+    ENEMY_STATS.clear()
+    for enemy_type, entry in config.ENEMIES.items():
+        ENEMY_STATS[enemy_type] = compile_enemy(enemy_type, entry, config.WAVE_HEALTH_SCALING)
+    TOWER_STATS.clear()
+    for tower_type, entry in config.TOWERS.items():
+        TOWER_STATS[tower_type] = compile_tower(tower_type, entry, config.TOWER_MAX_LEVEL)
+
+
+compile_stats()
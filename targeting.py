@@ -0,0 +1,113 @@
+"""
+Batched targeting - Retarget all towers at once with a NumPy distance matrix
+"""
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional - towers fall back to find_target
+    np = None
+
+# Cap on tower x enemy matrix cells computed at once, to bound memory
+MAX_MATRIX_CELLS = 1 << 22
+
+
+def needs_retarget(tower):
+    """Same test Tower.update uses before calling find_target"""
+    target = tower.target
+    return target is None or not target.alive or tower.get_distance_to(target) > tower.range
+
+
+def enemy_arrays(enemies, store=None):
+    """
+    Collect enemy positions, progress and liveness as arrays
+
+    Args:
+        enemies: List of Enemy (or EnemyView) objects, in game order
+        store: Optional EnemyStore whose slots are exactly `enemies`
+
+    Returns:
+        tuple: (x, y, progress, alive) arrays, indexed like `enemies`
+    """
+    if store is not None:
+        n = store.count
+        return store.x[:n], store.y[:n], store.distance[:n], store.alive[:n]
+
+    n = len(enemies)
+    x = np.fromiter((e.x for e in enemies), dtype=np.float64, count=n)
+    y = np.fromiter((e.y for e in enemies), dtype=np.float64, count=n)
+    progress = np.fromiter((e.distance for e in enemies), dtype=np.float64, count=n)
+    alive = np.fromiter((bool(e.alive) for e in enemies), dtype=np.bool_, count=n)
+    return x, y, progress, alive
+
+
+def batch_find_targets(towers, enemies, store=None):
+    """
+    Pick the best target for each tower in one vectorized pass
+
+    Gives the same answer as calling Tower.find_target(enemies) on every
+    tower: the live enemy in range that is furthest along the path, ties
+    going to the earliest enemy in the list.
+
+    Args:
+        towers: Towers to find targets for
+        enemies: List of Enemy objects
+        store: Optional EnemyStore backing `enemies`
+
+    Returns:
+        list: Enemy or None per tower
+    """
+    if not towers:
+        return []
+    if not enemies:
+        return [None] * len(towers)
+
+    ex, ey, progress, alive = enemy_arrays(enemies, store)
+    tx = np.array([t.x for t in towers], dtype=np.float64)
+    ty = np.array([t.y for t in towers], dtype=np.float64)
+    ranges = np.array([t.range for t in towers], dtype=np.float64)
+
+    # Only live enemies can ever be picked - drop the rest up front
+    candidates = np.flatnonzero(alive)
+    ex = ex[candidates]
+    ey = ey[candidates]
+    # Progress is never negative, so -1 means "nothing in range"
+    progress = progress[candidates]
+
+    results = []
+    chunk = max(1, MAX_MATRIX_CELLS // max(len(candidates), 1))
+    for start in range(0, len(towers), chunk):
+        stop = start + chunk
+        dx = ex[None, :] - tx[start:stop, None]
+        dy = ey[None, :] - ty[start:stop, None]
+        distance = np.sqrt(dx * dx + dy * dy)
+        score = np.where(distance <= ranges[start:stop, None], progress[None, :], -1.0)
+
+        if score.shape[1] == 0:
+            results.extend([None] * score.shape[0])
+            continue
+
+        # argmax returns the first maximum, matching find_target's strict ">"
+        best = np.argmax(score, axis=1)
+        found = score[np.arange(len(best)), best] >= 0
+        for column, ok in zip(best.tolist(), found.tolist()):
+            results.append(enemies[candidates[column]] if ok else None)
+
+    return results
+
+
+def retarget_towers(towers, enemies, store=None):
+    """
+    Re-target only towers whose target died or left range
+
+    Args:
+        towers: All towers
+        enemies: List of Enemy objects
+        store: Optional EnemyStore backing `enemies`
+
+    Returns:
+        int: Number of towers that were re-targeted
+    """
+    stale = [tower for tower in towers if needs_retarget(tower)]
+    if stale:
+        for tower, target in zip(stale, batch_find_targets(stale, enemies, store)):
+            tower.target = target
+    return len(stale)
@@ -0,0 +1,380 @@
+"""
+Telemetry - Per-tick trace of a game in memory-mapped column files
+
+A recorder attached to a Simulation (recorder.attach(sim)) writes, every tick,
+where each enemy is and how healthy it is, what each tower is aiming at,
+and every shot fired. Each column of each table is its own fixed-width
+file, appended through mmap. A tick costs a few memory copies into the
+page cache and the OS writes them back on its own; growing a file is an
+ftruncate and a remap, never a write() from the game loop.
+
+Tables (one row per entity per recorded tick, or per shot):
+    ticks:   tick, first row of this tick in enemies / towers / shots
+    enemies: tick, uid, type, x, y, health, flags (1 alive, 2 reached end)
+    towers:  tick, grid_x, grid_y, type, level, target (enemy uid, 0 none)
+    shots:   tick, grid_x, grid_y, target, damage
+
+The reader maps only the columns it is asked for and slices them by
+tick range through the ticks table, or filters them by enemy uid, without
+reading the rest of the file.
+
+Usage:
+    python telemetry.py telemetry/trace-12345-20240101-120000
+    python telemetry.py <trace> --enemy 42 --ticks 1000 2000
+"""
+from array import array
+import argparse
+from bisect import bisect_left
+import json
+import mmap
+import os
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional - entity lookups scan in Python
+    np = None
+
+from config import SIM_TICK_RATE, TELEMETRY_INTERVAL
+from events import Shot
+from stats import ENEMY_STATS, TOWER_STATS
+
+TRACE_VERSION = 1
+
+# table -> ((column, array typecode), ...)
+TABLES = {
+    'ticks': (('tick', 'I'), ('enemies', 'Q'), ('towers', 'Q'), ('shots', 'Q')),
+    'enemies': (('tick', 'I'), ('uid', 'Q'), ('type', 'B'), ('x', 'f'), ('y', 'f'),
+                ('health', 'f'), ('flags', 'B')),
+    'towers': (('tick', 'I'), ('grid_x', 'H'), ('grid_y', 'H'), ('type', 'B'), ('level', 'B'),
+               ('target', 'Q')),
+    'shots': (('tick', 'I'), ('grid_x', 'H'), ('grid_y', 'H'), ('target', 'Q'), ('damage', 'f')),
+}
+
+# Rows added to a column file each time it fills up
+CHUNK_ROWS = 1 << 18
+
+# Enemy flag bits
+ALIVE = 1
+REACHED_END = 2
+
+
+def column_path(directory, table, column):
+    return os.path.join(directory, f"{table}.{column}.bin")
+
+
+class _ColumnFile:
+    """One fixed-width column, appended through a growing mmap"""
+
+    def __init__(self, path, typecode, chunk_rows):
+        self.typecode = typecode
+        self.itemsize = array(typecode).itemsize
+        self.chunk_rows = chunk_rows
+        self.file = open(path, 'w+b')
+        self.map = None
+        self.capacity = 0
+        self.rows = 0
+
+    def _grow(self, rows):
+        capacity = max(rows, self.capacity + self.chunk_rows)
+        if self.map is not None:
+            self.map.close()
+        # Extending the file only reserves (sparse) space; nothing is written
+        self.file.truncate(capacity * self.itemsize)
+        self.map = mmap.mmap(self.file.fileno(), capacity * self.itemsize)
+        self.capacity = capacity
+
+    def append(self, values):
+        """Append an array() of this column's typecode"""
+        count = len(values)
+        if not count:
+            return
+        if self.rows + count > self.capacity:
+            self._grow(self.rows + count)
+        start = self.rows * self.itemsize
+        self.map[start:start + count * self.itemsize] = memoryview(values).cast('B')
+        self.rows += count
+
+    def close(self):
+        """Unmap and cut the file down to the rows actually written"""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.truncate(self.rows * self.itemsize)
+        self.file.close()
+
+
+class TelemetryRecorder:
+    """Writes a trace of the Simulation it is attached to"""
+
+    def __init__(self, directory, interval=TELEMETRY_INTERVAL, chunk_rows=CHUNK_ROWS, seed=None):
+        """
+        Args:
+            directory: Trace folder (created; existing column files are replaced)
+            interval: Record enemies and towers every Nth tick (shots always)
+            chunk_rows: Rows each column file grows by when full
+            seed: Game seed, stored with the trace
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.interval = interval
+        self.enemy_types = list(ENEMY_STATS)
+        self.tower_types = list(TOWER_STATS)
+        self.enemy_type_index = {name: i for i, name in enumerate(self.enemy_types)}
+        self.tower_type_index = {name: i for i, name in enumerate(self.tower_types)}
+        self.files = {
+            table: {name: _ColumnFile(column_path(directory, table, name), typecode, chunk_rows)
+                    for name, typecode in columns}
+            for table, columns in TABLES.items()
+        }
+        # Shots fired during the current tick, flushed by end_tick
+        self.pending_shots = []
+        self.sim = None
+        self.meta = {
+            'version': TRACE_VERSION,
+            'byteorder': sys.byteorder,
+            'seed': seed,
+            'tick_rate': SIM_TICK_RATE,
+            'interval': interval,
+            'enemy_types': self.enemy_types,
+            'tower_types': self.tower_types,
+            'columns': {table: dict(columns) for table, columns in TABLES.items()},
+            'rows': None,  # Filled in by close(); None marks an unfinished trace
+        }
+        self.write_meta()
+
+    def write_meta(self):
+        with open(os.path.join(self.directory, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+    def attach(self, sim):
+        """Start recording a game from its next step"""
+        self.sim = sim
+        self.meta['map'] = sim.map.name
+        sim.telemetry = self
+        sim.events.subscribe(Shot, self.on_shots)
+
+    def detach(self):
+        if self.sim is not None:
+            self.sim.events.unsubscribe(Shot, self.on_shots)
+            self.sim.telemetry = None
+            self.sim = None
+
+    def on_shots(self, shots):
+        """Event bus handler: note this tick's shots"""
+        self.pending_shots.extend((shot.tower.grid_x, shot.tower.grid_y, shot.target.uid, shot.tower.damage)
+                                  for shot in shots)
+
+    def _append(self, table, columns):
+        files = self.files[table]
+        for name, typecode in TABLES[table]:
+            files[name].append(array(typecode, columns[name]))
+
+    def end_tick(self, sim):
+        """Record the state at the end of a step"""
+        tick = sim.tick
+        files = self.files
+        self._append('ticks', {
+            'tick': (tick,),
+            'enemies': (files['enemies']['tick'].rows,),
+            'towers': (files['towers']['tick'].rows,),
+            'shots': (files['shots']['tick'].rows,),
+        })
+
+        shots = self.pending_shots
+        if shots:
+            grid_x, grid_y, target, damage = zip(*shots)
+            self._append('shots', {'tick': [tick] * len(shots), 'grid_x': grid_x, 'grid_y': grid_y,
+                                   'target': target, 'damage': damage})
+            shots.clear()
+
+        if tick % self.interval:
+            return
+
+        enemies = list(sim.enemies)
+        if enemies:
+            type_index = self.enemy_type_index
+            self._append('enemies', {
+                'tick': [tick] * len(enemies),
+                'uid': [e.uid for e in enemies],
+                'type': [type_index[e.type] for e in enemies],
+                'x': [e.x for e in enemies],
+                'y': [e.y for e in enemies],
+                'health': [e.health for e in enemies],
+                'flags': [(ALIVE if e.alive else 0) | (REACHED_END if e.reached_end else 0) for e in enemies],
+            })
+
+        towers = sim.towers
+        if towers:
+            type_index = self.tower_type_index
+            self._append('towers', {
+                'tick': [tick] * len(towers),
+                'grid_x': [t.grid_x for t in towers],
+                'grid_y': [t.grid_y for t in towers],
+                'type': [type_index[t.type] for t in towers],
+                'level': [t.level for t in towers],
+                'target': [t.target.uid if t.target is not None else 0 for t in towers],
+            })
+
+    def close(self):
+        """Detach and finish the trace; it can only be read after this"""
+        self.detach()
+        if self.files is None:
+            return
+        self.meta['rows'] = {table: files['tick'].rows for table, files in self.files.items()}
+        for files in self.files.values():
+            for column in files.values():
+                column.close()
+        self.files = None
+        self.write_meta()
+
+
+class TelemetryTrace:
+    """
+    Reads a finished trace
+
+    Columns come back as memoryviews straight into the mapped files
+    (index them, iterate them, or wrap them with np.asarray). Copy what you
+    need to keep before close().
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version: {meta.get('version')}")
+        if meta['rows'] is None:
+            raise ValueError(f"Trace was not closed: {directory}")
+        if meta['byteorder'] != sys.byteorder:
+            raise ValueError(f"Trace was written on a {meta['byteorder']}-endian machine")
+        self.directory = directory
+        self.meta = meta
+        self.rows = meta['rows']
+        self.enemy_types = meta['enemy_types']
+        self.tower_types = meta['tower_types']
+        self.maps = {}  # (table, column) -> (mmap, memoryview)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def column(self, table, name):
+        """A whole column, mapped on first use"""
+        key = (table, name)
+        if key not in self.maps:
+            typecode = self.meta['columns'][table][name]
+            if not self.rows[table]:
+                self.maps[key] = (None, memoryview(array(typecode)))
+            else:
+                with open(column_path(self.directory, table, name), 'rb') as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.maps[key] = (mapped, memoryview(mapped).cast(typecode))
+        return self.maps[key][1]
+
+    @property
+    def first_tick(self):
+        ticks = self.column('ticks', 'tick')
+        return ticks[0] if len(ticks) else 0
+
+    @property
+    def last_tick(self):
+        ticks = self.column('ticks', 'tick')
+        return ticks[-1] if len(ticks) else 0
+
+    def row_range(self, table, start_tick=None, stop_tick=None):
+        """
+        Rows of a table recorded in [start_tick, stop_tick)
+
+        Returns:
+            tuple: (first row, end row)
+        """
+        if table == 'ticks':
+            raise ValueError("row_range() is for the entity tables")
+        ticks = self.column('ticks', 'tick')
+        first = self.column('ticks', table)
+
+        def row_at(tick, default):
+            if tick is None:
+                return default
+            index = bisect_left(ticks, tick)
+            return first[index] if index < len(ticks) else self.rows[table]
+
+        return row_at(start_tick, 0), row_at(stop_tick, self.rows[table])
+
+    def slice(self, table, start_tick=None, stop_tick=None, columns=None):
+        """
+        Columns of a table for a tick range
+
+        Args:
+            table: 'enemies', 'towers' or 'shots'
+            start_tick, stop_tick: Tick range (None = from start / to end)
+            columns: Column names (default: all)
+
+        Returns:
+            dict: column -> memoryview of the rows in range
+        """
+        start, stop = self.row_range(table, start_tick, stop_tick)
+        names = columns or [name for name, _ in TABLES[table]]
+        return {name: self.column(table, name)[start:stop] for name in names}
+
+    def enemy(self, uid, start_tick=None, stop_tick=None):
+        """
+        One enemy's rows
+
+        Returns:
+            dict: column -> list of values, in tick order
+        """
+        start, stop = self.row_range('enemies', start_tick, stop_tick)
+        uids = self.column('enemies', 'uid')[start:stop]
+        if np is not None:
+            rows = (np.flatnonzero(np.asarray(uids) == uid) + start).tolist()
+        else:
+            rows = [start + i for i, value in enumerate(uids) if value == uid]
+        return {name: [self.column('enemies', name)[row] for row in rows]
+                for name, _ in TABLES['enemies']}
+
+    def close(self):
+        for mapped, view in self.maps.values():
+            view.release()
+            if mapped is not None:
+                try:
+                    mapped.close()
+                except BufferError:
+                    pass  # A caller still holds a slice; unmapped when it is freed
+        self.maps = {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a telemetry trace")
+    parser.add_argument('trace', help="Trace folder written by TelemetryRecorder")
+    parser.add_argument('--ticks', type=int, nargs=2, metavar=('START', 'STOP'), help="Tick range")
+    parser.add_argument('--enemy', type=int, help="Print one enemy's track (by uid)")
+    args = parser.parse_args(argv)
+    start, stop = args.ticks if args.ticks else (None, None)
+
+    with TelemetryTrace(args.trace) as trace:
+        print(f"{args.trace}: ticks {trace.first_tick}-{trace.last_tick}, seed {trace.meta['seed']}, "
+              f"every {trace.meta['interval']} tick(s)")
+        for table in ('enemies', 'towers', 'shots'):
+            first, end = trace.row_range(table, start, stop)
+            print(f"  {table:<8} {end - first:>10,} rows")
+
+        if args.enemy is not None:
+            track = trace.enemy(args.enemy, start, stop)
+            if not track['tick']:
+                print(f"  enemy {args.enemy}: no rows")
+                return 1
+            print(f"  enemy {args.enemy} ({trace.enemy_types[track['type'][0]]}): "
+                  f"ticks {track['tick'][0]}-{track['tick'][-1]}")
+            for tick, x, y, health in zip(track['tick'], track['x'], track['y'], track['health']):
+                print(f"    {tick:>8}  ({x:7.1f}, {y:7.1f})  health {health:8.1f}")
+        else:
+            shots = trace.slice('shots', start, stop, ['damage'])['damage']
+            print(f"  damage fired {sum(shots):,.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
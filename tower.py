@@ -2,13 +2,20 @@
 Tower class - Handles tower behavior, targeting, and shooting
 """
 import math
-from config import TOWERS
-from projectile import Projectile
+from projectile import projectile_pool
+from gamelog import get_logger
+from stats import TOWER_STATS
+
+log = get_logger('tower')
 
 
 class Tower:
     """Represents a tower that can be placed on the grid"""
     
+    __slots__ = ('type', 'stats', 'grid_x', 'grid_y', 'x', 'y', 'damage', 'fire_rate', 'range',
+                 'projectile_speed', 'fire_timer', 'target', 'level', 'splash_radius',
+                 'slow_duration', 'slow_amount', 'hitscan', 'reach')
+    
     def __init__(self, tower_type, grid_x, grid_y, cell_size):
         """
         Initialize a tower
@@ -19,7 +26,7 @@ class Tower:
             cell_size: Size of grid cells in pixels
         """
         self.type = tower_type
-        self.stats = TOWERS[tower_type].copy()
+        self.stats = stats = TOWER_STATS[tower_type]  # Shared, read-only
         
         # Position (center of grid cell)
         self.grid_x = grid_x
@@ -28,10 +35,10 @@ class Tower:
         self.y = grid_y * cell_size + cell_size // 2
         
         # Combat stats
-        self.damage = self.stats['damage']
-        self.fire_rate = self.stats['fire_rate']
-        self.range = self.stats['range']
-        self.projectile_speed = self.stats['projectile_speed']
+        self.damage = stats.damage_by_level[0]
+        self.fire_rate = stats.fire_rate_by_level[0]
+        self.range = stats.range
+        self.projectile_speed = stats.projectile_speed
         
         # Shooting
         self.fire_timer = 0
@@ -41,27 +48,46 @@ class Tower:
         self.level = 1
         
         # Special properties
-        self.splash_radius = self.stats.get('splash_radius', 0)
-        self.slow_duration = self.stats.get('slow_duration', 0)
-        self.slow_amount = self.stats.get('slow_amount', 0)
+        self.splash_radius = stats.splash_radius
+        self.slow_duration = stats.slow_duration
+        self.slow_amount = stats.slow_amount
+        self.hitscan = stats.hitscan  # Shots land on the tick they are fired
         
-    def update(self, dt, enemies):
+        # Arc-length intervals of the path in range (see path_coverage.py), or
+        # None to check every enemy. Set by the simulation on placement.
+        self.reach = None
+        
+    def update(self, dt, enemies, spatial_index=None, retarget=True):
         """
         Update tower targeting and shooting
         
         Args:
             dt: Delta time in seconds
             enemies: List of Enemy objects
+            spatial_index: Optional SpatialHash over the same enemies; when
+                given, only enemies in nearby buckets are considered
+            retarget: Set False when targets were already assigned by a
+                batched pass (see targeting.retarget_towers)
             
         Returns:
-            Projectile or None: New projectile if tower shot
+            Projectile or None: New projectile if tower shot. Hitscan
+                towers' shots are resolved and released on the same tick.
         """
         # Update fire timer
         self.fire_timer -= dt
         
         # Find target if we don't have one or current target is dead or out of range
-        if self.target is None or not self.target.alive or self.get_distance_to(self.target) > self.range:
-            self.target = self.find_target(enemies)
+        if retarget and (self.target is None or not self.target.alive or self.get_distance_to(self.target) > self.range):
+            if self.reach is not None and not self.reach:
+                # Range doesn't touch the path, no need to look
+                self.target = None
+            else:
+                if spatial_index is not None:
+                    enemies = spatial_index.query(self.x, self.y, self.range, ordered=True)
+                self.target = self.find_target(enemies)
+                if log.debug_on and self.target is not None:
+                    log.debug("%s at (%s, %s) targeting %s at distance %.1f", self.type,
+                              self.grid_x, self.grid_y, self.target.type, self.target.distance)
         
         # Shoot if ready and target is in range
         if self.target and self.fire_timer <= 0:
@@ -89,16 +115,30 @@ class Tower:
         best_target = None
         best_progress = -1
         
+        reach = self.reach
+        if reach is not None and not reach:
+            # Range doesn't touch the path at all
+            return None
+        
         for enemy in enemies:
             if not enemy.alive:
                 continue
+            
+            # Skip enemies on stretches of path this tower can never reach
+            if reach is not None:
+                progress = enemy.distance
+                for start, end in reach:
+                    if start <= progress <= end:
+                        break
+                else:
+                    continue
                 
             # Check if in range
             distance = self.get_distance_to(enemy)
             if distance <= self.range:
                 # Prefer enemies further along the path
-                if enemy.path_index > best_progress:
-                    best_progress = enemy.path_index
+                if enemy.distance > best_progress:
+                    best_progress = enemy.distance
                     best_target = enemy
         
         return best_target
@@ -110,7 +150,7 @@ class Tower:
         Returns:
             Projectile: New projectile object
         """
-        return Projectile(
+        return projectile_pool.acquire(
             self.x, self.y,
             self.target,
             self.damage,
@@ -132,27 +172,23 @@ class Tower:
         Returns:
             int: Cost of upgrade, or 0 if max level
         """
-        if self.level >= 3:  # Max 3 levels
+        stats = self.stats
+        if self.level >= stats.max_level:
             return 0
         
-        cost = self.stats['upgrade_cost'] * self.level
+        cost = stats.upgrade_cost_by_level[self.level - 1]
         
         # Apply upgrades
-        self.damage += self.stats['upgrade_damage']
-        self.fire_rate += self.stats['upgrade_fire_rate']
         self.level += 1
+        self.damage = stats.damage_by_level[self.level - 1]
+        self.fire_rate = stats.fire_rate_by_level[self.level - 1]
         
         return cost
     
     def get_upgrade_cost(self):
         """Returns cost to upgrade, or 0 if max level"""
-        if self.level >= 3:
-            return 0
-        return self.stats['upgrade_cost'] * self.level
+        return self.stats.upgrade_cost_by_level[self.level - 1]
     
     def get_total_cost(self):
         """Returns total currency invested in this tower"""
-        total = self.stats['cost']
-        for i in range(1, self.level):
-            total += self.stats['upgrade_cost'] * i
-        return total
+        return self.stats.total_cost_by_level[self.level - 1]